@@ -0,0 +1,125 @@
+"""
+Admin endpoints.
+Operator-only views guarded by the X-Admin-Token header: request profiles,
+and inspection, invalidation and warm-up of the response cache.
+"""
+
+import logging
+from pathlib import Path
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from pydantic import ValidationError
+
+from app.api.v1.generate import prepare_generation
+from app.core.config import settings
+from app.core.profiling import PROFILE_SUFFIX, list_profiles
+from app.core.security import require_admin
+from app.models.request import CacheInvalidationRequest, CacheWarmUpRequest, MythGenerationRequest
+from app.services.cache_snapshot import cache_snapshotter
+from app.services.generation import cache_refresher
+from app.services.jobs import JobQueueFull, job_runner
+from app.services.moderation import moderation_cache
+from app.services.myth_store import myth_store
+from app.services.prerender import prerenderer
+from app.services.response_cache import cache_report, invalidate, is_fresh
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/admin", dependencies=[Depends(require_admin)])
+
+
+@router.get("/profiles")
+async def recent_profiles():
+    """Recent request profiles, newest first"""
+
+    return {
+        "enabled": settings.PROFILING_ENABLED,
+        "sample_rate": settings.PROFILE_SAMPLE_RATE,
+        "profiles": list_profiles(Path(settings.PROFILE_DIR)),
+    }
+
+
+@router.get("/profiles/{name}", response_class=PlainTextResponse)
+async def download_profile(name: str):
+    """Folded stacks of one profile, ready for flamegraph.pl or speedscope"""
+
+    path = Path(settings.PROFILE_DIR) / name
+    if not name.endswith(PROFILE_SUFFIX) or path.name != name or not path.is_file():
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return PlainTextResponse(path.read_text())
+
+
+@router.get("/cache")
+async def cache_statistics(top: int = Query(default=10, ge=0, le=100, description="Most-hit keys to list")):
+    """Statistics for every cache tier of this worker"""
+
+    snapshot = None
+    if cache_snapshotter is not None:
+        path = cache_snapshotter.path
+        snapshot = {"path": str(path), "bytes": path.stat().st_size if path.exists() else 0}
+
+    return {
+        "template_version": settings.PROMPT_TEMPLATE_VERSION,
+        "response_cache": {**cache_report(top), "refreshing": cache_refresher.in_flight},
+        "snapshot": snapshot,
+        "moderation_cache": {"entries": len(moderation_cache)},
+        "myth_store": {"entries": len(myth_store)},
+        "prerender": prerenderer.stats(),
+    }
+
+
+@router.post("/cache/invalidate")
+async def invalidate_cache(filters: CacheInvalidationRequest):
+    """Drop matching responses from the cache and its snapshot"""
+
+    selected = filters.model_dump(exclude_none=True)
+    if not selected:
+        raise HTTPException(status_code=400, detail='Give at least one filter; {"key_prefix": ""} drops everything')
+
+    # A restore still merging the old snapshot would bring dropped entries back
+    if cache_snapshotter is not None:
+        await cache_snapshotter.restored()
+    removed = invalidate(**selected)
+
+    # Rewrite the snapshot so a restart does not restore them either
+    snapshot_entries = None
+    if cache_snapshotter is not None and removed:
+        snapshot_entries = await cache_snapshotter.save()
+
+    logger.info("Admin invalidated %d cached responses matching %s", removed, selected)
+    return {"removed": removed, "snapshot_entries": snapshot_entries}
+
+
+@router.post("/cache/warm", status_code=202)
+async def warm_cache(warm_up: CacheWarmUpRequest):
+    """Queue generation jobs for scenarios that are not freshly cached"""
+
+    result = {"queued": 0, "cached": 0, "duplicates": 0, "rejected": 0, "queue_full": 0, "jobs": []}
+    seen = set()
+    for position, scenario in enumerate(warm_up.scenarios):
+        try:
+            request = MythGenerationRequest(scenario=scenario, culture=warm_up.culture, tone=warm_up.tone)
+            analysis, cache_key = prepare_generation(request)
+        except (ValidationError, HTTPException):
+            result["rejected"] += 1
+            continue
+
+        if cache_key in seen:
+            result["duplicates"] += 1
+            continue
+        seen.add(cache_key)
+        if is_fresh(cache_key):
+            result["cached"] += 1
+            continue
+
+        try:
+            job = await job_runner.submit(request, analysis, cache_key)
+        except JobQueueFull:
+            # Jobs share the queue with users; leave the rest for another call
+            result["queue_full"] = len(warm_up.scenarios) - position
+            break
+        result["queued"] += 1
+        result["jobs"].append(job.id)
+
+    return result
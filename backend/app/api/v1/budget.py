@@ -0,0 +1,21 @@
+"""
+Token budget endpoint.
+Shows the calling client how many tokens it has left in each window.
+"""
+
+from fastapi import APIRouter, Request
+
+from app.services.token_budget import client_identity, token_budget
+
+router = APIRouter()
+
+
+@router.get("/budget")
+async def remaining_budget(req: Request):
+    """Remaining token budget of the caller"""
+    
+    client_id = client_identity(req)
+    return {
+        "client": client_id,
+        "windows": await token_budget.status(client_id),
+    }
@@ -5,92 +5,205 @@ Handles scenario submission and myth creation.
 
 import logging
 import time
-from typing import Dict
-from fastapi import APIRouter, HTTPException, Request, Depends
+from typing import Optional, Tuple
+from fastapi import APIRouter, Header, HTTPException, Request
+from fastapi.responses import Response
 
+from app.api.v1.myths import myth_url
 from app.models.request import MythGenerationRequest, MythGenerationResponse, ErrorResponse
-from app.services.openai_client import openai_service
-from app.services.myth_utils import sanitize_text, validate_scenario_content
+from app.services.admission import AdmissionRejected
+from app.services.analytics import OUTCOME_HIT, SOURCE_SYNC, analytics_sink, generation_event
+from app.services.generation import cached_myth, generate_and_store
+from app.services.idempotency import (
+    MAX_KEY_LENGTH,
+    IdempotencyInProgress,
+    IdempotencyKeyReused,
+    idempotency_store,
+    request_fingerprint,
+    run_idempotent,
+)
+from app.services.myth_store import myth_id
+from app.services.myth_utils import ScenarioAnalysis, analyze_scenario, validate_scenario_content
+from app.services.response_cache import get_cache_key
+from app.services.token_budget import BudgetExceeded, client_identity, token_budget
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-# In-memory cache for responses (use Redis in production)
-response_cache: Dict[str, Dict] = {}
 
+def prepare_generation(request: MythGenerationRequest) -> Tuple[ScenarioAnalysis, str]:
+    """Analyze and validate a request, returning its analysis and cache key"""
+    
+    # Sanitize, normalize and score the scenario once
+    analysis = analyze_scenario(request.scenario)
+    request.scenario = analysis.text
+    
+    # Validate content
+    if not validate_scenario_content(analysis):
+        raise HTTPException(
+            status_code=400,
+            detail="Scenario content is not appropriate or too short"
+        )
+    
+    # Check length limits
+    if len(request.scenario) > settings.MAX_SCENARIO_LENGTH:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Scenario too long. Maximum {settings.MAX_SCENARIO_LENGTH} characters allowed."
+        )
+    
+    return analysis, get_cache_key(request, analysis)
+
+
+async def enforce_token_budget(client_id: str) -> None:
+    """Reject a cache miss from a client that has spent its token budget"""
+    try:
+        await token_budget.check(client_id)
+    except BudgetExceeded as e:
+        logger.warning("Token budget exceeded for %s (%s)", client_id, e.window)
+        raise HTTPException(
+            status_code=429,
+            detail=f"Token budget exceeded for this {e.window}, please retry later",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+
+def json_response(body: bytes, key: str) -> Response:
+    """Wrap pre-serialized JSON bytes in a raw response pointing at its shareable URL"""
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={"Content-Location": myth_url(key), "ETag": f'"{key}"'},
+    )
+
+
+async def generate_body(
+    request: MythGenerationRequest,
+    analysis: ScenarioAnalysis,
+    cache_key: str,
+    req: Request,
+    start_time: float,
+) -> Tuple[bytes, str]:
+    """Serve a myth from the cache or generate it, returning the JSON body and its myth id"""
+    
+    # Check cache; a stale entry is served while it is regenerated in the background
+    cached = await cached_myth(request, analysis, cache_key)
+    if cached is not None:
+        logger.info("Returning cached response")
+        analytics_sink.record(
+            generation_event(request, analysis, SOURCE_SYNC, OUTCOME_HIT, time.time() - start_time)
+        )
+        return cached
+    
+    # Cache hits are free; only generations spend the client's token budget
+    client_id = client_identity(req)
+    await enforce_token_budget(client_id)
+    
+    # Generate and cache myth
+    try:
+        generated = await generate_and_store(request, analysis, cache_key, client_id)
+        
+        # Log metrics
+        generation_time = time.time() - start_time
+        logger.info("Myth generated successfully in %.2fs", generation_time)
+        
+        return generated
+        
+    except AdmissionRejected as e:
+        logger.warning("Shedding generation request: %s", e.reason)
+        raise HTTPException(
+            status_code=503,
+            detail="Server is busy, please retry shortly",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    
+    except ValueError as e:
+        logger.error("Generation error: %s", e)
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    except Exception as e:
+        logger.error("Unexpected generation error: %s", e)
+        raise HTTPException(status_code=500, detail="Failed to generate myth")
 
-def get_cache_key(request: MythGenerationRequest) -> str:
-    """Generate cache key for request"""
-    return f"{hash(request.scenario + request.culture + str(request.tone))}"
+
+async def idempotent_body(
+    idempotency_key: str,
+    request: MythGenerationRequest,
+    fingerprint: str,
+    analysis: ScenarioAnalysis,
+    cache_key: str,
+    req: Request,
+    start_time: float,
+) -> Tuple[bytes, str, bool]:
+    """Generate at most once per client and key, replaying the first result to retries"""
+    
+    if len(idempotency_key) > MAX_KEY_LENGTH:
+        raise HTTPException(status_code=400, detail=f"Idempotency-Key longer than {MAX_KEY_LENGTH} characters")
+    
+    ids = []
+    
+    async def work() -> bytes:
+        body, key = await generate_body(request, analysis, cache_key, req, start_time)
+        ids.append(key)
+        return body
+    
+    try:
+        body, replayed = await run_idempotent(
+            idempotency_store,
+            f"{client_identity(req)}:{idempotency_key}",
+            fingerprint,
+            work,
+            timeout=settings.IDEMPOTENCY_LOCK_TTL,
+        )
+    except IdempotencyKeyReused:
+        raise HTTPException(
+            status_code=422,
+            detail="Idempotency-Key was already used with a different request body",
+        )
+    except IdempotencyInProgress:
+        raise HTTPException(
+            status_code=409,
+            detail="A request with this Idempotency-Key is still being processed",
+            headers={"Retry-After": "5"},
+        )
+    # Replays were stored by the request that generated them
+    return body, ids[0] if ids else myth_id(body), replayed
 
 
 @router.post("/generate-myth", response_model=MythGenerationResponse)
 async def generate_myth(
     request: MythGenerationRequest,
-    req: Request
+    req: Request,
+    idempotency_key: Optional[str] = Header(None),
 ):
     """Generate a myth from a modern scenario"""
     
     start_time = time.time()
     
     try:
-        logger.info(f"Myth generation requested for culture: {request.culture}")
-        
-        # Sanitize input
-        request.scenario = sanitize_text(request.scenario)
-        
-        # Validate content
-        if not validate_scenario_content(request.scenario):
-            raise HTTPException(
-                status_code=400,
-                detail="Scenario content is not appropriate or too short"
-            )
-        
-        # Check length limits
-        if len(request.scenario) > settings.MAX_SCENARIO_LENGTH:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Scenario too long. Maximum {settings.MAX_SCENARIO_LENGTH} characters allowed."
-            )
+        logger.info("Myth generation requested for culture: %s", request.culture)
         
-        # Check cache
-        cache_key = get_cache_key(request)
-        if cache_key in response_cache:
-            cached_response = response_cache[cache_key]
-            if time.time() - cached_response["timestamp"] < 3600:  # 1 hour cache
-                logger.info("Returning cached response")
-                return MythGenerationResponse(**cached_response["data"])
+        # Fingerprint the body as sent, before the scenario is normalized
+        fingerprint = request_fingerprint(request.model_dump()) if idempotency_key else ""
+        analysis, cache_key = prepare_generation(request)
         
-        # Generate myth
-        try:
-            response = await openai_service.generate_myth(request)
-            
-            # Cache response
-            response_cache[cache_key] = {
-                "data": response.dict(),
-                "timestamp": time.time()
-            }
-            
-            # Log metrics
-            generation_time = time.time() - start_time
-            logger.info(f"Myth generated successfully in {generation_time:.2f}s")
-            
-            return response
-            
-        except ValueError as e:
-            logger.error(f"Generation error: {e}")
-            raise HTTPException(status_code=400, detail=str(e))
+        if not idempotency_key:
+            return json_response(*await generate_body(request, analysis, cache_key, req, start_time))
         
-        except Exception as e:
-            logger.error(f"Unexpected generation error: {e}")
-            raise HTTPException(status_code=500, detail="Failed to generate myth")
+        body, key, replayed = await idempotent_body(
+            idempotency_key, request, fingerprint, analysis, cache_key, req, start_time
+        )
+        response = json_response(body, key)
+        if replayed:
+            response.headers["Idempotent-Replayed"] = "true"
+        return response
     
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Unexpected error in generate_myth: {e}", exc_info=True)
+        logger.error("Unexpected error in generate_myth: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
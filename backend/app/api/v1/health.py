@@ -1,29 +1,71 @@
 """
-Health check endpoint for monitoring and status.
+Health check endpoints for monitoring and status.
+Liveness is constant and silent; readiness reports cached dependency
+probes and saturation.
 """
 
-import logging
 from datetime import datetime
 from fastapi import APIRouter
+from fastapi.responses import Response
 
 from app.models.request import HealthResponse
 from app.core.config import settings
-
-logger = logging.getLogger(__name__)
+from app.core.serialization import dumps
+from app.services.admission import admission_controller
+from app.services.dependency_health import dependency_monitor
 
 router = APIRouter()
 
+# Encoded once; liveness allocates nothing but the response object
+LIVENESS_BODY = b'{"status":"alive"}'
+
 
 @router.get("/health", response_model=HealthResponse)
 @router.head("/health")
 async def health_check():
     """Health check endpoint"""
     
-    logger.info("Health check requested")
-    
     return HealthResponse(
         status="healthy",
         version="1.0.0",
         timestamp=datetime.utcnow().isoformat(),
         environment=settings.ENVIRONMENT
     )
+
+
+@router.get("/health/live")
+@router.head("/health/live")
+async def liveness():
+    """Liveness probe: the process is up and the event loop is responsive"""
+    return Response(content=LIVENESS_BODY, media_type="application/json")
+
+
+@router.get("/health/ready")
+async def readiness():
+    """Readiness probe: cached dependency health plus saturation"""
+    
+    checks = dependency_monitor.snapshot()
+    capacity = admission_controller.limit
+    in_flight = admission_controller.in_flight
+    ratio = in_flight / capacity if capacity else 0.0
+    
+    if admission_controller.saturated:
+        status, status_code = "saturated", 503
+    elif any(check["healthy"] is False for check in checks.values()):
+        # Cached myths and the fallback still work without dependencies
+        status, status_code = "degraded", 200
+    else:
+        status, status_code = "ready", 200
+    
+    body = {
+        "status": status,
+        "checks": checks,
+        "saturation": {
+            "in_flight": in_flight,
+            "capacity": capacity,
+            "queue_depth": admission_controller.queue_depth,
+            "queue_limit": admission_controller.max_queue,
+            "ratio": round(ratio, 3),
+        },
+    }
+    return Response(content=dumps(body), status_code=status_code, media_type="application/json")
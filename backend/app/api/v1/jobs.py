@@ -0,0 +1,72 @@
+"""
+Asynchronous myth generation endpoints.
+Submitting returns a job id at once; polling long-polls until it finishes.
+"""
+
+import logging
+import time
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import Response
+
+from app.api.v1.generate import enforce_token_budget, prepare_generation
+from app.core.config import settings
+from app.models.request import MythGenerationRequest
+from app.services.analytics import OUTCOME_HIT, SOURCE_JOB, analytics_sink, generation_event
+from app.services.generation import cached_myth
+from app.services.jobs import JobQueueFull, job_runner
+from app.services.token_budget import client_identity
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+@router.post("/jobs", status_code=202)
+async def submit_job(request: MythGenerationRequest, req: Request):
+    """Queue a myth generation and return its job id"""
+    
+    start_time = time.time()
+    analysis, cache_key = prepare_generation(request)
+    cached = await cached_myth(request, analysis, cache_key)
+    cached_body = cached[0] if cached is not None else None
+    client_id = client_identity(req)
+    if cached_body is None:
+        await enforce_token_budget(client_id)
+    else:
+        analytics_sink.record(generation_event(request, analysis, SOURCE_JOB, OUTCOME_HIT, time.time() - start_time))
+    
+    try:
+        job = await job_runner.submit(request, analysis, cache_key, cached_body, client_id)
+    except JobQueueFull:
+        raise HTTPException(
+            status_code=503,
+            detail="Job queue is full, please retry shortly",
+            headers={"Retry-After": "5"},
+        )
+    
+    status_code = 200 if job.done else 202
+    return Response(
+        content=job.to_json(),
+        status_code=status_code,
+        media_type="application/json",
+        headers={"Location": f"/api/v1/jobs/{job.id}"},
+    )
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(
+    job_id: str,
+    wait: float = Query(default=None, ge=0, description="Seconds to long-poll for completion"),
+):
+    """Return job state, waiting up to `wait` seconds for it to finish"""
+    
+    timeout = settings.JOB_LONG_POLL_TIMEOUT if wait is None else min(wait, settings.JOB_LONG_POLL_TIMEOUT)
+    job = await job_runner.wait(job_id, timeout)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    return Response(
+        content=job.to_json(),
+        status_code=200 if job.done else 202,
+        media_type="application/json",
+    )
@@ -0,0 +1,44 @@
+"""
+Metrics endpoint.
+Exposes in-process counters for load shedding, moderation, jobs, models, logging,
+token usage, upstream concurrency, pre-rendering, analytics, event-loop lag and
+the response cache, including stale serves and background refreshes.
+These are internals, so the endpoint requires the admin token.
+"""
+
+from fastapi import APIRouter, Depends
+
+from app.core.logging import logging_stats
+from app.core.loop_monitor import loop_monitor
+from app.core.security import require_admin
+from app.services.admission import admission_controller
+from app.services.analytics import analytics_sink
+from app.services.generation import cache_refresher
+from app.services.jobs import job_runner
+from app.services.model_router import model_router
+from app.services.moderation import moderation_stats
+from app.services.prerender import prerenderer
+from app.services.response_cache import cache_stats
+from app.services.token_budget import token_budget
+from app.services.upstream_limiter import upstream_limiter
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+
+@router.get("/metrics")
+async def metrics():
+    """Current counters for this worker"""
+    
+    return {
+        "admission": admission_controller.stats(),
+        "moderation": moderation_stats.as_dict(),
+        "jobs": {"queue_depth": job_runner.queue_depth, "queue_limit": job_runner.queue_size},
+        "models": model_router.snapshot(),
+        "logging": logging_stats(),
+        "tokens": token_budget.stats(),
+        "upstream": upstream_limiter.stats(),
+        "prerender": prerenderer.stats(),
+        "analytics": analytics_sink.stats(),
+        "event_loop": loop_monitor.stats(),
+        "response_cache": {**cache_stats.as_dict(), "refreshing": cache_refresher.in_flight},
+    }
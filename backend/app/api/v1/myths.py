@@ -0,0 +1,139 @@
+"""
+Content-addressed myth endpoint.
+Serves stored myths by id with strong validators so nginx, CDNs and
+browsers can cache them indefinitely, and counts views for pre-rendering.
+"""
+
+import hmac
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Dict, Optional
+
+from fastapi import APIRouter, Header, HTTPException, Request
+from fastapi.responses import Response
+
+from app.core.config import settings
+from app.services.myth_store import StoredMyth, is_myth_id, myth_store
+from app.services.prerender import prerenderer, viewed_myth_id
+
+router = APIRouter()
+
+MYTH_PATH = "/myths/{myth_id}"
+
+
+def myth_url(key: str) -> str:
+    """Public path of a stored myth"""
+    return f"/api/v1/myths/{key}"
+
+
+def myth_headers(key: str, created_at: Optional[float] = None) -> Dict[str, str]:
+    """Caching headers shared by every representation of a myth"""
+    headers = {
+        "ETag": f'"{key}"',
+        "Cache-Control": f"public, max-age={settings.MYTH_CACHE_MAX_AGE}, immutable",
+        "Vary": "Accept-Encoding",
+    }
+    if created_at is not None:
+        headers["Last-Modified"] = formatdate(created_at, usegmt=True)
+    return headers
+
+
+def etag_matches(if_none_match: str, key: str) -> bool:
+    """Weak comparison of If-None-Match against the myth's ETag"""
+    etag = f'"{key}"'
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag or candidate == "*":
+            return True
+    return False
+
+
+def not_modified_since(if_modified_since: str, created_at: float) -> bool:
+    """True when the myth predates If-Modified-Since"""
+    try:
+        since = parsedate_to_datetime(if_modified_since).timestamp()
+    except (TypeError, ValueError):
+        return False
+    return int(created_at) <= since
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """True when the client accepts gzip with a non-zero quality"""
+    for coding in accept_encoding.lower().split(","):
+        name, _, params = coding.strip().partition(";")
+        if name.strip() in ("gzip", "*"):
+            quality = params.strip()
+            if not quality.startswith("q="):
+                return True
+            try:
+                return float(quality[2:]) > 0
+            except ValueError:
+                return False
+    return False
+
+
+def myth_response(myth: StoredMyth, request: Request) -> Response:
+    """Full response, gzipped by the app when nothing in front compresses it"""
+    headers = myth_headers(myth.id, myth.created_at)
+    body = myth.body
+    if (
+        settings.MYTH_GZIP
+        and len(body) >= settings.MYTH_GZIP_MIN_SIZE
+        and accepts_gzip(request.headers.get("accept-encoding", ""))
+    ):
+        body = myth.gzipped
+        headers["Content-Encoding"] = "gzip"
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@router.api_route(MYTH_PATH, methods=["GET", "HEAD"])
+async def get_myth(myth_id: str, request: Request):
+    """Fetch a generated myth by its content-addressed id"""
+
+    if not is_myth_id(myth_id):
+        raise HTTPException(status_code=404, detail="Myth not found")
+
+    # The id is the content hash, so a matching ETag is current without a lookup
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and if_none_match.strip() != "*" and etag_matches(if_none_match, myth_id):
+        return Response(status_code=304, headers=myth_headers(myth_id))
+
+    myth = await myth_store.load(myth_id)
+    if myth is None:
+        raise HTTPException(status_code=404, detail="Myth not found")
+
+    if if_none_match:
+        if etag_matches(if_none_match, myth_id):
+            return Response(status_code=304, headers=myth_headers(myth_id, myth.created_at))
+    else:
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_modified_since and not_modified_since(if_modified_since, myth.created_at):
+            return Response(status_code=304, headers=myth_headers(myth_id, myth.created_at))
+
+    return myth_response(myth, request)
+
+
+@router.post("/myth-views", status_code=204)
+async def record_myth_view(
+    x_original_uri: str = Header(""),
+    x_myth_view_secret: Optional[str] = Header(None),
+):
+    """Count a view of a myth page; nginx mirrors every view here, cached or not"""
+
+    # Only nginx's internal mirror knows the secret; the route is hidden without one
+    if not settings.MYTH_VIEW_SECRET:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_myth_view_secret or not hmac.compare_digest(
+        x_myth_view_secret.encode("utf-8"), settings.MYTH_VIEW_SECRET.encode("utf-8")
+    ):
+        raise HTTPException(status_code=403, detail="Invalid view secret")
+
+    key = viewed_myth_id(x_original_uri)
+    if key is None:
+        raise HTTPException(status_code=400, detail="Not a myth URI")
+    if await myth_store.load(key) is None:
+        raise HTTPException(status_code=404, detail="Myth not found")
+
+    await prerenderer.record_view(key)
+    return Response(status_code=204)
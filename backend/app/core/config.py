@@ -4,7 +4,7 @@ Loads environment variables and provides type-safe configuration.
 """
 
 import os
-from typing import List
+from typing import Dict, List
 from pydantic_settings import BaseSettings
 from pydantic import validator
 
@@ -18,6 +18,14 @@ class Settings(BaseSettings):
     OPENAI_MAX_TOKENS: int = 1200
     OPENAI_TEMPERATURE: float = 0.7
     
+    # Model routing: faster/cheaper tiers tried after OPENAI_MODEL, in order
+    OPENAI_FALLBACK_MODELS: List[str] = []
+    ROUTING_P95_THRESHOLD: float = 20.0  # seconds before a tier is considered slow
+    ROUTING_ERROR_RATE_THRESHOLD: float = 0.5
+    ROUTING_WINDOW: int = 300  # seconds of latency samples kept per model
+    ROUTING_MIN_SAMPLES: int = 5
+    ROUTING_SHORT_SCENARIO_CHARS: int = 200  # short playful scenarios use the next tier
+    
     # Server Configuration
     BACKEND_HOST: str = "0.0.0.0"
     BACKEND_PORT: int = 8000
@@ -26,20 +34,58 @@ class Settings(BaseSettings):
     # Database Configuration
     DATABASE_URL: str = "sqlite:///./data.db"
     
+    # Response Cache
+    RESPONSE_CACHE_SOFT_TTL: int = 3600  # after 1 hour hits are served stale and refreshed in the background
+    RESPONSE_CACHE_TTL: int = 21600  # hard limit: after 6 hours an entry is a miss
+    RESPONSE_CACHE_MAX_ENTRIES: int = 10000  # per worker, least recently used entries are evicted first
+    RESPONSE_CACHE_COMPRESSION: str = "zlib"  # none, zlib or zstd (needs the zstandard package)
+    RESPONSE_CACHE_COMPRESSION_LEVEL: int = 6
+    CACHE_SNAPSHOT_PATH: str = "./data/response_cache.snap"  # empty disables snapshots
+    CACHE_SNAPSHOT_INTERVAL: int = 300  # seconds, 0 snapshots only on shutdown
+    
+    # Shareable myths (GET /api/v1/myths/{id})
+    MYTH_STORE_SIZE: int = 10000  # myths kept in memory per worker
+    MYTH_TTL: int = 2592000  # 30 days in Redis
+    MYTH_CACHE_MAX_AGE: int = 31536000  # content-addressed, so effectively forever
+    MYTH_GZIP: bool = True  # compress in the app when no proxy does
+    MYTH_GZIP_MIN_SIZE: int = 1024
+    PRERENDER_DIR: str = "./data/prerendered"  # served by nginx, empty disables pre-rendering
+    PRERENDER_VIEW_THRESHOLD: int = 100  # views before a myth is written as static files
+    MYTH_VIEW_SECRET: str = ""  # shared with nginx's view mirror; empty disables view counting
+    PUBLIC_BASE_URL: str = "https://mythweaver.fun"  # canonical and og:url of pre-rendered pages
+    
     # Redis Configuration (optional)
     REDIS_URL: str = ""
     
     # Security  
+    ADMIN_TOKEN: str = ""  # X-Admin-Token for operator endpoints, empty disables them
     ALLOWED_ORIGINS: List[str] = ["http://localhost:3000", "http://localhost:3001", "https://mythweaver.fun", "https://www.mythweaver.fun", "https://*.onrender.com"]
     ALLOWED_HOSTS: List[str] = ["localhost", "mythweaver.fun", "www.mythweaver.fun", "*.mythweaver.fun", "*.onrender.com", "api.mythweaver.fun"]
     
     # Rate Limiting
     RATE_LIMIT_REQUESTS: int = 20
     RATE_LIMIT_WINDOW: int = 3600  # 1 hour in seconds
+    TOKEN_BUDGET_PER_MINUTE: int = 10000  # prompt + completion tokens per client, 0 disables
+    TOKEN_BUDGET_PER_DAY: int = 100000
     
     # Content Safety
     USE_OPENAI_MODERATION: bool = True
     MAX_SCENARIO_LENGTH: int = 2000
+    MODERATION_BLOCKLIST: List[str] = [
+        "genocide", "terrorism", "child abuse", "pornography", "porn",
+        "rape", "hate speech", "explicit sex",
+    ]
+    MODERATION_CACHE_SIZE: int = 10000
+    MODERATION_CACHE_TTL: int = 86400  # 24 hours in seconds
+    MODERATION_BATCH_WINDOW: float = 0.005  # seconds concurrent checks wait to share a call
+    MODERATION_BATCH_SIZE: int = 32  # inputs per moderation call, 1 disables batching
+    
+    # Prompt construction
+    MOTIF_TOP_K: int = 3  # best-matching seed motifs injected per prompt
+    PROMPT_TEMPLATE_VERSION: str = "1"  # part of every cache key; bump after changing prompts or motifs
+    GENERATION_STRATEGY: str = "single"  # "parallel": outline, then story and endings concurrently
+    OUTLINE_MAX_TOKENS: int = 400
+    OUTCOME_MAX_TOKENS: int = 200
     
     # Affiliate Configuration
     AFFILIATE_TEMPLATE_URL: str = "https://affiliate.example.com/?q={isbn}"
@@ -47,6 +93,53 @@ class Settings(BaseSettings):
     # Monitoring
     SENTRY_DSN: str = ""
     LOG_LEVEL: str = "INFO"
+    LOG_QUEUE_SIZE: int = 10000  # records buffered for the background log writer
+    LOG_SAMPLE_RATES: Dict[str, float] = {}  # logger name -> share of INFO records kept
+    PROFILING_ENABLED: bool = False  # installs the request profiling middleware
+    PROFILE_SAMPLE_RATE: float = 0.0  # share of requests profiled without asking
+    PROFILE_INTERVAL: float = 0.005  # seconds between stack samples
+    PROFILE_DIR: str = "./data/profiles"
+    PROFILE_KEEP: int = 100  # newest profiles kept on disk
+    ANALYTICS_DB: str = "./data/analytics.db"  # generation events; empty disables writing
+    ANALYTICS_BUFFER_SIZE: int = 10000  # events held in memory; the oldest are dropped beyond this
+    ANALYTICS_FLUSH_INTERVAL: float = 5.0  # seconds between bulk writes
+    ANALYTICS_FLUSH_BATCH: int = 500  # write as soon as this many events are buffered
+    LOOP_LAG_INTERVAL: float = 0.5  # seconds between event-loop lag samples
+    LOOP_LAG_WINDOW: int = 600  # samples kept for the lag percentiles
+    LOOP_DEBUG: bool = False  # watchdog logging the stack of code that blocks the loop
+    LOOP_BLOCK_THRESHOLD: float = 0.1  # seconds a callback may hold the loop in debug mode
+    LOOP_BLOCK_FAIL_MS: int = 0  # test mode: fail tests whose requests block the loop longer
+    HEALTH_PROBE_INTERVAL: int = 30  # seconds between background dependency probes
+    HEALTH_PROBE_TIMEOUT: float = 5.0
+    HEALTH_PROBE_UPSTREAM: bool = True
+    
+    # Capacity
+    MAX_CONCURRENT_GENERATIONS: int = 16  # upstream generations per worker
+    GENERATION_QUEUE_SIZE: int = 32  # requests allowed to wait for a slot
+    GENERATION_QUEUE_TIMEOUT: float = 5.0  # seconds a request may wait before 503
+    
+    # Upstream concurrency: AIMD limit on in-flight model calls per worker
+    UPSTREAM_CONCURRENCY_INITIAL: int = 8
+    UPSTREAM_CONCURRENCY_MIN: int = 1
+    UPSTREAM_CONCURRENCY_MAX: int = 64
+    UPSTREAM_AIMD_INCREASE: float = 1.0  # slots added per window of successful calls
+    UPSTREAM_AIMD_DECREASE: float = 0.5  # limit multiplier on 429 or timeout
+    UPSTREAM_MAX_RETRIES: int = 3
+    UPSTREAM_BACKOFF_BASE: float = 0.5  # seconds, doubled per retry with full jitter
+    UPSTREAM_BACKOFF_MAX: float = 8.0
+    UPSTREAM_DEADLINE: float = 60.0  # seconds a generation may spend on upstream calls and retries
+    DEGRADED_MODE: bool = True  # serve procedural myths when the upstream cannot answer in time
+    FALLBACK_MIN_REMAINING: float = 10.0  # seconds of deadline a JSON retry needs, else go procedural
+    
+    # Asynchronous jobs
+    JOB_WORKERS: int = 4
+    JOB_QUEUE_SIZE: int = 100
+    JOB_TIMEOUT: float = 120.0  # seconds before a queued job gives up
+    JOB_TTL: int = 3600  # seconds job state is kept
+    JOB_LONG_POLL_TIMEOUT: float = 25.0  # maximum wait per poll, below nginx proxy_read_timeout
+    JOB_POLL_INTERVAL: float = 0.5  # store polling interval for jobs owned by other replicas
+    IDEMPOTENCY_TTL: int = 86400  # seconds a completed Idempotency-Key replays its result
+    IDEMPOTENCY_LOCK_TTL: int = 120  # refreshed while the owner works; lapses this long after it dies. Retries wait this long
     
     class Config:
         env_file = ".env"
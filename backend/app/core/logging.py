@@ -1,21 +1,140 @@
 """
 Logging configuration for the Mythosync backend.
 Sets up structured JSON logging for production.
+
+Loggers write to a bounded in-memory queue; formatting and stdout I/O run
+on a background listener thread so log calls never block the event loop.
 """
 
+import atexit
 import logging
 import logging.config
+import queue
 import sys
-from typing import Dict, Any
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Any, Iterable, List, Optional
 
 from app.core.config import settings
 
 
+class SamplingFilter(logging.Filter):
+    """Keeps a fixed share of INFO and lower records per logger; warnings always pass"""
+    
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+        self.sampled_out = 0
+        self._resolved: Dict[str, Optional[float]] = {}
+        self._credit: Dict[str, float] = {}
+    
+    def rate_for(self, name: str) -> Optional[float]:
+        """Rate of the most specific configured logger, None when unsampled"""
+        if name not in self._resolved:
+            candidate = name
+            while candidate and candidate not in self.rates:
+                candidate = candidate.rpartition(".")[0]
+            self._resolved[name] = self.rates.get(candidate)
+        return self._resolved[name]
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        rate = self.rate_for(record.name)
+        if rate is None or rate >= 1:
+            return True
+        if rate <= 0:
+            self.sampled_out += 1
+            return False
+        
+        # Credit accumulator: evenly spaced, and the first record always passes
+        credit = self._credit.get(record.name, 1.0 - rate) + rate
+        if credit >= 1:
+            self._credit[record.name] = credit - 1
+            return True
+        self._credit[record.name] = credit
+        self.sampled_out += 1
+        return False
+
+
+class BufferedQueueHandler(QueueHandler):
+    """Enqueues records for the listener thread and drops them when the queue is full"""
+    
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge the arguments now so later mutation cannot change the message;
+        # the formatter (timestamps, JSON, tracebacks) runs on the listener thread
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+    
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[BufferedQueueHandler] = None
+_routed_loggers: List[logging.Logger] = []
+_output_handlers: List[logging.Handler] = []
+
+
+def _route_through_queue(logger_names: Iterable[str]) -> None:
+    """Swap the configured output handlers for a queue drained by a listener thread"""
+    global _listener, _queue_handler, _routed_loggers, _output_handlers
+    
+    root = logging.getLogger()
+    _output_handlers = list(root.handlers)
+    _queue_handler = BufferedQueueHandler(queue.Queue(maxsize=settings.LOG_QUEUE_SIZE))
+    _queue_handler.addFilter(SamplingFilter(settings.LOG_SAMPLE_RATES))
+    
+    _routed_loggers = [root] + [logging.getLogger(name) for name in logger_names]
+    for logger in _routed_loggers:
+        logger.handlers = [_queue_handler]
+    
+    _listener = QueueListener(_queue_handler.queue, *_output_handlers, respect_handler_level=True)
+    _listener.start()
+
+
+def stop_logging() -> None:
+    """Flush queued records and write directly again until the next setup"""
+    global _listener
+    
+    if _listener is None:
+        return
+    _listener.stop()
+    _listener = None
+    for logger in _routed_loggers:
+        logger.handlers = list(_output_handlers)
+
+
+def logging_stats() -> Dict[str, int]:
+    """Records lost to a full queue or skipped by sampling"""
+    if _queue_handler is None:
+        return {"dropped": 0, "sampled_out": 0, "queue_depth": 0}
+    sampler = _queue_handler.filters[0]
+    return {
+        "dropped": _queue_handler.dropped,
+        "sampled_out": sampler.sampled_out,
+        "queue_depth": _queue_handler.queue.qsize(),
+    }
+
+
+atexit.register(stop_logging)
+
+
 def setup_logging():
     """Setup application logging configuration"""
     
     log_level = getattr(logging, settings.LOG_LEVEL.upper(), logging.INFO)
     
+    # Drain the previous listener before its handlers are replaced
+    stop_logging()
+    
     # Logging configuration
     config: Dict[str, Any] = {
         "version": 1,
@@ -62,6 +181,7 @@ def setup_logging():
     }
     
     logging.config.dictConfig(config)
+    _route_through_queue(config["loggers"])
     
     # Setup Sentry if configured
     if settings.SENTRY_DSN:
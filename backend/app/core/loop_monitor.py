@@ -0,0 +1,207 @@
+"""
+Event-loop instrumentation.
+Measures event-loop lag continuously for /metrics and, in debug mode,
+runs a watchdog thread that logs the stack of whatever blocks the loop
+for longer than LOOP_BLOCK_THRESHOLD.
+
+Test mode (LOOP_BLOCK_FAIL_MS > 0) times every callback the loop runs
+on behalf of a request and records the ones over the limit; the test
+suite fails any test that produced one. Time spent in garbage collection
+and the first request to each endpoint, which pays for imports and lazy
+setup, are not counted.
+"""
+
+import asyncio
+import gc
+import itertools
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from contextvars import ContextVar
+from typing import Deque, Dict, List, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Set while the loop works on a request, so test mode can ignore everything else
+current_request: ContextVar[Optional[str]] = ContextVar("current_request", default=None)
+request_number: ContextVar[int] = ContextVar("request_number", default=0)
+request_counter = itertools.count(1)
+
+
+class LoopLagMonitor:
+    """Samples how late the loop wakes a sleeping task"""
+
+    def __init__(self, interval: float, window: int, block_threshold: float, debug: bool):
+        self.interval = interval
+        self.block_threshold = block_threshold
+        self.debug = debug
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.max_lag = 0.0
+        self.stalls = 0
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def start(self) -> None:
+        """Start sampling, plus the blocking-call watchdog in debug mode"""
+        if self._task is not None:
+            return
+        loop = asyncio.get_running_loop()
+        self._task = asyncio.create_task(self._run())
+        if self.debug:
+            self._stop.clear()
+            self._watchdog = threading.Thread(
+                target=self._watch, args=(loop, threading.get_ident()), name="loop-watchdog", daemon=True
+            )
+            self._watchdog.start()
+
+    async def stop(self) -> None:
+        """Stop sampling and the watchdog"""
+        self._stop.set()
+        if self._watchdog is not None:
+            await asyncio.to_thread(self._watchdog.join)
+            self._watchdog = None
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.record(max(loop.time() - expected, 0.0))
+
+    def record(self, lag: float) -> None:
+        self.samples.append(lag)
+        self.max_lag = max(self.max_lag, lag)
+
+    def _watch(self, loop: asyncio.AbstractEventLoop, loop_thread: int) -> None:
+        """Ping the loop from a side thread; dump its stack when a ping goes unanswered"""
+        while not self._stop.is_set():
+            answered = threading.Event()
+            sent = time.perf_counter()
+            try:
+                loop.call_soon_threadsafe(answered.set)
+            except RuntimeError:
+                return  # loop closed
+
+            if not answered.wait(self.block_threshold):
+                frame = sys._current_frames().get(loop_thread)
+                stack = "".join(traceback.format_stack(frame)) if frame is not None else "<unavailable>\n"
+                while not answered.wait(self.block_threshold) and not self._stop.is_set():
+                    pass
+                self.stalls += 1
+                logger.warning(
+                    "Event loop blocked for %.0f ms; stack when the stall was detected:\n%s",
+                    (time.perf_counter() - sent) * 1000,
+                    stack,
+                )
+            self._stop.wait(self.block_threshold)
+
+    def stats(self) -> Dict:
+        """Metrics snapshot, in milliseconds"""
+        samples = sorted(self.samples)
+        if not samples:
+            return {"lag_ms": 0.0, "avg_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0, "samples": 0, "stalls": self.stalls}
+        return {
+            "lag_ms": round(self.samples[-1] * 1000, 2),
+            "avg_ms": round(sum(samples) / len(samples) * 1000, 2),
+            "p99_ms": round(samples[min(int(len(samples) * 0.99), len(samples) - 1)] * 1000, 2),
+            "max_ms": round(self.max_lag * 1000, 2),
+            "samples": len(samples),
+            "stalls": self.stalls,
+        }
+
+
+class BlockingCallDetector:
+    """Test mode: times each loop callback run for a request and records slow ones"""
+
+    def __init__(self):
+        self.threshold = 0.0
+        self.violations: List[str] = []
+        self.gc_time = 0.0
+        self._gc_start = 0.0
+        # Number of the first request seen for each "METHOD path", which is not checked
+        self._warm_up: Dict[str, int] = {}
+        self._original_run = None
+
+    @property
+    def installed(self) -> bool:
+        return self._original_run is not None
+
+    def install(self, threshold_ms: float) -> None:
+        """Wrap asyncio.Handle._run, which every loop callback and task step goes through"""
+        if self.installed:
+            return
+        self.threshold = threshold_ms / 1000
+        original_run = self._original_run = asyncio.events.Handle._run
+        detector = self
+
+        def timed_run(handle):
+            start = time.perf_counter()
+            gc_start = detector.gc_time
+            original_run(handle)
+            # A collection pause is not the handler's doing
+            elapsed = time.perf_counter() - start - (detector.gc_time - gc_start)
+            request = handle._context.get(current_request)
+            if request is None:
+                return
+            number = handle._context.get(request_number)
+            warm_up = detector._warm_up.setdefault(request, number) == number
+            if elapsed > detector.threshold and not warm_up:
+                detector.violations.append(f"{request} blocked the event loop for {elapsed * 1000:.0f} ms in {handle!r}")
+
+        asyncio.events.Handle._run = timed_run
+        gc.callbacks.append(self._time_gc)
+
+    def _time_gc(self, phase: str, info: Dict) -> None:
+        if phase == "start":
+            self._gc_start = time.perf_counter()
+        else:
+            self.gc_time += time.perf_counter() - self._gc_start
+
+    def uninstall(self) -> None:
+        if self.installed:
+            asyncio.events.Handle._run = self._original_run
+            self._original_run = None
+            gc.callbacks.remove(self._time_gc)
+
+    def take(self) -> List[str]:
+        """Violations recorded since the last call"""
+        violations, self.violations = self.violations, []
+        return violations
+
+
+class RequestMarker:
+    """ASGI middleware labelling the context of each request for test mode"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            # Not reset on exit: servers run each request in its own task, and a
+            # handler that never yields must still be labelled once its step ends
+            current_request.set(f"{scope['method']} {scope['path']}")
+            request_number.set(next(request_counter))
+        await self.app(scope, receive, send)
+
+
+# Global instances
+loop_monitor = LoopLagMonitor(
+    interval=settings.LOOP_LAG_INTERVAL,
+    window=settings.LOOP_LAG_WINDOW,
+    block_threshold=settings.LOOP_BLOCK_THRESHOLD,
+    debug=settings.LOOP_DEBUG,
+)
+blocking_detector = BlockingCallDetector()
@@ -0,0 +1,154 @@
+"""
+On-demand request profiling.
+A sampling profiler that walks the event-loop thread's stack from a side
+thread while a chosen request runs, and writes the samples as folded
+stacks ("frame;frame;frame count"), the input format of flamegraph.pl,
+speedscope and inferno.
+
+Requests are profiled when they carry X-Profile with a valid admin token,
+or at random for PROFILE_SAMPLE_RATE of traffic. The middleware is only
+installed when PROFILING_ENABLED is set, so a disabled profiler costs
+nothing per request.
+
+The loop thread serves every request, so samples taken while a profiled
+request awaits I/O show whatever else the loop was doing at the time,
+including idle time in the selector.
+"""
+
+import asyncio
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from starlette.requests import Request
+
+from app.core.config import settings
+from app.core.security import ADMIN_TOKEN_HEADER, is_admin_token
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_SUFFIX = ".folded"
+
+# Why a request was profiled
+TRIGGER_ADMIN = "admin"
+TRIGGER_SAMPLED = "sampled"
+
+
+class StackSampler:
+    """Samples one thread's Python stack at a fixed interval"""
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                return
+            self.stacks[fold_stack(frame)] += 1
+            self.samples += 1
+
+
+def fold_stack(frame) -> str:
+    """Root-first frame names joined by semicolons"""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+def profile_name(method: str, path: str, elapsed: float) -> str:
+    """Sortable, filesystem-safe profile file name"""
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", path).strip("_") or "root"
+    stamp = f"{time.time():.3f}".replace(".", "")
+    return f"{stamp}-{method}-{slug}-{elapsed * 1000:.0f}ms{PROFILE_SUFFIX}"
+
+
+def write_profile(directory: Path, name: str, stacks: Counter, keep: int) -> Path:
+    """Atomically write folded stacks and prune all but the newest profiles"""
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / name
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text("".join(f"{stack} {count}\n" for stack, count in stacks.most_common()))
+    os.replace(tmp_path, path)
+
+    for old in sorted(directory.glob(f"*{PROFILE_SUFFIX}"))[:-max(keep, 1)]:
+        old.unlink(missing_ok=True)
+    return path
+
+
+def list_profiles(directory: Path) -> List[Dict]:
+    """Newest first"""
+    if not directory.is_dir():
+        return []
+    profiles = []
+    for path in sorted(directory.glob(f"*{PROFILE_SUFFIX}"), reverse=True):
+        stat = path.stat()
+        profiles.append({"name": path.name, "size": stat.st_size, "created_at": stat.st_mtime})
+    return profiles
+
+
+def profile_trigger(request: Request) -> Optional[str]:
+    """Why a request is profiled: explicitly requested by an admin, picked at random, or not at all"""
+    if PROFILE_HEADER.lower() in request.headers:
+        return TRIGGER_ADMIN if is_admin_token(request.headers.get(ADMIN_TOKEN_HEADER.lower())) else None
+    if settings.PROFILE_SAMPLE_RATE > 0 and random.random() < settings.PROFILE_SAMPLE_RATE:
+        return TRIGGER_SAMPLED
+    return None
+
+
+async def profile_request(request: Request, call_next):
+    """Middleware profiling selected requests"""
+    trigger = profile_trigger(request)
+    if trigger is None:
+        return await call_next(request)
+
+    sampler = StackSampler(threading.get_ident(), settings.PROFILE_INTERVAL)
+    start = time.perf_counter()
+    sampler.start()
+    try:
+        response = await call_next(request)
+    finally:
+        sampler.stop()
+    elapsed = time.perf_counter() - start
+
+    name = profile_name(request.method, request.url.path, elapsed)
+    try:
+        await asyncio.to_thread(
+            write_profile, Path(settings.PROFILE_DIR), name, sampler.stacks, settings.PROFILE_KEEP
+        )
+    except OSError as e:
+        logger.warning("Failed to write profile %s: %s", name, e)
+        return response
+
+    logger.info(
+        "Profiled %s %s (%s): %d samples in %s", request.method, request.url.path, trigger, sampler.samples, name
+    )
+    # Only the admin who asked learns the name; sampled users must not see they were profiled
+    if trigger == TRIGGER_ADMIN:
+        response.headers["X-Profile-Id"] = name
+    return response
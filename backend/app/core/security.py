@@ -0,0 +1,29 @@
+"""
+Admin authentication.
+Operator endpoints require the X-Admin-Token header to match ADMIN_TOKEN;
+they are hidden entirely while no token is configured.
+"""
+
+import hmac
+from typing import Optional
+
+from fastapi import Header, HTTPException
+
+from app.core.config import settings
+
+ADMIN_TOKEN_HEADER = "X-Admin-Token"
+
+
+def is_admin_token(token: Optional[str]) -> bool:
+    """Constant-time check of a presented admin token"""
+    if not settings.ADMIN_TOKEN or not token:
+        return False
+    return hmac.compare_digest(token.encode("utf-8"), settings.ADMIN_TOKEN.encode("utf-8"))
+
+
+async def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    """Dependency for admin-only routes"""
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not is_admin_token(x_admin_token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
@@ -0,0 +1,30 @@
+"""
+Fast JSON serialization helpers.
+Uses orjson when it is installed and falls back to the standard library.
+"""
+
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+def dumps(obj: Any) -> bytes:
+    """Serialize an object to compact UTF-8 JSON bytes"""
+
+    if orjson is not None:
+        return orjson.dumps(obj)
+
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def loads(data: Any) -> Any:
+    """Deserialize JSON from bytes or str"""
+
+    if orjson is not None:
+        return orjson.loads(data)
+
+    return json.loads(data)
@@ -0,0 +1,98 @@
+"""
+Cold start measurement mode.
+Reports how long importing and initializing the application takes.
+
+Run from the backend directory in a fresh interpreter:
+    python -m app.core.startup [--json]
+"""
+
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+# Import phases in dependency order; each phase only pays for modules not yet loaded
+IMPORT_PHASES = [
+    ("fastapi", "fastapi"),
+    ("config", "app.core.config"),
+    ("services", "app.services.openai_client"),
+    ("routes", "app.api.v1.generate"),
+    ("app", "app.main"),
+]
+
+# Heavy optional SDKs that must stay off the import path
+DEFERRED_MODULES = ["openai", "sentry_sdk"]
+
+
+def measure_imports() -> Dict[str, float]:
+    """Import each phase in turn and time it"""
+    timings = {}
+    for name, module in IMPORT_PHASES:
+        start = time.perf_counter()
+        importlib.import_module(module)
+        timings[name] = time.perf_counter() - start
+    return timings
+
+
+async def measure_lifespan(app) -> Dict[str, float]:
+    """Time lifespan startup and shutdown"""
+    start = time.perf_counter()
+    async with app.router.lifespan_context(app):
+        startup = time.perf_counter() - start
+        start = time.perf_counter()
+    shutdown = time.perf_counter() - start
+    return {"startup": startup, "shutdown": shutdown}
+
+
+def measure_startup() -> Dict[str, Any]:
+    """Measure the import and initialization breakdown of a cold start"""
+    imports = measure_imports()
+    deferred_loaded = [module for module in DEFERRED_MODULES if module in sys.modules]
+
+    from app.main import app
+    lifespan = asyncio.run(measure_lifespan(app))
+
+    import_total = sum(imports.values())
+    return {
+        "imports": imports,
+        "import_total": import_total,
+        "lifespan_startup": lifespan["startup"],
+        "lifespan_shutdown": lifespan["shutdown"],
+        "ready": import_total + lifespan["startup"],
+        "deferred_modules_loaded": deferred_loaded,
+    }
+
+
+def format_report(result: Dict[str, Any]) -> str:
+    """Render the measurement as a small table"""
+    lines = ["Cold start breakdown (ms)"]
+    for name, seconds in result["imports"].items():
+        lines.append(f"  import {name:<12} {seconds * 1000:8.1f}")
+    lines.append(f"  {'import total':<19} {result['import_total'] * 1000:8.1f}")
+    lines.append(f"  {'lifespan startup':<19} {result['lifespan_startup'] * 1000:8.1f}")
+    lines.append(f"  {'ready to serve':<19} {result['ready'] * 1000:8.1f}")
+    lines.append(f"  {'lifespan shutdown':<19} {result['lifespan_shutdown'] * 1000:8.1f}")
+    loaded = ", ".join(result["deferred_modules_loaded"]) or "none"
+    lines.append(f"Deferred SDKs imported eagerly: {loaded}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Measure MythWeaver cold start")
+    parser.add_argument("--json", action="store_true", help="print machine-readable output")
+    args = parser.parse_args(argv)
+
+    # Measuring must not touch a real cache snapshot or call the upstream API
+    os.environ.setdefault("CACHE_SNAPSHOT_PATH", "")
+    os.environ.setdefault("HEALTH_PROBE_UPSTREAM", "false")
+
+    result = measure_startup()
+    print(json.dumps(result) if args.json else format_report(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -7,17 +7,24 @@ from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.responses import JSONResponse, RedirectResponse
+import asyncio
 import logging
 import time
 from contextlib import asynccontextmanager
 
 
-from app.api.v1 import generate, health
+from app.api.v1 import admin, budget, generate, health, jobs, metrics, myths
 from app.core.config import settings
-from app.core.logging import setup_logging
+from app.core.logging import setup_logging, stop_logging
+from app.core.loop_monitor import RequestMarker, loop_monitor
+from app.core.profiling import profile_request
+from app.services.analytics import analytics_sink
+from app.services.cache_snapshot import cache_snapshotter
+from app.services.dependency_health import dependency_monitor
+from app.services.generation import cache_refresher
+from app.services.jobs import job_runner
+from app.services.openai_client import openai_service
 
-# Setup logging
-setup_logging()
 logger = logging.getLogger(__name__)
 
 
@@ -26,9 +33,42 @@ logger = logging.getLogger(__name__)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager"""
+    setup_logging()
     logger.info("Starting MythWeaver backend...")
+    
+    # Measure event-loop lag from the first moment
+    loop_monitor.start()
+    
+    # Import the OpenAI SDK off the event loop so the first request does not pay for it
+    warm_up_task = asyncio.create_task(asyncio.to_thread(openai_service.warm_up))
+    
+    # Warm the response cache in the background so traffic is accepted at once
+    snapshots = cache_snapshotter if settings.CACHE_SNAPSHOT_PATH else None
+    if snapshots is not None:
+        snapshots.start()
+    
+    # Probe dependencies in the background; readiness serves cached results
+    dependency_monitor.start()
+    job_runner.start()
+    analytics_sink.start()
+    
     yield
+    
     logger.info("Shutting down MythWeaver backend...")
+    await job_runner.stop()
+    await cache_refresher.stop()
+    await analytics_sink.stop()
+    await dependency_monitor.stop()
+    await loop_monitor.stop()
+    if snapshots is not None:
+        await snapshots.stop()
+    
+    try:
+        await warm_up_task
+    except Exception as e:
+        logger.warning("OpenAI client warm-up failed: %s", e)
+    
+    stop_logging()
 
 
 # Create FastAPI application
@@ -48,6 +88,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST"],
     allow_headers=["*"],
+    expose_headers=["Content-Location", "ETag", "Idempotent-Replayed"],
 )
 
 app.add_middleware(
@@ -78,6 +119,15 @@ async def add_process_time_header(request: Request, call_next):
     return response
 
 
+# Installed only when enabled, so unprofiled deployments pay nothing per request
+if settings.PROFILING_ENABLED:
+    app.middleware("http")(profile_request)
+
+# Test mode labels each request so blocking callbacks can be attributed to it
+if settings.LOOP_BLOCK_FAIL_MS > 0:
+    app.add_middleware(RequestMarker)
+
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     """Global exception handler"""
@@ -94,6 +144,11 @@ async def global_exception_handler(request: Request, exc: Exception):
 # Include routers
 app.include_router(health.router, prefix="/api/v1", tags=["health"])
 app.include_router(generate.router, prefix="/api/v1", tags=["generation"])
+app.include_router(myths.router, prefix="/api/v1", tags=["myths"])
+app.include_router(jobs.router, prefix="/api/v1", tags=["jobs"])
+app.include_router(budget.router, prefix="/api/v1", tags=["budget"])
+app.include_router(metrics.router, prefix="/api/v1", tags=["metrics"])
+app.include_router(admin.router, prefix="/api/v1", tags=["admin"])
 
 
 @app.get("/")
@@ -91,3 +91,20 @@ class ErrorResponse(BaseModel):
     error: str = Field(..., description="Error type")
     message: str = Field(..., description="Error message")
     details: Optional[Dict[str, Any]] = Field(None, description="Additional error details")
+
+
+class CacheInvalidationRequest(BaseModel):
+    """Filters selecting cached responses to drop; every given filter must match"""
+    
+    culture: Optional[str] = Field(None, description="Requested culture, e.g. greek or auto")
+    tone: Optional[str] = Field(None, description="Requested tone")
+    template_version: Optional[str] = Field(None, description="PROMPT_TEMPLATE_VERSION the entry was generated with")
+    key_prefix: Optional[str] = Field(None, description="Raw cache key prefix; an empty string matches everything")
+
+
+class CacheWarmUpRequest(BaseModel):
+    """Scenarios to generate into the response cache in the background"""
+    
+    scenarios: List[str] = Field(..., description="Scenarios to warm", min_length=1, max_length=1000)
+    culture: str = Field(default="auto", description="Culture applied to every scenario")
+    tone: Optional[str] = Field(default="balanced", description="Tone applied to every scenario")
@@ -0,0 +1,155 @@
+"""
+Admission control for upstream generations.
+Caps concurrent generations per worker, queues a bounded number of
+requests for a bounded time and sheds the rest quickly.
+"""
+
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict
+
+from app.core.config import settings
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is shed instead of admitted"""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Concurrency limiter with a bounded FIFO wait queue"""
+
+    # Weight of the newest sample in the service-time moving average
+    EWMA_ALPHA = 0.2
+
+    def __init__(self, limit: int, max_queue: int, max_wait: float):
+        self.limit = limit
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        """Zero the counters"""
+        self.admitted = 0
+        self.queued = 0
+        self.shed_queue_full = 0
+        self.shed_timeout = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+        self.service_time_avg = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    @property
+    def saturated(self) -> bool:
+        """True when a new request would be shed immediately"""
+        return self.in_flight >= self.limit and self.queue_depth >= self.max_queue
+
+    def retry_after(self) -> int:
+        """Seconds a shed client should wait, from the observed service time"""
+        estimate = self.service_time_avg * (self.queue_depth + 1) / max(self.limit, 1)
+        return min(60, max(1, math.ceil(estimate)))
+
+    def _reject(self, reason: str) -> AdmissionRejected:
+        return AdmissionRejected(reason, self.retry_after())
+
+    async def acquire(self) -> None:
+        """Wait for a slot or raise AdmissionRejected"""
+        if self.in_flight < self.limit and not self._waiters:
+            self.in_flight += 1
+            self.admitted += 1
+            return
+
+        if self.queue_depth >= self.max_queue:
+            self.shed_queue_full += 1
+            raise self._reject("queue full")
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        self.queued += 1
+        start = time.perf_counter()
+
+        try:
+            # Shield so a timeout never cancels a slot that was just handed over
+            await asyncio.wait_for(asyncio.shield(future), self.max_wait)
+        except asyncio.TimeoutError:
+            if not future.done():
+                self._abandon(future)
+                self.shed_timeout += 1
+                raise self._reject("queue timeout")
+        except asyncio.CancelledError:
+            if future.done():
+                self.release()
+            else:
+                self._abandon(future)
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            self.wait_time_total += waited
+            self.wait_time_max = max(self.wait_time_max, waited)
+
+        self.admitted += 1
+
+    def _abandon(self, future: asyncio.Future) -> None:
+        """Remove a waiter that gave up"""
+        future.cancel()
+        try:
+            self._waiters.remove(future)
+        except ValueError:
+            pass
+
+    def release(self) -> None:
+        """Hand the slot to the next waiter, or free it"""
+        while self._waiters:
+            future = self._waiters.popleft()
+            if not future.done():
+                future.set_result(None)
+                return
+        self.in_flight -= 1
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold a generation slot for the duration of the block"""
+        await self.acquire()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.service_time_avg += self.EWMA_ALPHA * (elapsed - self.service_time_avg)
+            self.release()
+
+    def stats(self) -> Dict:
+        """Metrics snapshot"""
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "queue_limit": self.max_queue,
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "shed_queue_full": self.shed_queue_full,
+            "shed_timeout": self.shed_timeout,
+            "wait_time_avg": self.wait_time_total / self.queued if self.queued else 0.0,
+            "wait_time_max": self.wait_time_max,
+            "service_time_avg": self.service_time_avg,
+        }
+
+
+# Global controller for this worker
+admission_controller = AdmissionController(
+    limit=settings.MAX_CONCURRENT_GENERATIONS,
+    max_queue=settings.GENERATION_QUEUE_SIZE,
+    max_wait=settings.GENERATION_QUEUE_TIMEOUT,
+)
@@ -0,0 +1,281 @@
+"""
+Analytics events for the generation pipeline.
+Each generation or cache hit is appended to an in-memory ring buffer and
+written to SQLite in bulk by a background task, on a timer or as soon as
+a batch is ready, so requests never wait on disk. The CLI reports top
+scenarios, the culture mix, outcomes and latency percentiles by hour:
+
+    python -m app.services.analytics top|cultures|outcomes|latency
+"""
+
+import argparse
+import asyncio
+import logging
+import sqlite3
+import time
+from collections import deque
+from pathlib import Path
+from typing import Deque, Dict, List, Optional, Sequence, Tuple
+
+from app.core.config import settings
+from app.models.request import MythGenerationRequest
+from app.services.myth_utils import ScenarioAnalysis
+
+logger = logging.getLogger(__name__)
+
+# Where the request came in
+SOURCE_SYNC = "sync"
+SOURCE_JOB = "job"
+SOURCE_REFRESH = "refresh"  # background regeneration of a stale cache entry
+
+# Outcomes recorded per event
+OUTCOME_HIT = "hit"
+OUTCOME_GENERATED = "generated"
+OUTCOME_FALLBACK = "fallback"
+OUTCOME_SHED = "shed"
+OUTCOME_ERROR = "error"
+
+SCENARIO_SAMPLE_CHARS = 200
+
+COLUMNS = ("ts", "source", "culture", "tone", "scenario_digest", "scenario", "outcome", "model", "latency_ms")
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    ts REAL NOT NULL,
+    source TEXT NOT NULL,
+    culture TEXT NOT NULL,
+    tone TEXT,
+    scenario_digest TEXT NOT NULL,
+    scenario TEXT NOT NULL,
+    outcome TEXT NOT NULL,
+    model TEXT,
+    latency_ms REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_ts ON events (ts);
+"""
+INSERT = f"INSERT INTO events ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+
+Event = Tuple[float, str, str, Optional[str], str, str, str, Optional[str], float]
+
+
+def generation_event(
+    request: MythGenerationRequest,
+    analysis: ScenarioAnalysis,
+    source: str,
+    outcome: str,
+    latency: float,
+    model: Optional[str] = None,
+) -> Event:
+    """One event row, in COLUMNS order"""
+    return (
+        time.time(),
+        source,
+        analysis.resolve_culture(request.culture),
+        request.tone,
+        analysis.digest,
+        analysis.text[:SCENARIO_SAMPLE_CHARS],
+        outcome,
+        model,
+        round(latency * 1000, 2),
+    )
+
+
+def connect(path: str) -> sqlite3.Connection:
+    """Open the events database, creating it if needed"""
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+class AnalyticsSink:
+    """Ring buffer of events flushed to SQLite in the background"""
+
+    def __init__(self, path: str, capacity: int, flush_interval: float, flush_batch: int):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.flush_batch = flush_batch
+        self.recorded = 0
+        self.written = 0
+        self.dropped = 0
+        self.flushes = 0
+        self._buffer: Deque[Event] = deque(maxlen=capacity)
+        self._ready: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def record(self, event: Event) -> None:
+        """Buffer an event; the oldest one is dropped when the buffer is full"""
+        if len(self._buffer) == self._buffer.maxlen:
+            self.dropped += 1
+        self._buffer.append(event)
+        self.recorded += 1
+        if self._ready is not None and len(self._buffer) >= self.flush_batch:
+            self._ready.set()
+
+    def start(self) -> None:
+        """Start flushing in the background"""
+        if self.path and self._task is None:
+            self._ready = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the flusher and write whatever is still buffered
+
+        The flusher is asked to exit rather than cancelled, so a write that is
+        already running in its thread finishes before the connection closes.
+        """
+        if self._task is None:
+            return
+        self._stopping = True
+        self._ready.set()
+        try:
+            await self._task
+        finally:
+            self._task = None
+            self._ready = None
+            self._stopping = False
+        await self.flush()
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._ready.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            await self.flush()
+
+    async def flush(self) -> int:
+        """Write buffered events in one transaction, returning the count"""
+        if self._ready is not None:
+            self._ready.clear()
+        if not self._buffer:
+            return 0
+        events, self._buffer = self._buffer, deque(maxlen=self._buffer.maxlen)
+        try:
+            await asyncio.to_thread(self._write, events)
+        except Exception as e:
+            self.dropped += len(events)
+            logger.error("Analytics flush failed, dropped %d events: %s", len(events), e)
+            return 0
+        self.written += len(events)
+        self.flushes += 1
+        return len(events)
+
+    def _write(self, events: Sequence[Event]) -> None:
+        if self._conn is None:
+            self._conn = connect(self.path)
+        with self._conn:
+            self._conn.executemany(INSERT, events)
+
+    def stats(self) -> Dict:
+        return {
+            "buffered": len(self._buffer),
+            "recorded": self.recorded,
+            "written": self.written,
+            "dropped": self.dropped,
+            "flushes": self.flushes,
+        }
+
+
+analytics_sink = AnalyticsSink(
+    path=settings.ANALYTICS_DB,
+    capacity=settings.ANALYTICS_BUFFER_SIZE,
+    flush_interval=settings.ANALYTICS_FLUSH_INTERVAL,
+    flush_batch=settings.ANALYTICS_FLUSH_BATCH,
+)
+
+
+def percentile(ordered: Sequence[float], fraction: float) -> float:
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def top_scenarios(conn: sqlite3.Connection, since: float, limit: int) -> List[Tuple]:
+    """(count, culture, scenario) of the most requested scenarios"""
+    return conn.execute(
+        """
+        SELECT COUNT(*) AS requests, MAX(culture), MAX(scenario) FROM events
+        WHERE ts >= ? GROUP BY scenario_digest ORDER BY requests DESC LIMIT ?
+        """,
+        (since, limit),
+    ).fetchall()
+
+
+def culture_mix(conn: sqlite3.Connection, since: float) -> List[Tuple]:
+    """(culture, count, share) by descending count"""
+    rows = conn.execute(
+        "SELECT culture, COUNT(*) AS requests FROM events WHERE ts >= ? GROUP BY culture ORDER BY requests DESC",
+        (since,),
+    ).fetchall()
+    total = sum(count for _, count in rows) or 1
+    return [(culture, count, count / total) for culture, count in rows]
+
+
+def outcome_mix(conn: sqlite3.Connection, since: float) -> List[Tuple]:
+    """(outcome, count, share): cache hit rate, fallbacks, shed and failed requests"""
+    rows = conn.execute(
+        "SELECT outcome, COUNT(*) AS requests FROM events WHERE ts >= ? GROUP BY outcome ORDER BY requests DESC",
+        (since,),
+    ).fetchall()
+    total = sum(count for _, count in rows) or 1
+    return [(outcome, count, count / total) for outcome, count in rows]
+
+
+def latency_by_hour(conn: sqlite3.Connection, since: float) -> List[Tuple]:
+    """(hour start, hit or miss, requests, p50, p95, p99 in ms) per hour"""
+    hours: Dict[Tuple[int, bool], List[float]] = {}
+    for hour, outcome, latency in conn.execute(
+        "SELECT CAST(ts / 3600 AS INTEGER), outcome, latency_ms FROM events WHERE ts >= ?", (since,)
+    ):
+        hours.setdefault((hour, outcome == OUTCOME_HIT), []).append(latency)
+
+    rows = []
+    for (hour, hit), latencies in sorted(hours.items()):
+        latencies.sort()
+        rows.append((
+            hour * 3600,
+            "hit" if hit else "miss",
+            len(latencies),
+            percentile(latencies, 0.50),
+            percentile(latencies, 0.95),
+            percentile(latencies, 0.99),
+        ))
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Query generation analytics")
+    parser.add_argument("report", choices=["top", "cultures", "outcomes", "latency"])
+    parser.add_argument("--db", default=settings.ANALYTICS_DB, help="events database")
+    parser.add_argument("--hours", type=float, default=24, help="look back this many hours")
+    parser.add_argument("--limit", type=int, default=20, help="rows for the top report")
+    args = parser.parse_args(argv)
+
+    if not args.db or not Path(args.db).exists():
+        parser.error(f"no events database at {args.db!r}; set ANALYTICS_DB or pass --db")
+    conn = connect(args.db)
+    since = time.time() - args.hours * 3600
+
+    if args.report == "top":
+        for count, culture, scenario in top_scenarios(conn, since, args.limit):
+            print(f"{count:7d}  {culture:<10} {scenario[:80]}")
+    elif args.report == "cultures":
+        for culture, count, share in culture_mix(conn, since):
+            print(f"{culture:<12} {count:7d}  {share:6.1%}")
+    elif args.report == "outcomes":
+        for outcome, count, share in outcome_mix(conn, since):
+            print(f"{outcome:<12} {count:7d}  {share:6.1%}")
+    else:
+        print(f"{'hour (UTC)':<17} {'':<5} {'requests':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+        for hour, kind, count, p50, p95, p99 in latency_by_hour(conn, since):
+            stamp = time.strftime("%Y-%m-%d %H:00", time.gmtime(hour))
+            print(f"{stamp:<17} {kind:<5} {count:8d} {p50:9.1f} {p95:9.1f} {p99:9.1f}")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
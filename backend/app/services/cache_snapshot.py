@@ -0,0 +1,210 @@
+"""
+Response cache snapshots.
+Persists the in-memory response cache across restarts in a compact,
+zlib-compressed, versioned binary file and restores it in the background.
+"""
+
+import asyncio
+import logging
+import os
+import struct
+import time
+import zlib
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.services.response_cache import CachedBody, response_cache
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_MAGIC = b"MWCS"
+SNAPSHOT_VERSION = 1
+
+# Uncompressed header: magic, format version
+HEADER = struct.Struct(">4sB")
+# Per record inside the compressed stream: key length, timestamp, body length
+RECORD = struct.Struct(">HdI")
+
+# Entries inserted per event-loop turn while restoring
+RESTORE_BATCH_SIZE = 500
+
+CacheEntries = List[Tuple[str, CachedBody]]
+
+
+def write_snapshot(entries: CacheEntries, path: Path, ttl: float, level: int = 6) -> int:
+    """Atomically write still-valid cache entries to path, returning the count"""
+
+    now = time.time()
+    compressor = zlib.compressobj(level)
+    chunks = [HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION)]
+    written = 0
+
+    for key, entry in entries:
+        timestamp = entry.timestamp
+        if now - timestamp >= ttl:
+            continue
+
+        key_bytes = key.encode("utf-8")
+        body = entry.body
+        chunks.append(compressor.compress(RECORD.pack(len(key_bytes), timestamp, len(body))))
+        chunks.append(compressor.compress(key_bytes))
+        chunks.append(compressor.compress(body))
+        written += 1
+
+    chunks.append(compressor.flush())
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        for chunk in chunks:
+            f.write(chunk)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+    return written
+
+
+def read_snapshot(path: Path, ttl: float) -> CacheEntries:
+    """Read entries from a snapshot, skipping expired ones"""
+
+    if not path.exists():
+        return []
+
+    data = path.read_bytes()
+    if len(data) < HEADER.size:
+        raise ValueError("Snapshot file is truncated")
+
+    magic, version = HEADER.unpack_from(data)
+    if magic != SNAPSHOT_MAGIC:
+        raise ValueError("Not a response cache snapshot")
+    if version != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot version {version}")
+
+    payload = zlib.decompress(data[HEADER.size:])
+    now = time.time()
+    entries: CacheEntries = []
+    offset = 0
+
+    while offset < len(payload):
+        key_length, timestamp, body_length = RECORD.unpack_from(payload, offset)
+        offset += RECORD.size
+        key = payload[offset:offset + key_length].decode("utf-8")
+        offset += key_length
+        body = payload[offset:offset + body_length]
+        offset += body_length
+
+        if len(body) != body_length:
+            raise ValueError("Snapshot record is truncated")
+        if now - timestamp < ttl:
+            # Re-encoded here, in the reader thread, not on the event loop
+            entries.append((key, CachedBody.encode(body, timestamp)))
+
+    return entries
+
+
+class CacheSnapshotter:
+    """Background restore and periodic snapshotting for a response cache"""
+
+    def __init__(
+        self, cache: Dict[str, CachedBody], path: str, interval: float, ttl: float, max_entries: int = 0
+    ):
+        self.cache = cache
+        self.path = Path(path)
+        self.interval = interval
+        self.ttl = ttl
+        # 0 restores the whole snapshot
+        self.max_entries = max_entries
+        self._restore_task: Optional[asyncio.Task] = None
+        self._periodic_task: Optional[asyncio.Task] = None
+        # Periodic and on-demand saves share one temporary file
+        self._save_lock = asyncio.Lock()
+
+    def start(self) -> None:
+        """Schedule the restore and periodic snapshots without blocking startup"""
+        self._restore_task = asyncio.create_task(self.restore())
+        if self.interval > 0:
+            self._periodic_task = asyncio.create_task(self._run_periodic())
+
+    async def stop(self) -> None:
+        """Stop periodic snapshots and write a final snapshot"""
+        if self._periodic_task is not None and not self._periodic_task.done():
+            self._periodic_task.cancel()
+            try:
+                await self._periodic_task
+            except asyncio.CancelledError:
+                pass
+
+        # Finish merging first, or the final snapshot would drop unrestored entries
+        await self.restored()
+        await self.save()
+
+    async def restored(self) -> None:
+        """Wait until the startup restore has been merged into the cache"""
+        if self._restore_task is not None:
+            await self._restore_task
+
+    async def restore(self) -> int:
+        """Load the snapshot off the event loop and merge it into the cache"""
+        try:
+            entries = await asyncio.to_thread(read_snapshot, self.path, self.ttl)
+        except Exception as e:
+            logger.warning("Ignoring unreadable cache snapshot %s: %s", self.path, e)
+            return 0
+
+        if self.max_entries:
+            # Snapshots are written least recently used first, so keep the newest that fit
+            room = max(self.max_entries - len(self.cache), 0)
+            entries = [item for item in entries if item[0] not in self.cache]
+            entries = entries[len(entries) - room:] if room < len(entries) else entries
+
+        restored = 0
+        for start in range(0, len(entries), RESTORE_BATCH_SIZE):
+            for key, entry in entries[start:start + RESTORE_BATCH_SIZE]:
+                if self.max_entries and len(self.cache) >= self.max_entries:
+                    break
+                # Entries generated since startup are newer than the snapshot
+                if key not in self.cache:
+                    self.cache[key] = entry
+                    restored += 1
+            await asyncio.sleep(0)
+
+        logger.info("Restored %d cached responses from snapshot", restored)
+        return restored
+
+    async def save(self) -> int:
+        """Write the current cache contents to disk"""
+        # Copy on the loop thread so the worker thread never sees a mutating dict
+        entries = list(self.cache.items())
+        try:
+            async with self._save_lock:
+                written = await asyncio.to_thread(write_snapshot, entries, self.path, self.ttl)
+        except Exception as e:
+            logger.error("Failed to write cache snapshot %s: %s", self.path, e)
+            return 0
+
+        logger.info("Saved %d cached responses to snapshot", written)
+        return written
+
+    async def _run_periodic(self) -> None:
+        """Snapshot the cache every interval seconds"""
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.save()
+
+
+def build_cache_snapshotter() -> Optional[CacheSnapshotter]:
+    """Snapshotter for the response cache, or None when snapshots are disabled"""
+    if not settings.CACHE_SNAPSHOT_PATH:
+        return None
+    return CacheSnapshotter(
+        response_cache,
+        path=settings.CACHE_SNAPSHOT_PATH,
+        interval=settings.CACHE_SNAPSHOT_INTERVAL,
+        ttl=settings.RESPONSE_CACHE_TTL,
+        max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+    )
+
+
+cache_snapshotter = build_cache_snapshotter()
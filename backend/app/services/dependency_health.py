@@ -0,0 +1,168 @@
+"""
+Dependency health probes.
+Checks the upstream model, Redis and the database on a background timer
+and caches the results so readiness requests never probe inline.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Callable, Dict, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+Probe = Callable[[], None]
+
+
+class ProbeResult:
+    """Outcome of the most recent probe of one dependency"""
+
+    __slots__ = ("healthy", "latency_ms", "checked_at", "error")
+
+    def __init__(self, healthy: bool, latency_ms: float, checked_at: float, error: Optional[str] = None):
+        self.healthy = healthy
+        self.latency_ms = latency_ms
+        self.checked_at = checked_at
+        self.error = error
+
+    def as_dict(self) -> Dict:
+        """Return the result as a plain dict"""
+        return {
+            "healthy": self.healthy,
+            "latency_ms": round(self.latency_ms, 1),
+            "age_seconds": round(time.time() - self.checked_at, 1),
+            "error": self.error,
+        }
+
+
+class DependencyMonitor:
+    """Runs registered probes periodically and keeps the latest results"""
+
+    def __init__(self, interval: float, timeout: float):
+        self.interval = interval
+        self.timeout = timeout
+        self.probes: Dict[str, Probe] = {}
+        self.results: Dict[str, ProbeResult] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def register(self, name: str, probe: Probe) -> None:
+        """Register a blocking probe that raises on failure"""
+        self.probes[name] = probe
+
+    async def run_probe(self, name: str, probe: Probe) -> ProbeResult:
+        """Run one probe in a worker thread with a timeout"""
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.to_thread(probe), timeout=self.timeout)
+            error = None
+        except asyncio.TimeoutError:
+            error = f"timed out after {self.timeout}s"
+        except Exception as e:
+            error = str(e) or type(e).__name__
+
+        result = ProbeResult(
+            healthy=error is None,
+            latency_ms=(time.perf_counter() - start) * 1000,
+            checked_at=time.time(),
+            error=error,
+        )
+        previous = self.results.get(name)
+        if previous is None or previous.healthy != result.healthy:
+            level = logging.INFO if result.healthy else logging.WARNING
+            logger.log(level, f"Dependency {name} healthy={result.healthy} error={error}")
+        self.results[name] = result
+        return result
+
+    async def refresh(self) -> None:
+        """Probe every dependency concurrently"""
+        await asyncio.gather(*(self.run_probe(name, probe) for name, probe in self.probes.items()))
+
+    def start(self) -> None:
+        """Start refreshing in the background"""
+        if self.probes and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background refresh"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        """Refresh forever, surviving individual failures"""
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error("Dependency probe loop error: %s", e)
+            await asyncio.sleep(self.interval)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Cached results; dependencies not probed yet are reported as unknown"""
+        return {
+            name: self.results[name].as_dict() if name in self.results else {"healthy": None}
+            for name in self.probes
+        }
+
+
+def probe_upstream() -> None:
+    """Check that the configured model is reachable"""
+    from app.services.openai_client import openai_service
+    client = openai_service.client.with_options(timeout=settings.HEALTH_PROBE_TIMEOUT, max_retries=0)
+    client.models.retrieve(openai_service.model)
+
+
+def probe_redis() -> None:
+    """Ping Redis"""
+    import redis
+    client = redis.Redis.from_url(settings.REDIS_URL, socket_timeout=settings.HEALTH_PROBE_TIMEOUT)
+    try:
+        client.ping()
+    finally:
+        client.close()
+
+
+def probe_database() -> None:
+    """Run a trivial query against the configured database"""
+    if settings.DATABASE_URL.startswith("sqlite"):
+        # Connecting would create the file; check the location is usable instead
+        path = settings.DATABASE_URL.split(":///", 1)[-1]
+        if path and path != ":memory:":
+            directory = os.path.dirname(os.path.abspath(path))
+            if not os.access(directory, os.W_OK):
+                raise OSError(f"database directory {directory} is not writable")
+        return
+    
+    from sqlalchemy import create_engine, text
+    engine = create_engine(settings.DATABASE_URL)
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+    finally:
+        engine.dispose()
+
+
+def build_dependency_monitor() -> DependencyMonitor:
+    """Create a monitor with a probe for every configured dependency"""
+    monitor = DependencyMonitor(
+        interval=settings.HEALTH_PROBE_INTERVAL,
+        timeout=settings.HEALTH_PROBE_TIMEOUT,
+    )
+    if settings.HEALTH_PROBE_UPSTREAM:
+        monitor.register("upstream_model", probe_upstream)
+    if settings.REDIS_URL:
+        monitor.register("redis", probe_redis)
+    if settings.DATABASE_URL:
+        monitor.register("database", probe_database)
+    return monitor
+
+
+# Global monitor, started from the application lifespan
+dependency_monitor = build_dependency_monitor()
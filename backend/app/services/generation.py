@@ -0,0 +1,141 @@
+"""
+Myth generation pipeline shared by the synchronous endpoint and jobs.
+Runs a cache miss through admission control, the model, the cache and
+the shareable myth store, recording an analytics event for each.
+Stale cache hits are served at once and regenerated in the background.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Dict, Optional, Tuple
+
+from app.core.serialization import dumps
+from app.models.request import MythGenerationRequest
+from app.services.admission import AdmissionRejected, admission_controller
+from app.services.analytics import (
+    OUTCOME_ERROR,
+    OUTCOME_FALLBACK,
+    OUTCOME_GENERATED,
+    OUTCOME_SHED,
+    SOURCE_REFRESH,
+    SOURCE_SYNC,
+    analytics_sink,
+    generation_event,
+)
+from app.services.myth_store import myth_store
+from app.services.myth_utils import ScenarioAnalysis
+from app.services.openai_client import openai_service
+from app.services.procedural_myth import PROCEDURAL_MODEL
+from app.services.response_cache import cache_stats, lookup_entry, store_body
+from app.services.token_budget import TokenUsage, token_budget
+
+logger = logging.getLogger(__name__)
+
+
+async def generate_and_store(
+    request: MythGenerationRequest,
+    analysis: ScenarioAnalysis,
+    cache_key: str,
+    client_id: Optional[str] = None,
+    source: str = SOURCE_SYNC,
+) -> Tuple[bytes, str]:
+    """Generate a myth, cache and store its serialized body, and return it with its myth id"""
+    
+    # Only misses compete for upstream slots
+    started = time.perf_counter()
+    usage = TokenUsage()
+    try:
+        async with admission_controller.slot():
+            response = await openai_service.generate_myth(request, analysis, usage)
+    except Exception as e:
+        outcome = OUTCOME_SHED if isinstance(e, AdmissionRejected) else OUTCOME_ERROR
+        analytics_sink.record(generation_event(request, analysis, source, outcome, time.perf_counter() - started))
+        raise
+    finally:
+        # Tokens are spent even when the generation fails
+        if client_id is not None:
+            await token_budget.charge(client_id, usage)
+    
+    model = response.meta.ai_model
+    outcome = OUTCOME_FALLBACK if model == PROCEDURAL_MODEL else OUTCOME_GENERATED
+    analytics_sink.record(generation_event(request, analysis, source, outcome, time.perf_counter() - started, model))
+    
+    body = dumps(response.model_dump())
+    key = await myth_store.save(body)
+    # Fallbacks are served but not cached, so the next request tries the model again
+    if outcome == OUTCOME_GENERATED:
+        store_body(cache_key, body, key)
+    return body, key
+
+
+async def generate_and_cache(
+    request: MythGenerationRequest,
+    analysis: ScenarioAnalysis,
+    cache_key: str,
+    client_id: Optional[str] = None,
+    source: str = SOURCE_SYNC,
+) -> bytes:
+    """Generate a myth, cache its serialized body and return it"""
+    body, _ = await generate_and_store(request, analysis, cache_key, client_id, source)
+    return body
+
+
+class CacheRefresher:
+    """Regenerates stale cache entries in the background, at most once per key at a time"""
+    
+    def __init__(self):
+        self._tasks: Dict[str, asyncio.Task] = {}
+    
+    @property
+    def in_flight(self) -> int:
+        return len(self._tasks)
+    
+    def schedule(self, request: MythGenerationRequest, analysis: ScenarioAnalysis, cache_key: str) -> bool:
+        """Start a refresh unless one for the key is already running"""
+        if cache_key in self._tasks:
+            cache_stats.refreshes_deduplicated += 1
+            return False
+        
+        cache_stats.refreshes += 1
+        task = asyncio.create_task(self._refresh(request, analysis, cache_key))
+        self._tasks[cache_key] = task
+        task.add_done_callback(lambda _: self._tasks.pop(cache_key, None))
+        return True
+    
+    async def _refresh(self, request: MythGenerationRequest, analysis: ScenarioAnalysis, cache_key: str) -> None:
+        try:
+            # No client is charged; the stale entry keeps being served if this fails
+            await generate_and_cache(request, analysis, cache_key, source=SOURCE_REFRESH)
+        except Exception as e:
+            cache_stats.refresh_failures += 1
+            logger.warning("Background refresh of %s failed: %s", cache_key, e)
+    
+    async def stop(self) -> None:
+        """Cancel refreshes still running"""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+cache_refresher = CacheRefresher()
+
+
+async def cached_myth(
+    request: MythGenerationRequest,
+    analysis: ScenarioAnalysis,
+    cache_key: str,
+) -> Optional[Tuple[bytes, str]]:
+    """Return the cached body and its myth id, refreshing the entry in the background when stale"""
+    entry, stale = lookup_entry(cache_key)
+    if stale:
+        cache_refresher.schedule(request, analysis, cache_key)
+    if entry is None:
+        return None
+    
+    body = entry.body
+    if entry.myth_id is None:
+        # Restored from a snapshot: store it once so its shareable link resolves
+        entry.myth_id = await myth_store.save(body)
+    return body, entry.myth_id
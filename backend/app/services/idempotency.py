@@ -0,0 +1,208 @@
+"""
+Idempotency keys for generation requests.
+The first request carrying an Idempotency-Key owns the generation; retries
+with the same key, whether concurrent or after completion, get its result
+instead of paying for another one. Keys live in Redis when configured so
+a retry landing on another replica is recognised too. The owner keeps
+extending its lock while it works, so a lock only lapses when the owner
+itself is gone.
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.core.serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+MAX_KEY_LENGTH = 255
+
+
+class IdempotencyKeyReused(Exception):
+    """Raised when a key is presented again with a different request body"""
+
+
+class IdempotencyInProgress(Exception):
+    """Raised when the request owning a key did not finish in time"""
+
+
+class IdempotencyRecord:
+    """What a key is bound to: the request fingerprint and, once done, the body"""
+
+    __slots__ = ("fingerprint", "body", "expires_at")
+
+    def __init__(self, fingerprint: str, body: Optional[bytes], expires_at: float = 0.0):
+        self.fingerprint = fingerprint
+        self.body = body
+        self.expires_at = expires_at
+
+
+def request_fingerprint(payload: Dict) -> str:
+    """Digest of a request body, so a reused key can be checked against it"""
+    return hashlib.sha256(dumps(payload)).hexdigest()
+
+
+class MemoryIdempotencyStore:
+    """Keys for a single replica"""
+
+    def __init__(self, ttl: int, lock_ttl: int):
+        self.ttl = ttl
+        self.lock_ttl = lock_ttl
+        self._records: Dict[str, IdempotencyRecord] = {}
+        self._done: Dict[str, asyncio.Event] = {}
+
+    async def claim(self, key: str, fingerprint: str) -> Optional[IdempotencyRecord]:
+        """Take ownership of a new key (None), or return the record already bound to it"""
+        now = time.time()
+        record = self._records.get(key)
+        if record is not None and record.expires_at > now:
+            return record
+
+        self._prune(now)
+        self._records[key] = IdempotencyRecord(fingerprint, None, now + self.lock_ttl)
+        self._done[key] = asyncio.Event()
+        return None
+
+    async def refresh(self, key: str) -> None:
+        """Extend the lock on a key that is still being worked on"""
+        record = self._records.get(key)
+        if record is not None and record.body is None:
+            record.expires_at = time.time() + self.lock_ttl
+
+    async def complete(self, key: str, fingerprint: str, body: bytes) -> None:
+        self._records[key] = IdempotencyRecord(fingerprint, body, time.time() + self.ttl)
+        self._wake(key)
+
+    async def release(self, key: str) -> None:
+        """Forget a key whose owner failed, so a retry can run it again"""
+        self._records.pop(key, None)
+        self._wake(key)
+
+    async def wait(self, key: str, timeout: float) -> None:
+        """Wait until the owner of a key completes or releases it"""
+        event = self._done.get(key)
+        if event is None:
+            return
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def _wake(self, key: str) -> None:
+        event = self._done.pop(key, None)
+        if event is not None:
+            event.set()
+
+    def _prune(self, now: float) -> None:
+        expired = [key for key, record in self._records.items() if record.expires_at <= now]
+        for key in expired:
+            del self._records[key]
+            self._wake(key)
+
+
+class RedisIdempotencyStore:
+    """Keys shared by every replica through Redis"""
+
+    KEY_PREFIX = "mythweaver:idempotency:"
+
+    def __init__(self, url: str, ttl: int, lock_ttl: int):
+        import redis.asyncio as redis_asyncio
+        self.redis = redis_asyncio.from_url(url)
+        self.ttl = ttl
+        self.lock_ttl = lock_ttl
+
+    async def claim(self, key: str, fingerprint: str) -> Optional[IdempotencyRecord]:
+        # One atomic SET NX decides the owner; the value is "<fingerprint>\n[<body>]"
+        redis_key = self.KEY_PREFIX + key
+        if await self.redis.set(redis_key, fingerprint.encode() + b"\n", nx=True, ex=self.lock_ttl):
+            return None
+        value = await self.redis.get(redis_key)
+        if value is None:
+            return await self.claim(key, fingerprint)  # expired in between
+        stored_fingerprint, _, body = value.partition(b"\n")
+        return IdempotencyRecord(stored_fingerprint.decode(), body or None)
+
+    async def refresh(self, key: str) -> None:
+        """Extend the lock on a key that is still being worked on"""
+        await self.redis.expire(self.KEY_PREFIX + key, self.lock_ttl)
+
+    async def complete(self, key: str, fingerprint: str, body: bytes) -> None:
+        await self.redis.set(self.KEY_PREFIX + key, fingerprint.encode() + b"\n" + body, ex=self.ttl)
+
+    async def release(self, key: str) -> None:
+        await self.redis.delete(self.KEY_PREFIX + key)
+
+    async def wait(self, key: str, timeout: float) -> None:
+        """Poll until the key is completed or released"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            await asyncio.sleep(min(settings.JOB_POLL_INTERVAL, max(deadline - time.monotonic(), 0)))
+            value = await self.redis.get(self.KEY_PREFIX + key)
+            if value is None or not value.endswith(b"\n"):
+                return
+
+
+async def keep_locked(store, key: str) -> None:
+    """Refresh a key's lock well before it lapses, until cancelled"""
+    while True:
+        await asyncio.sleep(store.lock_ttl / 3)
+        try:
+            await store.refresh(key)
+        except Exception as e:
+            logger.warning("Failed to extend idempotency lock %s: %s", key, e)
+
+
+async def run_idempotent(
+    store,
+    key: str,
+    fingerprint: str,
+    work: Callable[[], Awaitable[bytes]],
+    timeout: float,
+) -> Tuple[bytes, bool]:
+    """Run `work` once per key, returning its body and whether it was replayed"""
+    deadline = time.monotonic() + timeout
+    while True:
+        record = await store.claim(key, fingerprint)
+        if record is None:
+            # Without this a generation outlasting the lock TTL would be run again by a waiter
+            heartbeat = asyncio.create_task(keep_locked(store, key))
+            try:
+                body = await work()
+            except BaseException:
+                # Failures are not remembered; the client's retry runs again
+                await store.release(key)
+                raise
+            finally:
+                heartbeat.cancel()
+            await store.complete(key, fingerprint, body)
+            return body, False
+
+        if record.fingerprint != fingerprint:
+            raise IdempotencyKeyReused(key)
+        if record.body is not None:
+            return record.body, True
+
+        # Another request owns the key and is still working on it
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise IdempotencyInProgress(key)
+        await store.wait(key, remaining)
+
+
+def build_idempotency_store():
+    """Use Redis for shared keys when configured, memory otherwise"""
+    if settings.REDIS_URL:
+        try:
+            return RedisIdempotencyStore(
+                settings.REDIS_URL, ttl=settings.IDEMPOTENCY_TTL, lock_ttl=settings.IDEMPOTENCY_LOCK_TTL
+            )
+        except ImportError:
+            logger.warning("redis package not installed, keeping idempotency keys in memory")
+    return MemoryIdempotencyStore(ttl=settings.IDEMPOTENCY_TTL, lock_ttl=settings.IDEMPOTENCY_LOCK_TTL)
+
+
+idempotency_store = build_idempotency_store()
@@ -0,0 +1,290 @@
+"""
+Asynchronous myth generation jobs.
+Runs generations on an in-process worker pool with a bounded queue and
+keeps job state in Redis when configured so any replica can answer polls.
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from functools import partial
+from typing import Awaitable, Callable, Dict, Optional
+
+from app.core.config import settings
+from app.core.serialization import dumps
+from app.models.request import MythGenerationRequest
+from app.services.admission import AdmissionRejected
+from app.services.analytics import SOURCE_JOB
+from app.services.generation import generate_and_cache
+from app.services.myth_utils import ScenarioAnalysis
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+TERMINAL_STATES = (JOB_SUCCEEDED, JOB_FAILED)
+
+Handler = Callable[[MythGenerationRequest, ScenarioAnalysis, str, Optional[str]], Awaitable[bytes]]
+
+
+class JobQueueFull(Exception):
+    """Raised when the job queue cannot accept more work"""
+
+
+class Job:
+    """State of one generation job"""
+
+    __slots__ = ("id", "status", "created_at", "updated_at", "error", "result")
+
+    def __init__(
+        self,
+        id: str,
+        status: str = JOB_QUEUED,
+        created_at: Optional[float] = None,
+        updated_at: Optional[float] = None,
+        error: Optional[str] = None,
+        result: Optional[bytes] = None,
+    ):
+        now = time.time()
+        self.id = id
+        self.status = status
+        self.created_at = created_at or now
+        self.updated_at = updated_at or now
+        self.error = error
+        self.result = result
+
+    @property
+    def done(self) -> bool:
+        return self.status in TERMINAL_STATES
+
+    def to_json(self) -> bytes:
+        """Serialize for the API, splicing in the cached result bytes untouched"""
+        state = dumps({
+            "id": self.id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "error": self.error,
+        })
+        if self.result is None:
+            return state
+        return state[:-1] + b',"result":' + self.result + b"}"
+
+
+class MemoryJobStore:
+    """Job state for a single replica"""
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        self._jobs: Dict[str, Job] = {}
+
+    async def save(self, job: Job) -> None:
+        job.updated_at = time.time()
+        self._jobs[job.id] = job
+        self._prune()
+
+    async def load(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def _prune(self) -> None:
+        """Drop jobs older than the TTL"""
+        cutoff = time.time() - self.ttl
+        expired = [job_id for job_id, job in self._jobs.items() if job.updated_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+class RedisJobStore:
+    """Job state shared by every replica through Redis"""
+
+    KEY_PREFIX = "mythweaver:job:"
+
+    def __init__(self, url: str, ttl: int):
+        import redis.asyncio as redis_asyncio
+        self.redis = redis_asyncio.from_url(url)
+        self.ttl = ttl
+
+    async def save(self, job: Job) -> None:
+        job.updated_at = time.time()
+        fields = {
+            "status": job.status,
+            "created_at": repr(job.created_at),
+            "updated_at": repr(job.updated_at),
+            "error": job.error or "",
+            "result": job.result or b"",
+        }
+        key = self.KEY_PREFIX + job.id
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(key, mapping=fields)
+            pipe.expire(key, self.ttl)
+            await pipe.execute()
+
+    async def load(self, job_id: str) -> Optional[Job]:
+        fields = await self.redis.hgetall(self.KEY_PREFIX + job_id)
+        if not fields:
+            return None
+        return Job(
+            id=job_id,
+            status=fields[b"status"].decode(),
+            created_at=float(fields[b"created_at"]),
+            updated_at=float(fields[b"updated_at"]),
+            error=fields[b"error"].decode() or None,
+            result=fields[b"result"] or None,
+        )
+
+
+class JobRunner:
+    """Bounded queue drained by a pool of asyncio workers"""
+
+    def __init__(self, store, handler: Handler, workers: int, queue_size: int, timeout: float):
+        self.store = store
+        self.handler = handler
+        self.worker_count = workers
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers = []
+        self._done_events: Dict[str, asyncio.Event] = {}
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def start(self) -> None:
+        """Start the worker pool on the running loop"""
+        if self._workers:
+            return
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._workers = [
+            asyncio.create_task(self._worker(index)) for index in range(self.worker_count)
+        ]
+
+    async def stop(self) -> None:
+        """Cancel the workers; queued jobs are abandoned"""
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+
+    async def submit(
+        self,
+        request: MythGenerationRequest,
+        analysis: ScenarioAnalysis,
+        cache_key: str,
+        cached_body: Optional[bytes] = None,
+        client_id: Optional[str] = None,
+    ) -> Job:
+        """Create a job, completing it at once when the result is cached"""
+        job = Job(id=uuid.uuid4().hex)
+
+        if cached_body is not None:
+            job.status = JOB_SUCCEEDED
+            job.result = cached_body
+            await self.store.save(job)
+            return job
+
+        if self._queue is None or self._queue.full():
+            raise JobQueueFull("job queue is full")
+
+        await self.store.save(job)
+        self._done_events[job.id] = asyncio.Event()
+        self._queue.put_nowait((job, request, analysis, cache_key, client_id))
+        return job
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[Job]:
+        """Long-poll until the job finishes or the timeout expires"""
+        job = await self.store.load(job_id)
+        if job is None or job.done or timeout <= 0:
+            return job
+
+        event = self._done_events.get(job_id)
+        if event is not None:
+            # Owned by this replica: wake as soon as it completes
+            try:
+                await asyncio.wait_for(event.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            return await self.store.load(job_id)
+
+        # Owned by another replica: poll the shared store
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            await asyncio.sleep(min(settings.JOB_POLL_INTERVAL, max(deadline - time.monotonic(), 0)))
+            job = await self.store.load(job_id)
+            if job is None or job.done:
+                break
+        return job
+
+    async def _worker(self, index: int) -> None:
+        """Process queued jobs forever"""
+        while True:
+            job, request, analysis, cache_key, client_id = await self._queue.get()
+            try:
+                await self._run(job, request, analysis, cache_key, client_id)
+            finally:
+                self._queue.task_done()
+                event = self._done_events.pop(job.id, None)
+                if event is not None:
+                    event.set()
+
+    async def _run(
+        self,
+        job: Job,
+        request: MythGenerationRequest,
+        analysis: ScenarioAnalysis,
+        cache_key: str,
+        client_id: Optional[str],
+    ) -> None:
+        """Run one job, waiting out admission control instead of failing"""
+        job.status = JOB_RUNNING
+        await self.store.save(job)
+        deadline = job.created_at + self.timeout
+
+        try:
+            while True:
+                try:
+                    job.result = await self.handler(request, analysis, cache_key, client_id)
+                    job.status = JOB_SUCCEEDED
+                    break
+                except AdmissionRejected as e:
+                    if time.time() + e.retry_after > deadline:
+                        raise
+                    await asyncio.sleep(e.retry_after)
+        except ValueError as e:
+            job.status, job.error = JOB_FAILED, str(e)
+        except AdmissionRejected:
+            job.status, job.error = JOB_FAILED, "Server is busy, please retry"
+        except Exception as e:
+            logger.error("Job %s failed: %s", job.id, e, exc_info=True)
+            job.status, job.error = JOB_FAILED, "Failed to generate myth"
+
+        await self.store.save(job)
+
+
+def build_job_store():
+    """Use Redis for shared state when configured, memory otherwise"""
+    if settings.REDIS_URL:
+        try:
+            return RedisJobStore(settings.REDIS_URL, ttl=settings.JOB_TTL)
+        except ImportError:
+            logger.warning("redis package not installed, keeping job state in memory")
+    return MemoryJobStore(ttl=settings.JOB_TTL)
+
+
+def build_job_runner() -> JobRunner:
+    """Create the job runner backed by the shared generation pipeline"""
+    return JobRunner(
+        store=build_job_store(),
+        handler=partial(generate_and_cache, source=SOURCE_JOB),
+        workers=settings.JOB_WORKERS,
+        queue_size=settings.JOB_QUEUE_SIZE,
+        timeout=settings.JOB_TIMEOUT,
+    )
+
+
+# Global runner, started from the application lifespan
+job_runner = build_job_runner()
@@ -0,0 +1,148 @@
+"""
+Latency-aware model routing.
+Chooses a model tier per request from the scenario, tone and the recent
+latency and error rates observed for each model.
+"""
+
+import math
+import time
+from collections import deque
+from typing import Deque, Dict, List, Tuple
+
+from app.core.config import settings
+
+
+class ModelStats:
+    """Rolling latency and error window plus lifetime totals for one model"""
+
+    __slots__ = ("window", "samples", "requests", "errors")
+
+    def __init__(self, window: float):
+        self.window = window
+        # (timestamp, latency seconds, succeeded)
+        self.samples: Deque[Tuple[float, float, bool]] = deque()
+        self.requests = 0
+        self.errors = 0
+
+    def record(self, latency: float, ok: bool) -> None:
+        """Add one upstream call outcome"""
+        self.samples.append((time.time(), latency, ok))
+        self.requests += 1
+        if not ok:
+            self.errors += 1
+
+    def prune(self) -> None:
+        """Forget samples older than the window so a recovered model gets traffic again"""
+        cutoff = time.time() - self.window
+        while self.samples and self.samples[0][0] < cutoff:
+            self.samples.popleft()
+
+    def percentile(self, fraction: float) -> float:
+        """Latency percentile over the window, 0 when empty"""
+        self.prune()
+        if not self.samples:
+            return 0.0
+        latencies = sorted(sample[1] for sample in self.samples)
+        index = min(len(latencies) - 1, math.ceil(fraction * len(latencies)) - 1)
+        return latencies[max(index, 0)]
+
+    def error_rate(self) -> float:
+        """Share of failed calls over the window"""
+        self.prune()
+        if not self.samples:
+            return 0.0
+        return sum(1 for sample in self.samples if not sample[2]) / len(self.samples)
+
+    def as_dict(self) -> Dict:
+        """Metrics snapshot"""
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "window_samples": len(self.samples),
+            "p50_latency": self.percentile(0.5),
+            "p95_latency": self.percentile(0.95),
+            "error_rate": self.error_rate(),
+        }
+
+
+class ModelRouter:
+    """Routes requests across model tiers ordered from primary to fastest"""
+
+    def __init__(
+        self,
+        models: List[str],
+        p95_threshold: float,
+        error_rate_threshold: float,
+        window: float,
+        min_samples: int,
+        short_scenario_chars: int,
+    ):
+        self.models = models
+        self.window = window
+        self.p95_threshold = p95_threshold
+        self.error_rate_threshold = error_rate_threshold
+        self.min_samples = min_samples
+        self.short_scenario_chars = short_scenario_chars
+        self.stats: Dict[str, ModelStats] = {model: ModelStats(window) for model in models}
+
+    def is_degraded(self, model: str) -> bool:
+        """True when the model's recent p95 or error rate is over threshold"""
+        stats = self.stats[model]
+        stats.prune()
+        if len(stats.samples) < self.min_samples:
+            return False
+        return (
+            stats.percentile(0.95) > self.p95_threshold
+            or stats.error_rate() > self.error_rate_threshold
+        )
+
+    def circuit_open(self) -> bool:
+        """True when every tier is failing, not merely slow"""
+        for model in self.models:
+            stats = self.stats[model]
+            stats.prune()
+            if len(stats.samples) < self.min_samples or stats.error_rate() <= self.error_rate_threshold:
+                return False
+        return True
+
+    def choose(self, scenario_length: int, tone: str) -> str:
+        """Pick the model tier for a request"""
+
+        # Short, playful myths do not need the primary model
+        start = 0
+        if len(self.models) > 1 and tone == "playful" and scenario_length <= self.short_scenario_chars:
+            start = 1
+
+        for model in self.models[start:]:
+            if not self.is_degraded(model):
+                return model
+
+        # Everything is slow: the fastest tier is the best bet
+        return self.models[-1]
+
+    def record(self, model: str, latency: float, ok: bool) -> None:
+        """Record an upstream call outcome for a model"""
+        stats = self.stats.get(model)
+        if stats is None:
+            stats = self.stats[model] = ModelStats(self.window)
+        stats.record(latency, ok)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Per-model metrics"""
+        return {
+            model: dict(stats.as_dict(), degraded=self.is_degraded(model))
+            for model, stats in self.stats.items()
+        }
+
+
+# Global router; the primary model always comes first
+model_router = ModelRouter(
+    models=[settings.OPENAI_MODEL] + [
+        model for model in settings.OPENAI_FALLBACK_MODELS if model != settings.OPENAI_MODEL
+    ],
+    p95_threshold=settings.ROUTING_P95_THRESHOLD,
+    error_rate_threshold=settings.ROUTING_ERROR_RATE_THRESHOLD,
+    window=settings.ROUTING_WINDOW,
+    min_samples=settings.ROUTING_MIN_SAMPLES,
+    short_scenario_chars=settings.ROUTING_SHORT_SCENARIO_CHARS,
+)
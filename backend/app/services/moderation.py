@@ -0,0 +1,232 @@
+"""
+Content moderation helpers.
+Provides a compiled local pre-filter and a verdict cache so repeated or
+obviously unsafe scenarios never reach the upstream moderation API, and a
+batcher that folds concurrent checks into one multi-input request.
+"""
+
+import asyncio
+import hashlib
+import re
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Pattern, Sequence, Set, Tuple
+
+from app.core.config import settings
+
+
+def normalized_digest(normalized: str) -> str:
+    """SHA-256 hex digest of already-normalized content"""
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def content_digest(text: str) -> str:
+    """Stable digest of normalized content, used as a cache key"""
+    return normalized_digest(" ".join(text.lower().split()))
+
+
+def compile_lexicon(terms: Iterable[str]) -> Optional[Pattern]:
+    """Compile blocked terms into a single word-boundary regex"""
+
+    alternatives = [
+        r"\s+".join(re.escape(part) for part in term.split())
+        for term in terms
+        if term.strip()
+    ]
+    if not alternatives:
+        return None
+
+    # Longest first so multi-word terms win over their prefixes
+    alternatives.sort(key=len, reverse=True)
+    return re.compile(r"\b(?:" + "|".join(alternatives) + r")\b", re.IGNORECASE)
+
+
+class ModerationStats:
+    """Counters for moderation calls made and avoided by each layer"""
+
+    __slots__ = ("local_rejections", "cache_hits", "upstream_calls", "batched_calls", "batched_inputs")
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        """Zero all counters"""
+        self.local_rejections = 0
+        self.cache_hits = 0
+        self.upstream_calls = 0
+        self.batched_calls = 0
+        self.batched_inputs = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        """Return counters as a plain dict"""
+        return {
+            "local_rejections": self.local_rejections,
+            "cache_hits": self.cache_hits,
+            "upstream_calls": self.upstream_calls,
+            "batched_calls": self.batched_calls,
+            "batched_inputs": self.batched_inputs,
+            "upstream_calls_avoided": (
+                self.local_rejections + self.cache_hits + self.batched_inputs - self.batched_calls
+            ),
+        }
+
+
+class LocalContentFilter:
+    """Instant word-boundary classifier for obvious violations"""
+
+    def __init__(self, terms: Iterable[str]):
+        terms = list(terms)
+        self.pattern = compile_lexicon(terms)
+
+        # Token form of the lexicon for callers that already tokenized
+        self.words = set()
+        self.phrases = []
+        for term in terms:
+            parts = re.findall(r"\w+", term.lower())
+            if len(parts) == 1:
+                self.words.add(parts[0])
+            elif parts:
+                self.phrases.append(" " + " ".join(parts) + " ")
+
+    def is_violation(self, text: str) -> bool:
+        """Return True if the text contains a blocked term"""
+        if self.pattern is None:
+            return False
+        return self.pattern.search(text) is not None
+
+    def is_violation_tokens(self, tokens: Sequence[str]) -> bool:
+        """Return True if lowercase word tokens contain a blocked term"""
+        if not self.words.isdisjoint(tokens):
+            return True
+        if self.phrases:
+            joined = " " + " ".join(tokens) + " "
+            return any(phrase in joined for phrase in self.phrases)
+        return False
+
+
+class ModerationCache:
+    """LRU cache of moderation verdicts keyed by content digest"""
+
+    def __init__(self, max_size: int, ttl: int):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, digest: str) -> Optional[bool]:
+        """Return the cached verdict, or None if missing or expired"""
+        entry = self._entries.get(digest)
+        if entry is None:
+            return None
+
+        allowed, stored_at = entry
+        if time.time() - stored_at >= self.ttl:
+            del self._entries[digest]
+            return None
+
+        self._entries.move_to_end(digest)
+        return allowed
+
+    def set(self, digest: str, allowed: bool) -> None:
+        """Store a verdict, evicting the least recently used entry if full"""
+        self._entries[digest] = (allowed, time.time())
+        self._entries.move_to_end(digest)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop all cached verdicts"""
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class ModerationBatcher:
+    """Coalesces concurrent moderation checks into one multi-input upstream call
+
+    A check arriving while no call is in flight goes out on its own straight
+    away, so light traffic pays no extra latency. Checks arriving while a call
+    is in flight wait up to `window` seconds for company, or until `max_batch`
+    of them are queued, and share one request.
+    """
+
+    def __init__(self, send: Callable[[List[str]], List[bool]], window: float, max_batch: int):
+        self.send = send  # blocking: inputs -> flagged verdicts, in order
+        self.window = window
+        self.max_batch = max(1, max_batch)
+        self.in_flight = 0
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._batches: Set[asyncio.Task] = set()
+
+    async def is_flagged(self, text: str) -> bool:
+        """Verdict for one input; raises if the upstream call fails"""
+        if self.max_batch == 1 or (self.in_flight == 0 and not self._pending):
+            return (await self._call([text]))[0]
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.create_task(self._deliver(batch))
+            self._batches.add(task)
+            task.add_done_callback(self._batches.discard)
+
+    async def _deliver(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        try:
+            verdicts = await self._call([text for text, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), flagged in zip(batch, verdicts):
+            if not future.done():  # the caller may have been cancelled
+                future.set_result(flagged)
+
+    async def _call(self, texts: List[str]) -> List[bool]:
+        self.in_flight += 1
+        moderation_stats.upstream_calls += 1
+        if len(texts) > 1:
+            moderation_stats.batched_calls += 1
+            moderation_stats.batched_inputs += len(texts)
+        try:
+            verdicts = await asyncio.to_thread(self.send, texts)
+        finally:
+            self.in_flight -= 1
+        if len(verdicts) != len(texts):
+            raise ValueError(f"Moderation returned {len(verdicts)} results for {len(texts)} inputs")
+        return verdicts
+
+
+# Global moderation state
+moderation_stats = ModerationStats()
+local_content_filter = LocalContentFilter(settings.MODERATION_BLOCKLIST)
+moderation_cache = ModerationCache(
+    max_size=settings.MODERATION_CACHE_SIZE,
+    ttl=settings.MODERATION_CACHE_TTL,
+)
+
+
+def prefilter(text: str, tokens: Optional[Sequence[str]] = None) -> bool:
+    """Run the local classifier; return False (and count it) on a violation"""
+    if tokens is not None:
+        violation = local_content_filter.is_violation_tokens(tokens)
+    else:
+        violation = local_content_filter.is_violation(text)
+
+    if violation:
+        moderation_stats.local_rejections += 1
+        return False
+    return True
@@ -0,0 +1,111 @@
+"""
+Ranked motif retrieval.
+Builds a BM25 inverted index over the seed motifs once and returns only
+the motifs that best match a scenario, so prompts stay small as the
+corpus grows.
+"""
+
+import heapq
+import math
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, Iterable, List, Tuple
+
+from app.services.myth_utils import STOP_WORDS, WORD_PATTERN, load_seed_myths
+
+# Standard BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def stem(term: str) -> str:
+    """Fold simple plurals so "journeys" matches "journey" """
+    if len(term) > 3 and term.endswith("s") and not term.endswith("ss"):
+        return term[:-1]
+    return term
+
+
+def index_terms(tokens: Iterable[str]) -> List[str]:
+    """Lowercase tokens reduced to the terms the index stores"""
+    return [stem(token) for token in tokens if len(token) > 2 and token not in STOP_WORDS]
+
+
+class CultureIndex:
+    """BM25 index over the motifs of one culture"""
+
+    __slots__ = ("motifs", "postings")
+
+    def __init__(self, motifs: List[str], documents: List[List[str]]):
+        self.motifs = motifs
+        # term -> [(motif position, precomputed BM25 weight)]
+        self.postings: Dict[str, List[Tuple[int, float]]] = {}
+
+        count = len(documents)
+        average_length = sum(len(terms) for terms in documents) / count if count else 0.0
+        frequencies = [Counter(terms) for terms in documents]
+
+        document_frequency: Counter = Counter()
+        for counts in frequencies:
+            document_frequency.update(counts.keys())
+
+        for position, (terms, counts) in enumerate(zip(documents, frequencies)):
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * len(terms) / average_length) if average_length else BM25_K1
+            for term, tf in counts.items():
+                df = document_frequency[term]
+                idf = math.log(1 + (count - df + 0.5) / (df + 0.5))
+                weight = idf * tf * (BM25_K1 + 1) / (tf + norm)
+                self.postings.setdefault(term, []).append((position, weight))
+
+    def search(self, terms: Iterable[str], k: int) -> List[str]:
+        """Top-k motifs for the query terms, in corpus order when nothing matches"""
+        scores: Dict[int, float] = {}
+        for term in set(terms):
+            for position, weight in self.postings.get(term, ()):
+                scores[position] = scores.get(position, 0.0) + weight
+
+        if not scores:
+            return self.motifs[:k]
+
+        ranked = heapq.nlargest(k, scores.items(), key=lambda item: (item[1], -item[0]))
+        chosen = [self.motifs[position] for position, _ in ranked]
+
+        # Pad with unmatched motifs so short queries still get k motifs
+        for position, motif in enumerate(self.motifs):
+            if len(chosen) >= k:
+                break
+            if position not in scores:
+                chosen.append(motif)
+        return chosen
+
+
+class MotifIndex:
+    """Per-culture BM25 indexes over motif text and description"""
+
+    def __init__(self, seed_myths: List[Dict]):
+        grouped: Dict[str, Tuple[List[str], List[List[str]]]] = {}
+        for myth in seed_myths:
+            motifs, documents = grouped.setdefault(myth["culture"].lower(), ([], []))
+            text = f"{myth['motif']} {myth.get('description', '')}".lower()
+            motifs.append(myth["motif"])
+            documents.append(index_terms(WORD_PATTERN.findall(text)))
+
+        self.cultures = {
+            culture: CultureIndex(motifs, documents)
+            for culture, (motifs, documents) in grouped.items()
+        }
+
+    def __len__(self) -> int:
+        return sum(len(index.motifs) for index in self.cultures.values())
+
+    def search(self, culture: str, tokens: Iterable[str], k: int) -> List[str]:
+        """Top-k motifs of a culture for scenario tokens; empty for unknown cultures"""
+        index = self.cultures.get(culture.lower())
+        if index is None:
+            return []
+        return index.search(index_terms(tokens), k)
+
+
+@lru_cache(maxsize=1)
+def get_motif_index() -> MotifIndex:
+    """Build the index from the seed data on first use"""
+    return MotifIndex(load_seed_myths())
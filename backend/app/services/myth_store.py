@@ -0,0 +1,121 @@
+"""
+Content-addressed myth storage.
+Every generated myth is stored under a hash of its serialized body so it
+can be served by GET with strong validators and cached by nginx or a CDN.
+"""
+
+import gzip
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+MYTH_ID_LENGTH = 32
+
+
+def myth_id(body: bytes) -> str:
+    """Stable id for a serialized myth"""
+    return hashlib.sha256(body).hexdigest()[:MYTH_ID_LENGTH]
+
+
+def is_myth_id(value: str) -> bool:
+    """True when value has the shape of a myth id"""
+    return len(value) == MYTH_ID_LENGTH and all(c in "0123456789abcdef" for c in value)
+
+
+class StoredMyth:
+    """Serialized myth plus its validators"""
+
+    __slots__ = ("id", "body", "created_at", "_gzipped")
+
+    def __init__(self, id: str, body: bytes, created_at: float):
+        self.id = id
+        self.body = body
+        self.created_at = created_at
+        self._gzipped: Optional[bytes] = None
+
+    @property
+    def gzipped(self) -> bytes:
+        """Body compressed once on first use; content never changes"""
+        if self._gzipped is None:
+            self._gzipped = gzip.compress(self.body, compresslevel=9, mtime=0)
+        return self._gzipped
+
+
+class MythStore:
+    """Bounded local LRU, backed by Redis when configured so every replica can serve a link"""
+
+    KEY_PREFIX = "mythweaver:myth:"
+
+    def __init__(self, max_size: int, ttl: int, redis_url: str = ""):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._local: "OrderedDict[str, StoredMyth]" = OrderedDict()
+        self.redis = None
+        if redis_url:
+            try:
+                import redis.asyncio as redis_asyncio
+                self.redis = redis_asyncio.from_url(redis_url)
+            except ImportError:
+                logger.warning("redis package not installed, keeping myths in memory")
+
+    def _remember(self, myth: StoredMyth) -> StoredMyth:
+        self._local[myth.id] = myth
+        self._local.move_to_end(myth.id)
+        while len(self._local) > self.max_size:
+            self._local.popitem(last=False)
+        return myth
+
+    async def save(self, body: bytes) -> str:
+        """Store a serialized myth and return its id; cheap when already known"""
+        key = myth_id(body)
+        if key in self._local:
+            self._local.move_to_end(key)
+            return key
+
+        myth = self._remember(StoredMyth(key, body, time.time()))
+        if self.redis is not None:
+            try:
+                async with self.redis.pipeline(transaction=True) as pipe:
+                    # NX keeps the original Last-Modified of an existing myth
+                    pipe.hsetnx(self.KEY_PREFIX + key, "created_at", repr(myth.created_at))
+                    pipe.hsetnx(self.KEY_PREFIX + key, "body", body)
+                    pipe.expire(self.KEY_PREFIX + key, self.ttl)
+                    await pipe.execute()
+            except Exception as e:
+                logger.warning("Failed to store myth %s in Redis: %s", key, e)
+        return key
+
+    async def load(self, key: str) -> Optional[StoredMyth]:
+        """Find a myth locally, then in Redis"""
+        myth = self._local.get(key)
+        if myth is not None:
+            self._local.move_to_end(key)
+            return myth
+        if self.redis is None:
+            return None
+
+        try:
+            fields = await self.redis.hgetall(self.KEY_PREFIX + key)
+        except Exception as e:
+            logger.warning("Failed to load myth %s from Redis: %s", key, e)
+            return None
+        if not fields:
+            return None
+        return self._remember(StoredMyth(key, fields[b"body"], float(fields[b"created_at"])))
+
+    def __len__(self) -> int:
+        return len(self._local)
+
+
+# Global store
+myth_store = MythStore(
+    max_size=settings.MYTH_STORE_SIZE,
+    ttl=settings.MYTH_TTL,
+    redis_url=settings.REDIS_URL,
+)
@@ -6,8 +6,12 @@ Handles culture detection and motif loading.
 import json
 import logging
 import re
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, Iterable, List, Any, Optional, Tuple, Union
+
+from app.core.config import settings
+from app.services.moderation import normalized_digest, prefilter
 
 logger = logging.getLogger(__name__)
 
@@ -52,6 +56,98 @@ CULTURE_KEYWORDS = {
 }
 
 
+# Reverse index: keyword -> cultures (duplicate keywords count twice, as before)
+KEYWORD_CULTURES: Dict[str, List[str]] = {}
+for _culture, _keywords in CULTURE_KEYWORDS.items():
+    for _keyword in _keywords:
+        KEYWORD_CULTURES.setdefault(_keyword, []).append(_culture)
+
+STOP_WORDS = frozenset({
+    "the", "a", "an", "and", "or", "but", "in", "on", "at", "to", "for",
+    "of", "with", "by", "from", "up", "about", "into", "through", "during",
+    "before", "after", "above", "below", "up", "down", "out", "off", "over",
+    "under", "again", "further", "then", "once", "is", "are", "was", "were",
+    "be", "been", "being", "have", "has", "had", "do", "does", "did", "will",
+    "would", "could", "should", "may", "might", "must", "can", "this", "that",
+    "these", "those", "i", "me", "my", "myself", "we", "our", "ours", "ourselves",
+    "you", "your", "yours", "yourself", "yourselves", "he", "him", "his", "himself",
+    "she", "her", "hers", "herself", "it", "its", "itself", "they", "them", "their",
+    "theirs", "themselves", "what", "which", "who", "whom", "whose", "this", "that",
+    "these", "those", "am", "is", "are", "was", "were", "be", "been", "being",
+    "have", "has", "had", "do", "does", "did", "will", "would", "should", "could",
+    "may", "might", "must", "shall"
+})
+
+# Precompiled patterns
+HTML_TAG_PATTERN = re.compile(r'<[^>]*>')
+UNSAFE_CHARS_PATTERN = re.compile(r'[^\w\s\-.,!?;:()\'""]')
+WORD_PATTERN = re.compile(r'\b\w+\b')
+
+# Sanitized text only keeps word characters, whitespace and this punctuation,
+# so mapping the punctuation to spaces and splitting yields the \w+ tokens
+TOKEN_SEPARATORS = str.maketrans({char: " " for char in "-.,!?;:()'\""})
+
+
+@dataclass(frozen=True)
+class ScenarioAnalysis:
+    """Result of the single analysis pass over a scenario"""
+    
+    text: str
+    normalized: str
+    tokens: Tuple[str, ...]
+    culture_scores: Dict[str, int]
+    digest: str
+    
+    @property
+    def detected_culture(self) -> str:
+        """Culture with the highest keyword score, or Greek by default"""
+        if self.culture_scores:
+            return max(self.culture_scores, key=self.culture_scores.get)
+        return "greek"
+    
+    @property
+    def keywords(self) -> List[str]:
+        """Tokens with stop words and very short words removed"""
+        return [word for word in self.tokens if word not in STOP_WORDS and len(word) > 2]
+    
+    def resolve_culture(self, culture: str) -> str:
+        """Resolve "auto" to the detected culture"""
+        return self.detected_culture if culture == "auto" else culture
+
+
+def score_cultures(tokens: Tuple[str, ...]) -> Dict[str, int]:
+    """Score each culture by the distinct keywords present in the tokens"""
+    
+    scores: Dict[str, int] = {}
+    for token in set(tokens):
+        cultures = KEYWORD_CULTURES.get(token)
+        if cultures is None and token.endswith("s"):
+            cultures = KEYWORD_CULTURES.get(token[:-1])
+        if cultures is None:
+            continue
+        for culture in cultures:
+            scores[culture] = scores.get(culture, 0) + 1
+    
+    # Keep CULTURE_KEYWORDS order so ties resolve as they always have
+    return {culture: scores[culture] for culture in CULTURE_KEYWORDS if culture in scores}
+
+
+def analyze_scenario(scenario: str) -> ScenarioAnalysis:
+    """Sanitize, normalize, tokenize, score and digest a scenario once"""
+    
+    text = sanitize_text(scenario)
+    normalized = " ".join(text.lower().split())
+    tokens = tuple(normalized.translate(TOKEN_SEPARATORS).split())
+    
+    return ScenarioAnalysis(
+        text=text,
+        normalized=normalized,
+        tokens=tokens,
+        culture_scores=score_cultures(tokens),
+        digest=normalized_digest(normalized),
+    )
+
+
 def load_seed_myths() -> List[Dict[str, Any]]:
     """Load myth motifs from seed data"""
     
@@ -104,21 +200,14 @@ def load_seed_myths() -> List[Dict[str, Any]]:
     ]
 
 
-def detect_culture(scenario: str) -> str:
+def detect_culture(scenario: Union[str, ScenarioAnalysis]) -> str:
     """Detect culture from scenario keywords"""
     
-    scenario_lower = scenario.lower()
-    culture_scores = {}
+    if isinstance(scenario, ScenarioAnalysis):
+        return scenario.detected_culture
     
-    # Score each culture based on keyword matches
-    for culture, keywords in CULTURE_KEYWORDS.items():
-        score = 0
-        for keyword in keywords:
-            if keyword in scenario_lower:
-                score += 1
-        
-        if score > 0:
-            culture_scores[culture] = score
+    tokens = tuple(WORD_PATTERN.findall(scenario.lower()))
+    culture_scores = score_cultures(tokens)
     
     # Return culture with highest score, or default to Greek
     if culture_scores:
@@ -127,16 +216,13 @@ def detect_culture(scenario: str) -> str:
     return "greek"  # Default fallback
 
 
-def get_culture_motifs(culture: str) -> str:
-    """Get motifs for a specific culture"""
+def get_culture_motifs(culture: str, tokens: Iterable[str] = (), k: Optional[int] = None) -> str:
+    """Get the motifs of a culture that best match the scenario tokens"""
     
-    seed_myths = load_seed_myths()
+    from app.services.motif_index import get_motif_index
     
-    # Find motifs for the specified culture
-    culture_motifs = [
-        myth["motif"] for myth in seed_myths 
-        if myth["culture"].lower() == culture.lower()
-    ]
+    # Ranked against the index built once from the seed data
+    culture_motifs = get_motif_index().search(culture, tokens, k or settings.MOTIF_TOP_K)
     
     if culture_motifs:
         return "; ".join(culture_motifs)
@@ -149,54 +235,35 @@ def sanitize_text(text: str) -> str:
     """Sanitize input text for safety"""
     
     # Remove potential harmful content
-    text = re.sub(r'<[^>]*>', '', text)  # Remove HTML tags
-    text = re.sub(r'[^\w\s\-.,!?;:()\'""]', '', text)  # Allow only safe characters
+    text = HTML_TAG_PATTERN.sub('', text)  # Remove HTML tags
+    text = UNSAFE_CHARS_PATTERN.sub('', text)  # Allow only safe characters
     text = text.strip()
     
     return text
 
 
-def validate_scenario_content(scenario: str) -> bool:
+def validate_scenario_content(scenario: Union[str, ScenarioAnalysis]) -> bool:
     """Basic content validation for scenarios"""
     
+    if isinstance(scenario, ScenarioAnalysis):
+        text, tokens = scenario.normalized, scenario.tokens
+    else:
+        text, tokens = scenario.strip(), None
+    
     # Check for minimum content
-    if len(scenario.strip()) < 10:
+    if len(text) < 10:
         return False
     
-    # Basic bad words filter (extend as needed)
-    bad_words = [
-        "hate", "violence", "illegal", "harmful", "explicit"
-    ]
-    
-    scenario_lower = scenario.lower()
-    for word in bad_words:
-        if word in scenario_lower:
-            return False
-    
-    return True
+    # Word-boundary match against the configured lexicon, so "hate"
+    # no longer blocks "whatever"
+    return prefilter(text, tokens)
 
 
 def extract_keywords(text: str) -> List[str]:
     """Extract relevant keywords from text for culture detection"""
     
     # Simple keyword extraction
-    words = re.findall(r'\b\w+\b', text.lower())
+    words = WORD_PATTERN.findall(text.lower())
     
     # Filter out common words
-    stop_words = {
-        "the", "a", "an", "and", "or", "but", "in", "on", "at", "to", "for",
-        "of", "with", "by", "from", "up", "about", "into", "through", "during",
-        "before", "after", "above", "below", "up", "down", "out", "off", "over",
-        "under", "again", "further", "then", "once", "is", "are", "was", "were",
-        "be", "been", "being", "have", "has", "had", "do", "does", "did", "will",
-        "would", "could", "should", "may", "might", "must", "can", "this", "that",
-        "these", "those", "i", "me", "my", "myself", "we", "our", "ours", "ourselves",
-        "you", "your", "yours", "yourself", "yourselves", "he", "him", "his", "himself",
-        "she", "her", "hers", "herself", "it", "its", "itself", "they", "them", "their",
-        "theirs", "themselves", "what", "which", "who", "whom", "whose", "this", "that",
-        "these", "those", "am", "is", "are", "was", "were", "be", "been", "being",
-        "have", "has", "had", "do", "does", "did", "will", "would", "should", "could",
-        "may", "might", "must", "shall"
-    }
-    
-    return [word for word in words if word not in stop_words and len(word) > 2]
+    return [word for word in words if word not in STOP_WORDS and len(word) > 2]
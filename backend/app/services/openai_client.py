@@ -3,43 +3,115 @@ OpenAI client service for myth generation.
 Handles prompt assembly and API communication.
 """
 
+import asyncio
 import json
 import logging
 import time
-from typing import Dict, Any, Optional
-
-import openai
-from openai import OpenAI
+from typing import Any, Awaitable, Dict, List, Optional, Tuple
 
 from app.core.config import settings
-from app.models.request import MythGenerationRequest, MythGenerationResponse, MythMetadata
-from app.services.myth_utils import get_culture_motifs, detect_culture
+from app.models.request import MythGenerationRequest, MythGenerationResponse
+from app.services.model_router import model_router
+from app.services.motif_index import get_motif_index
+from app.services.procedural_myth import generate_procedural_myth
+from app.services.token_budget import TokenUsage
+from app.services.upstream_limiter import UpstreamThrottled, upstream_limiter
+from app.services.myth_utils import ScenarioAnalysis, analyze_scenario, get_culture_motifs
+from app.services.moderation import (
+    ModerationBatcher,
+    content_digest,
+    moderation_cache,
+    moderation_stats,
+    prefilter,
+)
 
 logger = logging.getLogger(__name__)
 
+STORYTELLER_PREAMBLE = "You are a master storyteller, cultural historian, and respectful adapter of public-domain myths. Using only public domain sources and folklore motifs (Project Gutenberg, Sacred-Texts collections, or in-repo seed motifs), adapt the user's modern scenario into an ancient-style myth consistent with the requested culture."
+JSON_SYSTEM_PROMPT = "You are an expert storyteller who adapts modern scenarios into ancient myths. Always respond with valid JSON only."
+
+
+def check_outline(plan: Any) -> None:
+    """Reject an outline that cannot be fanned out, before any further calls are made"""
+    choices = plan.get("choices") if isinstance(plan, dict) else None
+    if not isinstance(choices, list) or len(choices) != 3:
+        raise ValueError("outline does not name exactly 3 endings")
+    if not all(isinstance(choice, dict) and "id" in choice and "label" in choice for choice in choices):
+        raise ValueError("outline ending without an id and label")
+    if "title" not in plan or not isinstance(plan.get("meta"), dict) or "source_motif" not in plan["meta"]:
+        raise ValueError("outline without a title or source motif")
+
+
+async def gather_or_cancel(*aws: Awaitable) -> List[Any]:
+    """Like asyncio.gather, but a failure cancels and awaits the other calls
+
+    Nothing is left running to release limiter slots or add token usage
+    after the caller has already charged the budget.
+    """
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
 
 class OpenAIService:
     """Service for interacting with OpenAI API"""
     
     def __init__(self):
-        self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
+        # Built on first use so importing this module stays cheap
+        self._client = None
         self.model = settings.OPENAI_MODEL
         self.max_tokens = settings.OPENAI_MAX_TOKENS
         self.temperature = settings.OPENAI_TEMPERATURE
+        self.moderation_batcher = ModerationBatcher(
+            self._moderation_flags,
+            window=settings.MODERATION_BATCH_WINDOW,
+            max_batch=settings.MODERATION_BATCH_SIZE,
+        )
     
-    def _build_prompt(self, request: MythGenerationRequest) -> str:
-        """Build the OpenAI prompt from the request"""
+    @property
+    def client(self):
+        """OpenAI client, importing the SDK on first access"""
+        if self._client is None:
+            from openai import OpenAI
+            # Retries and backoff are owned by the shared upstream limiter
+            self._client = OpenAI(api_key=settings.OPENAI_API_KEY, max_retries=0)
+        return self._client
+    
+    def warm_up(self) -> None:
+        """Import the SDK, build the client and the motif index ahead of the first request"""
+        self.client
+        get_motif_index()
+    
+    def _prompt_context(self, request: MythGenerationRequest, analysis: ScenarioAnalysis) -> Tuple[str, str]:
+        """Resolve the culture and render the shared scenario block of every prompt"""
         
         # Determine culture
-        culture = request.culture
-        if culture == "auto":
-            culture = detect_culture(request.scenario)
+        culture = analysis.resolve_culture(request.culture)
+        
+        # Get the motifs that best match the scenario
+        motifs = get_culture_motifs(culture, analysis.tokens)
+        
+        context = f"""Cultural Context: {culture.title()}
+Relevant Motifs: {motifs}
+
+Modern Scenario: {request.scenario}
+
+Tone: {request.tone}"""
+        
+        return culture, context
+    
+    def _build_prompt(self, request: MythGenerationRequest, analysis: ScenarioAnalysis) -> str:
+        """Build the OpenAI prompt from the request"""
         
-        # Get relevant motifs
-        motifs = get_culture_motifs(culture)
+        culture, context = self._prompt_context(request, analysis)
         
         # Build the prompt
-        prompt = f"""You are a master storyteller, cultural historian, and respectful adapter of public-domain myths. Using only public domain sources and folklore motifs (Project Gutenberg, Sacred-Texts collections, or in-repo seed motifs), adapt the user's modern scenario into an ancient-style myth consistent with the requested culture.
+        prompt = f"""{STORYTELLER_PREAMBLE}
 
 Guidelines:
 - Preserve essential mythic motifs and symbolic language from the chosen culture.
@@ -48,12 +120,7 @@ Guidelines:
 - Provide exactly 3 alternative interactive endings, each reflecting a different moral or interpretation.
 - Output must be valid JSON with no extra commentary.
 
-Cultural Context: {culture.title()}
-Relevant Motifs: {motifs}
-
-Modern Scenario: {request.scenario}
-
-Tone: {request.tone}
+{context}
 
 Return JSON:
 {{
@@ -69,48 +136,161 @@ Return JSON:
         
         return prompt
     
-    async def moderate_content(self, text: str) -> bool:
+    def _build_outline_prompt(self, culture: str, context: str) -> str:
+        """Prompt for the short first call of the parallel strategy"""
+        
+        return f"""{STORYTELLER_PREAMBLE}
+
+Plan the myth before it is written:
+- Give it a short evocative title.
+- Outline the plot in 5-7 short beats that fit the modern scenario and keep mythic archetypes.
+- Name exactly 3 alternative endings, each reflecting a different moral or interpretation.
+- Output must be valid JSON with no extra commentary.
+
+{context}
+
+Return JSON:
+{{
+"title": "<short evocative title>",
+"outline": ["<beat>", "..."],
+"choices": [
+{{"id":"c1","label":"<label>"}},
+{{"id":"c2","label":"<label>"}},
+{{"id":"c3","label":"<label>"}}
+],
+"meta": {{"culture":"{culture}","source_motif":"<motif reference>"}}
+}}"""
+    
+    def _build_story_prompt(self, context: str, plan: Dict[str, Any]) -> str:
+        """Prompt for the full story, written from the shared outline"""
+        
+        beats = "\n".join(f"- {beat}" for beat in plan["outline"])
+        return f"""{STORYTELLER_PREAMBLE}
+
+Write the full myth "{plan["title"]}" following this outline, in poetic yet clear language. Stop before the ending; the reader chooses how it ends.
+
+{context}
+
+Outline:
+{beats}
+
+Return JSON:
+{{"adapted_story": "<full story text, ~350-900 words>"}}"""
+    
+    def _build_outcome_prompt(self, context: str, plan: Dict[str, Any], choice: Dict[str, str]) -> str:
+        """Prompt for one ending, written from the shared outline"""
+        
+        beats = "\n".join(f"- {beat}" for beat in plan["outline"])
+        return f"""{STORYTELLER_PREAMBLE}
+
+Write the ending "{choice["label"]}" of the myth "{plan["title"]}" in 2-4 sentences, reflecting its own moral.
+
+{context}
+
+Outline:
+{beats}
+
+Return JSON:
+{{"outcome": "<text>"}}"""
+    
+    def _moderation_flags(self, texts: List[str]) -> List[bool]:
+        """One moderation request for one or more inputs"""
+        response = self.client.moderations.create(input=texts[0] if len(texts) == 1 else texts)
+        return [result.flagged for result in response.results]
+    
+    async def moderate_content(self, text: str, digest: Optional[str] = None) -> bool:
         """Check content using OpenAI moderation API"""
         if not settings.USE_OPENAI_MODERATION:
             return True
         
+        # Obvious violations never reach the network
+        if not prefilter(text):
+            return False
+        
+        digest = digest or content_digest(text)
+        cached_verdict = moderation_cache.get(digest)
+        if cached_verdict is not None:
+            moderation_stats.cache_hits += 1
+            return cached_verdict
+        
         try:
-            response = self.client.moderations.create(input=text)
-            return not response.results[0].flagged
+            allowed = not await self.moderation_batcher.is_flagged(text)
+            moderation_cache.set(digest, allowed)
+            return allowed
         except Exception as e:
             logger.error(f"Moderation API error: {e}")
             return True  # Allow content if moderation fails
     
-    async def generate_myth(self, request: MythGenerationRequest) -> MythGenerationResponse:
+    async def generate_myth(
+        self,
+        request: MythGenerationRequest,
+        analysis: Optional[ScenarioAnalysis] = None,
+        usage: Optional[TokenUsage] = None,
+    ) -> MythGenerationResponse:
         """Generate a myth from the request"""
         
         start_time = time.time()
         
+        if analysis is None:
+            analysis = analyze_scenario(request.scenario)
+        
         # Content moderation
-        if not await self.moderate_content(request.scenario):
+        if not await self.moderate_content(analysis.text, analysis.digest):
             raise ValueError("Content flagged by moderation system")
         
+        # Degraded mode: answer locally instead of waiting on an upstream that cannot answer
+        reason = self._upstream_unavailable(start_time + settings.UPSTREAM_DEADLINE)
+        if reason is not None:
+            logger.warning("Serving a procedural myth: %s", reason)
+            return generate_procedural_myth(request, analysis)
+        
+        # Pick a model tier for this request
+        model = model_router.choose(len(analysis.text), request.tone)
+        
+        try:
+            if settings.GENERATION_STRATEGY == "parallel":
+                return await self._generate_parallel(request, analysis, model, usage, start_time)
+            return await self._generate_single(request, analysis, model, usage, start_time)
+        except UpstreamThrottled as e:
+            if not settings.DEGRADED_MODE:
+                raise
+            logger.warning("No upstream answer before the deadline, serving a procedural myth: %s", e)
+            return generate_procedural_myth(request, analysis)
+    
+    def _upstream_unavailable(self, deadline: float) -> Optional[str]:
+        """Why the upstream cannot serve a request before its deadline, if it cannot"""
+        if not settings.DEGRADED_MODE:
+            return None
+        if upstream_limiter.paused_until >= deadline:
+            return "provider asked to back off past the deadline"
+        if model_router.circuit_open():
+            return "every model tier is failing"
+        return None
+    
+    async def _generate_single(
+        self,
+        request: MythGenerationRequest,
+        analysis: ScenarioAnalysis,
+        model: str,
+        usage: Optional[TokenUsage],
+        start_time: float,
+    ) -> MythGenerationResponse:
+        """Generate the whole myth in one completion"""
+        
         # Build prompt
-        prompt = self._build_prompt(request)
+        prompt = self._build_prompt(request, analysis)
         
         # Make OpenAI API call
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an expert storyteller who adapts modern scenarios into ancient myths. Always respond with valid JSON only."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                max_tokens=self.max_tokens,
+            response = await self._call_upstream(
+                model,
+                system_prompt=JSON_SYSTEM_PROMPT,
+                prompt=prompt,
                 temperature=self.temperature,
-                response_format={"type": "json_object"}
+                deadline=start_time + settings.UPSTREAM_DEADLINE,
             )
+            if usage is not None:
+                usage.add(getattr(response, "usage", None))
             
             # Parse response
             content = response.choices[0].message.content
@@ -119,7 +299,7 @@ Return JSON:
             # Add metadata
             generation_time = time.time() - start_time
             myth_data["meta"]["generation_time"] = generation_time
-            myth_data["meta"]["ai_model"] = self.model
+            myth_data["meta"]["ai_model"] = model
             
             # Validate and return response
             return MythGenerationResponse(**myth_data)
@@ -127,81 +307,214 @@ Return JSON:
         except json.JSONDecodeError as e:
             logger.error(f"Failed to parse OpenAI response as JSON: {e}")
             # Retry with more explicit instructions
-            return await self._retry_generation(request, prompt)
+            return await self._retry_generation(
+                request, analysis, prompt, model, usage, start_time + settings.UPSTREAM_DEADLINE
+            )
+        
+        except UpstreamThrottled:
+            raise
         
         except Exception as e:
             logger.error(f"OpenAI API error: {e}")
             raise ValueError(f"Failed to generate myth: {str(e)}")
     
-    async def _retry_generation(self, request: MythGenerationRequest, original_prompt: str) -> MythGenerationResponse:
-        """Retry generation with more explicit JSON instructions"""
+    async def _generate_parallel(
+        self,
+        request: MythGenerationRequest,
+        analysis: ScenarioAnalysis,
+        model: str,
+        usage: Optional[TokenUsage],
+        start_time: float,
+    ) -> MythGenerationResponse:
+        """Outline first, then write the story and every ending concurrently"""
         
-        retry_prompt = original_prompt + "\n\nIMPORTANT: Return ONLY valid JSON. No additional text or commentary."
+        culture, context = self._prompt_context(request, analysis)
+        deadline = start_time + settings.UPSTREAM_DEADLINE
         
+        try:
+            plan = await self._complete_json(
+                model, self._build_outline_prompt(culture, context), settings.OUTLINE_MAX_TOKENS, usage, deadline
+            )
+            check_outline(plan)
+            
+            # The story and the endings only share the outline, so they run side by side
+            story, *outcomes = await gather_or_cancel(
+                self._complete_json(model, self._build_story_prompt(context, plan), self.max_tokens, usage, deadline),
+                *(
+                    self._complete_json(
+                        model,
+                        self._build_outcome_prompt(context, plan, choice),
+                        settings.OUTCOME_MAX_TOKENS,
+                        usage,
+                        deadline,
+                    )
+                    for choice in plan["choices"]
+                ),
+            )
+            
+            myth_data = {
+                "title": plan["title"],
+                "adapted_story": story["adapted_story"],
+                "choices": [
+                    {"id": choice["id"], "label": choice["label"], "outcome": outcome["outcome"]}
+                    for choice, outcome in zip(plan["choices"], outcomes)
+                ],
+                "meta": {
+                    "culture": plan["meta"].get("culture", culture),
+                    "source_motif": plan["meta"]["source_motif"],
+                    "generation_time": time.time() - start_time,
+                    "ai_model": model,
+                },
+            }
+            
+            # Validate and return response
+            return MythGenerationResponse(**myth_data)
+        
+        except (ValueError, KeyError, TypeError) as e:
+            # Malformed JSON or a plan without exactly 3 endings
+            logger.warning("Parallel generation returned unusable output, using a single call: %s", e)
+            return await self._generate_single(request, analysis, model, usage, start_time)
+        
+        except UpstreamThrottled:
+            raise
+        
+        except Exception as e:
+            logger.error(f"OpenAI API error: {e}")
+            raise ValueError(f"Failed to generate myth: {str(e)}")
+    
+    async def _complete_json(
+        self,
+        model: str,
+        prompt: str,
+        max_tokens: int,
+        usage: Optional[TokenUsage],
+        deadline: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """Run one completion in a worker thread so several can overlap, and parse it"""
+        
+        response = await self._call_upstream(
+            model,
+            system_prompt=JSON_SYSTEM_PROMPT,
+            prompt=prompt,
+            temperature=self.temperature,
+            max_tokens=max_tokens,
+            deadline=deadline,
+        )
+        
+        # Usage is added on the event loop, never from the worker threads
+        if usage is not None:
+            usage.add(getattr(response, "usage", None))
+        return json.loads(response.choices[0].message.content)
+    
+    async def _call_upstream(
+        self,
+        model: str,
+        system_prompt: str,
+        prompt: str,
+        temperature: float,
+        max_tokens: Optional[int] = None,
+        deadline: Optional[float] = None,
+    ):
+        """Run a completion in a worker thread under the shared adaptive concurrency limit"""
+        
+        # (latency, ok) per attempt, appended by the worker threads
+        attempts: List[Tuple[float, bool]] = []
+        try:
+            return await upstream_limiter.run(
+                lambda: self._create_completion(
+                    model,
+                    system_prompt=system_prompt,
+                    prompt=prompt,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    attempts=attempts,
+                ),
+                deadline,
+            )
+        finally:
+            # The router's sample windows are only touched on the event loop
+            for latency, ok in list(attempts):
+                model_router.record(model, latency, ok)
+    
+    def _create_completion(
+        self,
+        model: str,
+        system_prompt: str,
+        prompt: str,
+        temperature: float,
+        max_tokens: Optional[int] = None,
+        attempts: Optional[List[Tuple[float, bool]]] = None,
+    ):
+        """Call the chat completions API, noting its latency and outcome in `attempts`"""
+        
+        call_start = time.perf_counter()
         try:
             response = self.client.chat.completions.create(
-                model=self.model,
+                model=model,
                 messages=[
                     {
                         "role": "system",
-                        "content": "You must respond with valid JSON only. No other text."
+                        "content": system_prompt
                     },
                     {
                         "role": "user",
-                        "content": retry_prompt
+                        "content": prompt
                     }
                 ],
-                max_tokens=self.max_tokens,
-                temperature=0.5,  # Lower temperature for more consistent output
+                max_tokens=max_tokens or self.max_tokens,
+                temperature=temperature,
                 response_format={"type": "json_object"}
             )
+        except Exception:
+            if attempts is not None:
+                attempts.append((time.perf_counter() - call_start, False))
+            raise
+        
+        if attempts is not None:
+            attempts.append((time.perf_counter() - call_start, True))
+        return response
+    
+    async def _retry_generation(
+        self,
+        request: MythGenerationRequest,
+        analysis: ScenarioAnalysis,
+        original_prompt: str,
+        model: str,
+        usage: Optional[TokenUsage] = None,
+        deadline: Optional[float] = None,
+    ) -> MythGenerationResponse:
+        """Retry generation with more explicit JSON instructions"""
+        
+        # Too close to the deadline for another completion: answer locally now
+        if deadline is not None and time.time() + settings.FALLBACK_MIN_REMAINING >= deadline:
+            logger.warning("No time left to retry generation, serving a procedural myth")
+            return generate_procedural_myth(request, analysis)
+        
+        retry_prompt = original_prompt + "\n\nIMPORTANT: Return ONLY valid JSON. No additional text or commentary."
+        
+        try:
+            response = await self._call_upstream(
+                model,
+                system_prompt="You must respond with valid JSON only. No other text.",
+                prompt=retry_prompt,
+                temperature=0.5,  # Lower temperature for more consistent output
+                deadline=deadline,
+            )
+            if usage is not None:
+                usage.add(getattr(response, "usage", None))
             
             content = response.choices[0].message.content
             myth_data = json.loads(content)
             
             # Add metadata
             myth_data["meta"]["generation_time"] = 0
-            myth_data["meta"]["ai_model"] = self.model
+            myth_data["meta"]["ai_model"] = model
             
             return MythGenerationResponse(**myth_data)
             
         except Exception as e:
             logger.error(f"Retry generation failed: {e}")
-            # Return fallback response
-            return self._create_fallback_response(request)
-    
-    def _create_fallback_response(self, request: MythGenerationRequest) -> MythGenerationResponse:
-        """Create a fallback response when OpenAI fails"""
-        
-        culture = request.culture if request.culture != "auto" else "universal"
-        
-        return MythGenerationResponse(
-            title="The Tale of Modern Wisdom",
-            adapted_story=f"In times long past, when the world was young and mysteries abounded, there lived one who faced a challenge much like yours: {request.scenario[:100]}... This ancient tale reminds us that the struggles we face today have echoed through the ages, and wisdom can be found in how our ancestors might have approached such trials.",
-            choices=[
-                {
-                    "id": "c1",
-                    "label": "Seek Wisdom",
-                    "outcome": "The protagonist seeks counsel from the elders, finding guidance in ancient traditions."
-                },
-                {
-                    "id": "c2", 
-                    "label": "Trust Instinct",
-                    "outcome": "Following inner wisdom, the protagonist forges a new path forward."
-                },
-                {
-                    "id": "c3",
-                    "label": "Unite Others",
-                    "outcome": "By bringing together allies, the protagonist finds strength in community."
-                }
-            ],
-            meta=MythMetadata(
-                culture=culture,
-                source_motif="Universal heroic journey pattern",
-                generation_time=0,
-                ai_model="fallback"
-            )
-        )
+            return generate_procedural_myth(request, analysis)
 
 
 # Global service instance
@@ -0,0 +1,277 @@
+"""
+Static pre-rendering of popular myths.
+Counts views of shared myths and, once a myth passes the view threshold,
+writes its JSON and a standalone HTML page with social meta tags to a
+directory nginx serves without touching the app. Files are written
+atomically and only for newly qualifying myths.
+
+Rebuild every pre-rendered file (for example after a template change)
+from the backend directory:
+    python -m app.services.prerender [--threshold N] [--dir PATH]
+"""
+
+import argparse
+import asyncio
+import html
+import json
+import logging
+import os
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+from app.core.config import settings
+from app.services.myth_store import is_myth_id, myth_store
+
+logger = logging.getLogger(__name__)
+
+# Myth pages nginx mirrors to the view counter
+VIEWED_PATH = re.compile(r"^/(?:api/v1/myths|story)/([0-9a-f]{32})(?:[/?#]|$)")
+DESCRIPTION_LENGTH = 200
+
+
+class MemoryViewCounter:
+    """View counts for a single replica"""
+
+    def __init__(self):
+        self._counts: Dict[str, int] = {}
+
+    async def incr(self, key: str) -> int:
+        self._counts[key] = self._counts.get(key, 0) + 1
+        return self._counts[key]
+
+    async def all(self) -> Dict[str, int]:
+        return dict(self._counts)
+
+
+class RedisViewCounter:
+    """View counts shared by every replica through Redis"""
+
+    KEY_PREFIX = "mythweaver:views:"
+
+    def __init__(self, url: str, ttl: int):
+        import redis.asyncio as redis_asyncio
+        self.redis = redis_asyncio.from_url(url)
+        self.ttl = ttl
+
+    async def incr(self, key: str) -> int:
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.incr(self.KEY_PREFIX + key)
+            pipe.expire(self.KEY_PREFIX + key, self.ttl)
+            count, _ = await pipe.execute()
+        return int(count)
+
+    async def all(self) -> Dict[str, int]:
+        names = [name async for name in self.redis.scan_iter(match=self.KEY_PREFIX + "*", count=1000)]
+        if not names:
+            return {}
+        values = await self.redis.mget(names)
+        return {
+            name.decode()[len(self.KEY_PREFIX):]: int(value or 0)
+            for name, value in zip(names, values)
+        }
+
+
+def viewed_myth_id(uri: str) -> Optional[str]:
+    """Myth id of a viewed page or API URI"""
+    match = VIEWED_PATH.match(uri or "")
+    return match.group(1) if match else None
+
+
+def _summary(text: str) -> str:
+    """First sentences of a story, cut at a word boundary"""
+    text = " ".join(text.split())
+    if len(text) <= DESCRIPTION_LENGTH:
+        return text
+    return text[:DESCRIPTION_LENGTH].rsplit(" ", 1)[0] + "…"
+
+
+def render_html(key: str, myth: Dict, base_url: str) -> str:
+    """Standalone, crawler-friendly page for one myth"""
+    e = html.escape
+    title = myth["title"]
+    culture = myth.get("meta", {}).get("culture", "")
+    description = _summary(myth["adapted_story"])
+    page_url = f"{base_url.rstrip('/')}/story/{key}"
+
+    paragraphs = "\n".join(
+        f"      <p>{e(paragraph.strip())}</p>"
+        for paragraph in myth["adapted_story"].split("\n")
+        if paragraph.strip()
+    )
+    choices = "\n".join(
+        f"      <details><summary>{e(choice['label'])}</summary><p>{e(choice['outcome'])}</p></details>"
+        for choice in myth["choices"]
+    )
+
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+  <meta charset="utf-8">
+  <meta name="viewport" content="width=device-width, initial-scale=1">
+  <title>{e(title)} | MythWeaver</title>
+  <meta name="description" content="{e(description)}">
+  <link rel="canonical" href="{e(page_url)}">
+  <link rel="alternate" type="application/json" href="/api/v1/myths/{key}">
+  <meta property="og:type" content="article">
+  <meta property="og:site_name" content="MythWeaver">
+  <meta property="og:title" content="{e(title)}">
+  <meta property="og:description" content="{e(description)}">
+  <meta property="og:url" content="{e(page_url)}">
+  <meta name="twitter:card" content="summary">
+  <meta name="twitter:title" content="{e(title)}">
+  <meta name="twitter:description" content="{e(description)}">
+</head>
+<body>
+  <main>
+    <article>
+      <h1>{e(title)}</h1>
+      <p><em>A {e(culture.replace("_", " ").title())} myth</em></p>
+{paragraphs}
+    </article>
+    <section>
+      <h2>How does it end?</h2>
+{choices}
+    </section>
+    <p><a href="/">Weave your own myth</a></p>
+  </main>
+</body>
+</html>
+"""
+
+
+def write_atomic(path: Path, data: bytes) -> None:
+    """Write through a temporary file in the same directory so readers never see a partial file"""
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def write_myth(directory: Path, key: str, body: bytes, base_url: str) -> None:
+    """Write the JSON and HTML representations of one myth"""
+    myths_dir = directory / "myths"
+    myths_dir.mkdir(parents=True, exist_ok=True)
+    page = render_html(key, json.loads(body), base_url)
+    write_atomic(myths_dir / f"{key}.json", body)
+    write_atomic(myths_dir / f"{key}.html", page.encode("utf-8"))
+
+
+class Prerenderer:
+    """Renders myths to static files once they are popular"""
+
+    def __init__(self, directory: str, threshold: int, counter, base_url: str):
+        self.directory = Path(directory) if directory else None
+        self.threshold = threshold
+        self.counter = counter
+        self.base_url = base_url
+        self._rendered: Set[str] = set()
+        self.views = 0
+        self.renders = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.directory is not None and self.threshold > 0
+
+    def json_path(self, key: str) -> Path:
+        return self.directory / "myths" / f"{key}.json"
+
+    def is_rendered(self, key: str) -> bool:
+        """Rendered by this worker, or by another replica sharing the directory"""
+        if key in self._rendered:
+            return True
+        if self.json_path(key).exists():
+            self._rendered.add(key)
+            return True
+        return False
+
+    async def record_view(self, key: str) -> int:
+        """Count a view and render the myth when it crosses the threshold"""
+        self.views += 1
+        count = await self.counter.incr(key)
+        if self.enabled and count >= self.threshold and not self.is_rendered(key):
+            await self.render(key)
+        return count
+
+    async def render(self, key: str, body: Optional[bytes] = None) -> bool:
+        """Write one myth's static files off the event loop"""
+        if body is None:
+            myth = await myth_store.load(key)
+            if myth is None:
+                return False
+            body = myth.body
+        try:
+            await asyncio.to_thread(write_myth, self.directory, key, body, self.base_url)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning("Failed to pre-render myth %s: %s", key, e)
+            return False
+        self._rendered.add(key)
+        self.renders += 1
+        logger.info("Pre-rendered myth %s", key)
+        return True
+
+    async def rebuild(self) -> int:
+        """Re-render every qualifying myth and every myth already on disk"""
+        counts = await self.counter.all()
+        keys = {key for key, count in counts.items() if count >= self.threshold}
+        existing = {}
+        if (self.directory / "myths").is_dir():
+            for path in (self.directory / "myths").glob("*.json"):
+                if is_myth_id(path.stem):
+                    existing[path.stem] = path
+
+        rendered = 0
+        for key in sorted(keys | set(existing)):
+            myth = await myth_store.load(key)
+            if myth is not None:
+                body = myth.body
+            elif key in existing:
+                # The published JSON is the myth itself, so it stands in for an expired store entry
+                body = existing[key].read_bytes()
+            else:
+                continue
+            if await self.render(key, body):
+                rendered += 1
+        return rendered
+
+    def stats(self) -> Dict:
+        """Metrics snapshot"""
+        return {"enabled": self.enabled, "views": self.views, "renders": self.renders}
+
+
+def build_view_counter():
+    """Use Redis for shared counts when configured, memory otherwise"""
+    if settings.REDIS_URL:
+        try:
+            return RedisViewCounter(settings.REDIS_URL, settings.MYTH_TTL)
+        except ImportError:
+            logger.warning("redis package not installed, counting myth views in memory")
+    return MemoryViewCounter()
+
+
+# Global pre-renderer
+prerenderer = Prerenderer(
+    directory=settings.PRERENDER_DIR,
+    threshold=settings.PRERENDER_VIEW_THRESHOLD,
+    counter=build_view_counter(),
+    base_url=settings.PUBLIC_BASE_URL,
+)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Rebuild pre-rendered myth pages")
+    parser.add_argument("--dir", default=settings.PRERENDER_DIR, help="output directory")
+    parser.add_argument("--threshold", type=int, default=settings.PRERENDER_VIEW_THRESHOLD, help="minimum views")
+    args = parser.parse_args(argv)
+
+    if not args.dir:
+        parser.error("no output directory; set PRERENDER_DIR or pass --dir")
+    renderer = Prerenderer(args.dir, args.threshold, prerenderer.counter, settings.PUBLIC_BASE_URL)
+    count = asyncio.run(renderer.rebuild())
+    print(f"Pre-rendered {count} myths into {Path(args.dir) / 'myths'}")
+
+
+if __name__ == "__main__":
+    main()
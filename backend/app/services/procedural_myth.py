@@ -0,0 +1,207 @@
+"""
+Procedural myth generator.
+Builds a schema-valid myth locally from the seed motifs, the culture and
+the scenario in well under a millisecond. Used when the upstream model
+fails, is unavailable, or cannot answer before the request deadline.
+Output is seeded by the scenario digest, so the same request always gets
+the same myth and different requests get different ones.
+"""
+
+import random
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.models.request import MythGenerationRequest, MythGenerationResponse
+from app.services.motif_index import get_motif_index
+from app.services.myth_utils import ScenarioAnalysis, analyze_scenario
+
+# Recorded as meta.ai_model so clients and analytics can tell these apart
+PROCEDURAL_MODEL = "procedural"
+
+UNIVERSAL_MOTIFS = ("Hero's journey", "wise mentor", "transformative trial", "choice of paths", "return with wisdom")
+
+# Per culture: places the tale is set, and powers that watch over it
+CULTURE_LORE: Dict[str, Tuple[Tuple[str, ...], Tuple[str, ...]]] = {
+    "greek": (
+        ("beneath the shining peaks of Olympus", "on the wine-dark shores of the Aegean", "in the marble streets of Athens"),
+        ("grey-eyed Athena", "swift-footed Hermes", "the three Fates"),
+    ),
+    "norse": (
+        ("in the long winter of Midgard", "beneath the branches of Yggdrasil", "in a longhouse by the frozen fjord"),
+        ("one-eyed Odin", "sly Loki", "the Norns at the well of Urd"),
+    ),
+    "indian": (
+        ("on the banks of the sacred Ganga", "in the shadow of the Himalaya", "in a forest hermitage"),
+        ("Lord Vishnu", "the sage Narada", "Saraswati of the flowing river"),
+    ),
+    "japanese": (
+        ("when the cherry blossoms fell over Yamato", "in a village below Mount Fuji", "at a shrine where the torii stood red"),
+        ("Amaterasu of the sun", "storm-hearted Susanoo", "the kami of the mountain"),
+    ),
+    "egyptian": (
+        ("on the black earth beside the Nile", "in the shadow of the great pyramid", "in the halls of Thebes"),
+        ("ibis-headed Thoth", "Isis of many names", "jackal-headed Anubis"),
+    ),
+    "celtic": (
+        ("in the green hills of Ériu", "at the edge of a sacred grove", "where the mist hid the Otherworld"),
+        ("Brigid of the flame", "Lugh of the long arm", "the Morrígan"),
+    ),
+    "chinese": (
+        ("in the Middle Kingdom beneath the Jade Emperor", "beside the Yellow River", "on a mountain wrapped in cloud"),
+        ("the Jade Emperor", "the Monkey King", "the Dragon King of the Eastern Sea"),
+    ),
+    "african": (
+        ("beneath a baobab older than memory", "on the wide savanna", "in a village where the drums spoke at dusk"),
+        ("Anansi the spider", "the ancestors", "the griot who remembers everything"),
+    ),
+    "native_american": (
+        ("where the four directions meet", "beside a river that ran through the great plains", "beneath the watching mountains"),
+        ("the Great Spirit", "Coyote the trickster", "Grandmother Moon"),
+    ),
+}
+DEFAULT_LORE = (
+    ("in a land whose name is lost", "at the edge of the known world", "in a city older than its gods"),
+    ("the old gods", "a wandering sage", "the spirits of the land"),
+)
+
+# Nouns: introduced as "a weaver", then "the weaver"
+HEROES = (
+    "weaver", "young herder", "tired scribe", "restless merchant", "potter",
+    "ferryman's daughter", "fisher", "apprentice smith", "traveling singer",
+)
+
+TITLES = (
+    "The Tale of the {keyword}",
+    "{Power} and the {keyword}",
+    "How the {Hero} Faced the {keyword}",
+    "The {keyword} and the {Motif}",
+    "The Song of the {Hero}",
+)
+
+OPENINGS = (
+    "Long ago, {realm}, there lived {a_hero} whose days had grown heavy.",
+    "In the age before memory, {realm}, {a_hero} carried a burden no one else could see.",
+    "When the world was young, {realm}, {a_hero} woke one morning to a trouble that would not leave.",
+)
+
+TROUBLES = (
+    "The trouble was one the gods knew well. \"{scenario}\" the {hero} told the empty sky.",
+    "The elders still repeat the {hero}'s words: \"{scenario}\"",
+    "It began plainly, as great tales do, with words spoken at a crossroads: \"{scenario}\"",
+)
+
+MIDDLES = (
+    "The matter weighed on the {hero} until even sleep gave no rest. "
+    "So the {hero} set out, and the old story the elders call \"{motif_a}\" began again, as it always does.",
+    "Some laughed at such a small worry, but {power} did not. "
+    "{Power} watched as the {hero} walked into the tale of \"{motif_a}\".",
+    "No counsel at home could untangle it. "
+    "And so, as in the oldest songs of \"{motif_a}\", the {hero} left the hearth behind.",
+)
+
+TRIALS = (
+    "On the road the pattern of \"{motif_b}\" showed itself, and the {hero} learned that help often wears a strange face.",
+    "At the crossing waited the riddle of \"{motif_b}\", asking nothing and everything at once.",
+    "{Power} sent a sign of \"{motif_b}\", for no one passes such a road alone.",
+)
+
+CLIMAXES = (
+    "Last came the trial of \"{motif_c}\". The {hero} stood where three paths parted, "
+    "and {power} spoke: \"Every road from here is true. Choose the one you can walk.\"",
+    "Then came the final test, \"{motif_c}\", and the whole world seemed to hold its breath. "
+    "Before the {hero} lay three paths, and {power} would not say which was right.",
+    "When the trial of \"{motif_c}\" was over, the {hero} understood that the trouble had never been the road. "
+    "Three paths opened, each lit by a different star.",
+)
+
+CLOSINGS = {
+    "playful": "And somewhere above, {power} laughed, because the gods love nothing more than a good muddle.",
+    "serious": "The old ones say the choice still echoes, for every trouble carried honestly becomes a teaching.",
+    "balanced": "And so the tale waits for its ending, as every tale does, in the hands of the one who hears it.",
+}
+
+# Endings: (label, outcome); three distinct ones are drawn per myth
+ENDINGS = (
+    ("Seek Counsel", "The {hero} sought out {power}, and the counsel received turned the trouble into a lesson the whole village would remember."),
+    ("Trust the Trickster", "The {hero} answered cunning with cunning, and found that the one who seemed an obstacle had been an ally all along."),
+    ("Make a Sacrifice", "The {hero} gave up something dear, and the gift returned in a form no one expected, as the tale of \"{motif_a}\" foretold."),
+    ("Gather Allies", "The {hero} called on neighbours and strangers alike, and together they carried what no one could carry alone."),
+    ("Endure the Trial", "The {hero} stayed the course through the trial of \"{motif_c}\", and patience proved stronger than any spell."),
+    ("Face It Directly", "The {hero} named the trouble aloud before {power}, and once named, it lost its power to frighten."),
+    ("Strike a Bargain", "The {hero} bargained with fate itself and won a fair trade, though the price was remembered for generations."),
+    ("Walk Away", "The {hero} chose another road entirely, and found that leaving can be its own kind of courage."),
+)
+
+
+def motif_elements(culture: str, tokens: Sequence[str]) -> List[str]:
+    """Individual motif phrases of the best-matching seed motifs"""
+    elements = []
+    for motif in get_motif_index().search(culture, tokens, 3):
+        elements.extend(part.strip() for part in motif.split(";") if part.strip())
+    return elements or list(UNIVERSAL_MOTIFS)
+
+
+def generate_procedural_myth(
+    request: MythGenerationRequest,
+    analysis: Optional[ScenarioAnalysis] = None,
+) -> MythGenerationResponse:
+    """Assemble a myth from templates, motifs and the scenario"""
+
+    start_time = time.perf_counter()
+    if analysis is None:
+        analysis = analyze_scenario(request.scenario)
+
+    culture = analysis.resolve_culture(request.culture)
+    rng = random.Random(int(analysis.digest[:16], 16))
+    realms, powers = CULTURE_LORE.get(culture, DEFAULT_LORE)
+
+    elements = motif_elements(culture, analysis.tokens)
+    picked = rng.sample(elements, 3) if len(elements) >= 3 else [rng.choice(elements) for _ in range(3)]
+    # Longer keywords are more likely to be the nouns a title needs
+    keywords = sorted(dict.fromkeys(analysis.keywords), key=len, reverse=True)
+    scenario = analysis.text if len(analysis.text) <= 240 else analysis.text[:240].rsplit(" ", 1)[0] + "..."
+    if scenario[-1] not in ".!?":
+        scenario += "."
+
+    hero = rng.choice(HEROES)
+    power = rng.choice(powers)
+    words = {
+        "realm": rng.choice(realms),
+        "power": power,
+        "Power": power[0].upper() + power[1:],
+        "hero": hero,
+        "a_hero": ("an " if hero[0] in "aeiou" else "a ") + hero,
+        "Hero": hero.title(),
+        "keyword": keywords[0].title() if keywords else "Trouble",
+        "Motif": picked[0].title(),
+        "motif_a": picked[0][0].upper() + picked[0][1:],
+        "motif_b": picked[1][0].upper() + picked[1][1:],
+        "motif_c": picked[2][0].upper() + picked[2][1:],
+        "scenario": scenario[0].upper() + scenario[1:],
+    }
+
+    paragraphs = [
+        rng.choice(OPENINGS).format(**words),
+        rng.choice(TROUBLES).format(**words),
+        rng.choice(MIDDLES).format(**words),
+        rng.choice(TRIALS).format(**words),
+        rng.choice(CLIMAXES).format(**words),
+        CLOSINGS.get(request.tone or "balanced", CLOSINGS["balanced"]).format(**words),
+    ]
+
+    choices = [
+        {"id": f"c{position}", "label": label, "outcome": outcome.format(**words)}
+        for position, (label, outcome) in enumerate(rng.sample(ENDINGS, 3), start=1)
+    ]
+
+    return MythGenerationResponse(
+        title=rng.choice(TITLES).format(**words),
+        adapted_story="\n\n".join(paragraph[0].upper() + paragraph[1:] for paragraph in paragraphs),
+        choices=choices,
+        meta={
+            "culture": culture,
+            "source_motif": "; ".join(picked),
+            "generation_time": time.perf_counter() - start_time,
+            "ai_model": PROCEDURAL_MODEL,
+        },
+    )
@@ -0,0 +1,238 @@
+"""
+In-memory response cache.
+Entries hold the final serialized JSON body so hits skip model validation,
+compressed with zlib (or zstd when installed) to keep per-worker memory low.
+Entries are fresh until RESPONSE_CACHE_SOFT_TTL; after that they are still
+served, flagged stale so the caller can refresh them, until RESPONSE_CACHE_TTL,
+when the next lookup drops them. Beyond RESPONSE_CACHE_MAX_ENTRIES the least
+recently used entries are evicted.
+Keys are "<culture>:<tone>:<template version>:<digest>" so operators can
+invalidate entries by any of those parts.
+"""
+
+import logging
+import time
+import zlib
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+from app.core.config import settings
+from app.models.request import MythGenerationRequest
+from app.services.myth_utils import ScenarioAnalysis
+
+logger = logging.getLogger(__name__)
+
+Codec = Tuple[Callable[[bytes, int], bytes], Callable[[bytes], bytes]]
+
+CODECS: Dict[str, Codec] = {
+    "none": (lambda data, level: data, lambda data: data),
+    "zlib": (lambda data, level: zlib.compress(data, level), zlib.decompress),
+}
+
+try:
+    import zstandard
+
+    CODECS["zstd"] = (
+        lambda data, level: zstandard.ZstdCompressor(level=level).compress(data),
+        lambda data: zstandard.ZstdDecompressor().decompress(data),
+    )
+except ImportError:
+    pass
+
+
+def resolve_codec(name: str) -> str:
+    """Configured codec, falling back to zlib when it is unavailable"""
+    if name in CODECS:
+        return name
+    logger.warning("Cache compression %r is unavailable, using zlib", name)
+    return "zlib"
+
+
+class CachedBody:
+    """Compact cache entry: possibly compressed body bytes plus metadata"""
+
+    __slots__ = ("payload", "codec", "timestamp", "hits", "myth_id")
+
+    def __init__(self, payload: bytes, codec: str, timestamp: float):
+        self.payload = payload
+        self.codec = codec
+        self.timestamp = timestamp
+        self.hits = 0
+        # Shareable id in the myth store; unknown for entries restored from a snapshot
+        self.myth_id: Optional[str] = None
+
+    @classmethod
+    def encode(
+        cls,
+        body: bytes,
+        timestamp: Optional[float] = None,
+        codec: Optional[str] = None,
+        level: Optional[int] = None,
+    ) -> "CachedBody":
+        """Compress a body with the configured codec, keeping it raw when that does not help"""
+        codec = codec or CACHE_CODEC
+        level = settings.RESPONSE_CACHE_COMPRESSION_LEVEL if level is None else level
+        payload = CODECS[codec][0](body, level)
+        if len(payload) >= len(body):
+            payload, codec = body, "none"
+        return cls(payload, codec, time.time() if timestamp is None else timestamp)
+
+    @property
+    def body(self) -> bytes:
+        """Decoded JSON body"""
+        return CODECS[self.codec][1](self.payload)
+
+
+class CacheStats:
+    """Counters for cache lookups and background refreshes"""
+
+    __slots__ = (
+        "hits", "stale_hits", "misses", "evictions", "refreshes", "refreshes_deduplicated", "refresh_failures",
+    )
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        """Zero all counters"""
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.refreshes = 0
+        self.refreshes_deduplicated = 0
+        self.refresh_failures = 0
+
+    def as_dict(self) -> Dict[str, Union[int, float]]:
+        """Return counters as a plain dict"""
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_ratio": round((self.hits + self.stale_hits) / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "refreshes": self.refreshes,
+            "refreshes_deduplicated": self.refreshes_deduplicated,
+            "refresh_failures": self.refresh_failures,
+        }
+
+
+cache_stats = CacheStats()
+
+CACHE_CODEC = resolve_codec(settings.RESPONSE_CACHE_COMPRESSION)
+
+# In-memory cache for responses (use Redis in production), least recently used first
+response_cache: "OrderedDict[str, CachedBody]" = OrderedDict()
+
+
+def get_cache_key(request: MythGenerationRequest, analysis: ScenarioAnalysis) -> str:
+    """Generate cache key for request"""
+    return f"{request.culture}:{request.tone}:{settings.PROMPT_TEMPLATE_VERSION}:{analysis.digest}"
+
+
+def lookup_entry(cache_key: str) -> Tuple[Optional[CachedBody], bool]:
+    """Return the cache entry, unless past the hard TTL, and whether it is stale"""
+    entry = response_cache.get(cache_key)
+    if entry is not None:
+        age = time.time() - entry.timestamp
+        if age < settings.RESPONSE_CACHE_TTL:
+            stale = age >= settings.RESPONSE_CACHE_SOFT_TTL
+            entry.hits += 1
+            if stale:
+                cache_stats.stale_hits += 1
+            else:
+                cache_stats.hits += 1
+            response_cache.move_to_end(cache_key)
+            return entry, stale
+        del response_cache[cache_key]
+    cache_stats.misses += 1
+    return None, False
+
+
+def lookup_body(cache_key: str) -> Tuple[Optional[bytes], bool]:
+    """Return the cached JSON body and whether it is stale, decoding only on a hit"""
+    entry, stale = lookup_entry(cache_key)
+    return (entry.body if entry is not None else None), stale
+
+
+def get_cached_body(cache_key: str) -> Optional[bytes]:
+    """Return the cached JSON body if present and not past the hard TTL"""
+    return lookup_body(cache_key)[0]
+
+
+def store_body(cache_key: str, body: bytes, myth_id: Optional[str] = None) -> None:
+    """Cache a serialized response body along with its myth store id"""
+    entry = CachedBody.encode(body)
+    entry.myth_id = myth_id
+    response_cache[cache_key] = entry
+    response_cache.move_to_end(cache_key)
+    while len(response_cache) > settings.RESPONSE_CACHE_MAX_ENTRIES:
+        response_cache.popitem(last=False)
+        cache_stats.evictions += 1
+
+
+def is_fresh(cache_key: str) -> bool:
+    """Whether a key is cached and within the soft TTL, without counting a lookup"""
+    entry = response_cache.get(cache_key)
+    return entry is not None and time.time() - entry.timestamp < settings.RESPONSE_CACHE_SOFT_TTL
+
+
+def key_matches(
+    cache_key: str,
+    culture: Optional[str] = None,
+    tone: Optional[str] = None,
+    template_version: Optional[str] = None,
+    key_prefix: Optional[str] = None,
+) -> bool:
+    """Whether a key matches every filter given"""
+    parts = cache_key.split(":", 3)
+    if len(parts) != 4:
+        # Written before keys carried a template version
+        parts.insert(2, "")
+    return (
+        (culture is None or parts[0] == culture)
+        and (tone is None or parts[1] == str(tone))
+        and (template_version is None or parts[2] == template_version)
+        and (key_prefix is None or cache_key.startswith(key_prefix))
+    )
+
+
+def invalidate(**filters: Optional[str]) -> int:
+    """Drop every entry matching the filters (see key_matches), returning the count"""
+    keys = [key for key in response_cache if key_matches(key, **filters)]
+    for key in keys:
+        del response_cache[key]
+    if keys:
+        logger.info("Invalidated %d cached responses matching %s", len(keys), filters)
+    return len(keys)
+
+
+# Upper bounds of the age histogram buckets, in seconds
+AGE_BUCKETS = ((300, "<5m"), (900, "<15m"), (3600, "<1h"), (21600, "<6h"), (86400, "<1d"))
+
+
+def cache_report(top: int = 10) -> Dict:
+    """Size, hit counters, most-hit keys and an age histogram of the cache"""
+    now = time.time()
+    entries = list(response_cache.items())
+    histogram = {label: 0 for _, label in AGE_BUCKETS}
+    histogram[">=1d"] = 0
+    stale = 0
+    for _, entry in entries:
+        age = now - entry.timestamp
+        stale += age >= settings.RESPONSE_CACHE_SOFT_TTL
+        histogram[next((label for bound, label in AGE_BUCKETS if age < bound), ">=1d")] += 1
+
+    top_keys: List[Dict] = [
+        {"key": key, "hits": entry.hits, "age": round(now - entry.timestamp, 1)}
+        for key, entry in sorted(entries, key=lambda item: item[1].hits, reverse=True)[:top]
+    ]
+    return {
+        "entries": len(entries),
+        "stale_entries": stale,
+        "bytes": sum(len(key) + len(entry.payload) for key, entry in entries),
+        **cache_stats.as_dict(),
+        "top_keys": top_keys,
+        "age_histogram": histogram,
+    }
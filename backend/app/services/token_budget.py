@@ -0,0 +1,210 @@
+"""
+Per-client token budgets.
+Charges the prompt and completion tokens of every upstream call to the
+client that caused it and throttles clients over their per-minute or
+daily budget. Counters live in Redis when configured so every replica
+enforces the same budget.
+"""
+
+import logging
+import math
+import time
+from typing import Dict, List, Tuple
+
+from starlette.requests import Request
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class TokenUsage:
+    """Tokens consumed by the upstream calls of one generation"""
+
+    __slots__ = ("prompt_tokens", "completion_tokens")
+
+    def __init__(self):
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    @property
+    def total(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    def add(self, usage) -> None:
+        """Add the usage block of an API response, if it has one"""
+        if usage is None:
+            return
+        self.prompt_tokens += int(getattr(usage, "prompt_tokens", 0) or 0)
+        self.completion_tokens += int(getattr(usage, "completion_tokens", 0) or 0)
+
+
+class BudgetExceeded(Exception):
+    """Raised when a client has spent its token budget for a window"""
+
+    def __init__(self, window: str, retry_after: int):
+        super().__init__(f"{window} token budget exceeded")
+        self.window = window
+        self.retry_after = retry_after
+
+
+class MemoryBudgetStore:
+    """Counters for a single replica"""
+
+    # Expired counters are swept after this many writes
+    SWEEP_EVERY = 1000
+
+    def __init__(self):
+        self._counters: Dict[str, Tuple[int, float]] = {}
+        self._writes = 0
+
+    async def add(self, keys: List[Tuple[str, int]], amount: int) -> None:
+        now = time.time()
+        for key, ttl in keys:
+            value, expires_at = self._counters.get(key, (0, now + ttl))
+            self._counters[key] = (value + amount, expires_at)
+
+        self._writes += 1
+        if self._writes % self.SWEEP_EVERY == 0:
+            self._counters = {
+                key: entry for key, entry in self._counters.items() if entry[1] > now
+            }
+
+    async def get(self, keys: List[str]) -> List[int]:
+        now = time.time()
+        values = []
+        for key in keys:
+            value, expires_at = self._counters.get(key, (0, now))
+            values.append(value if expires_at > now else 0)
+        return values
+
+
+class RedisBudgetStore:
+    """Counters shared by every replica through Redis"""
+
+    def __init__(self, url: str):
+        import redis.asyncio as redis_asyncio
+        self.redis = redis_asyncio.from_url(url)
+
+    async def add(self, keys: List[Tuple[str, int]], amount: int) -> None:
+        async with self.redis.pipeline(transaction=True) as pipe:
+            for key, ttl in keys:
+                pipe.incrby(key, amount)
+                pipe.expire(key, ttl)
+            await pipe.execute()
+
+    async def get(self, keys: List[str]) -> List[int]:
+        return [int(value or 0) for value in await self.redis.mget(keys)]
+
+
+class TokenBudget:
+    """Fixed-window token budgets per client"""
+
+    KEY_PREFIX = "mythweaver:tokens:"
+
+    def __init__(self, store, per_minute: int, per_day: int):
+        self.store = store
+        # (name, window seconds, limit); a limit of 0 disables the window
+        self.windows = [
+            (name, length, limit)
+            for name, length, limit in (("minute", 60, per_minute), ("day", 86400, per_day))
+            if limit > 0
+        ]
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.rejected = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.windows)
+
+    def _keys(self, client: str, now: float) -> List[Tuple[str, int, int, float]]:
+        """(key, window seconds, limit, reset time) of the current windows"""
+        keys = []
+        for name, length, limit in self.windows:
+            start = int(now // length) * length
+            keys.append((f"{self.KEY_PREFIX}{client}:{name}:{start}", length, limit, start + length))
+        return keys
+
+    async def status(self, client: str) -> Dict[str, Dict]:
+        """Used and remaining tokens per window"""
+        now = time.time()
+        keys = self._keys(client, now)
+        used = await self.store.get([key for key, _, _, _ in keys]) if keys else []
+
+        return {
+            name: {
+                "limit": limit,
+                "used": spent,
+                "remaining": max(limit - spent, 0),
+                "reset_in": math.ceil(reset_at - now),
+            }
+            for (name, _, _), (_, _, limit, reset_at), spent in zip(self.windows, keys, used)
+        }
+
+    async def check(self, client: str) -> None:
+        """Raise BudgetExceeded when any window is spent"""
+        if not self.enabled:
+            return
+        try:
+            windows = await self.status(client)
+        except Exception as e:
+            # Fail open: a counter outage must not take generation down
+            logger.warning("Token budget check failed for %s: %s", client, e)
+            return
+        exhausted = [
+            (name, window["reset_in"])
+            for name, window in windows.items()
+            if window["remaining"] <= 0
+        ]
+        if exhausted:
+            self.rejected += 1
+            name, retry_after = max(exhausted, key=lambda item: item[1])
+            raise BudgetExceeded(name, max(retry_after, 1))
+
+    async def charge(self, client: str, usage: TokenUsage) -> None:
+        """Add a generation's tokens to every window of the client"""
+        self.prompt_tokens += usage.prompt_tokens
+        self.completion_tokens += usage.completion_tokens
+        if not self.enabled or usage.total == 0:
+            return
+        keys = self._keys(client, time.time())
+        try:
+            await self.store.add([(key, length) for key, length, _, _ in keys], usage.total)
+        except Exception as e:
+            logger.warning("Failed to charge %d tokens to %s: %s", usage.total, client, e)
+
+    def stats(self) -> Dict:
+        """Metrics snapshot"""
+        return {
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "rejected": self.rejected,
+        }
+
+
+def client_identity(request: Request) -> str:
+    """Address of the caller, as appended by the nearest proxy"""
+    forwarded = request.headers.get("x-forwarded-for")
+    if forwarded:
+        # Proxies append, so the last hop is the one our proxy saw
+        return forwarded.rsplit(",", 1)[-1].strip()
+    return request.client.host if request.client else "unknown"
+
+
+def build_budget_store():
+    """Use Redis for shared counters when configured, memory otherwise"""
+    if settings.REDIS_URL:
+        try:
+            return RedisBudgetStore(settings.REDIS_URL)
+        except ImportError:
+            logger.warning("redis package not installed, keeping token budgets in memory")
+    return MemoryBudgetStore()
+
+
+# Global budget
+token_budget = TokenBudget(
+    store=build_budget_store(),
+    per_minute=settings.TOKEN_BUDGET_PER_MINUTE,
+    per_day=settings.TOKEN_BUDGET_PER_DAY,
+)
@@ -0,0 +1,267 @@
+"""
+Adaptive concurrency for upstream model calls.
+Shares one in-flight limit across every call of the worker: the limit
+grows additively while calls succeed and is cut multiplicatively when the
+provider throttles (429) or times out. A Retry-After from the provider
+pauses every caller, and failed calls are retried with jittered
+exponential backoff as long as the request deadline allows.
+"""
+
+import asyncio
+import email.utils
+import math
+import random
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Optional, TypeVar
+
+from app.core.config import settings
+from app.services.admission import AdmissionRejected
+
+T = TypeVar("T")
+
+THROTTLED = "throttled"
+TIMEOUT = "timeout"
+SERVER_ERROR = "server_error"
+
+
+class UpstreamThrottled(AdmissionRejected):
+    """Raised when the provider keeps throttling past the request deadline"""
+
+
+def classify_error(exc: BaseException) -> Optional[str]:
+    """Retryable failure kind of an upstream exception, None when not retryable"""
+    status = getattr(exc, "status_code", None)
+    if status == 429:
+        return THROTTLED
+    name = type(exc).__name__
+    if isinstance(exc, TimeoutError) or "Timeout" in name:
+        return TIMEOUT
+    if (status is not None and status >= 500) or name == "APIConnectionError":
+        return SERVER_ERROR
+    return None
+
+
+def retry_after_seconds(exc: BaseException) -> Optional[float]:
+    """Delay requested by the provider through retry-after-ms or Retry-After"""
+    headers = getattr(getattr(exc, "response", None), "headers", None)
+    if not headers:
+        return None
+
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return max(float(value) / 1000, 0.0)
+        except ValueError:
+            pass
+
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        # HTTP-date form
+        return max(email.utils.parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class AIMDLimiter:
+    """Additive-increase, multiplicative-decrease limit on in-flight calls"""
+
+    def __init__(
+        self,
+        initial: int,
+        minimum: int,
+        maximum: int,
+        increase: float,
+        decrease: float,
+        max_retries: int,
+        backoff_base: float,
+        backoff_max: float,
+        deadline: float,
+    ):
+        self.minimum = max(minimum, 1)
+        self.maximum = max(maximum, self.minimum)
+        self.limit = float(min(max(initial, self.minimum), self.maximum))
+        self.increase = increase
+        self.decrease = decrease
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.deadline = deadline
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self._last_decrease = 0.0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        """Zero the counters"""
+        self.successes = 0
+        self.throttled = 0
+        self.timeouts = 0
+        self.server_errors = 0
+        self.retries = 0
+        self.gave_up = 0
+        self.decreases = 0
+
+    async def run(self, func: Callable[[], T], deadline: Optional[float] = None) -> T:
+        """Run a blocking upstream call in a thread under the limit, retrying retryable failures"""
+        if deadline is None:
+            deadline = time.time() + self.deadline
+        attempt = 0
+
+        while True:
+            await self._wait_out_pause(deadline)
+            await self._acquire(deadline)
+            if self.paused_until > time.time():
+                # The provider asked for a pause while this caller queued
+                self._release()
+                continue
+            started = time.time()
+            try:
+                result = await asyncio.to_thread(func)
+            except asyncio.CancelledError:
+                self._release()
+                raise
+            except Exception as exc:
+                kind = classify_error(exc)
+                if kind is None:
+                    self._release()
+                    raise
+
+                retry_after = retry_after_seconds(exc)
+                self._on_failure(kind, started, retry_after)
+                self._release()
+                attempt += 1
+                delay = self._backoff(attempt, retry_after)
+                if attempt > self.max_retries or time.time() + delay >= deadline:
+                    self.gave_up += 1
+                    if kind == THROTTLED:
+                        raise UpstreamThrottled(
+                            "upstream rate limited", max(1, math.ceil(retry_after or delay))
+                        ) from exc
+                    raise
+                self.retries += 1
+                await asyncio.sleep(delay)
+                continue
+
+            self._on_success()
+            self._release()
+            return result
+
+    def _backoff(self, attempt: int, retry_after: Optional[float]) -> float:
+        """Full-jitter exponential backoff, never shorter than the provider asked for"""
+        jitter = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+        if retry_after is not None:
+            # Spread callers released by the same Retry-After
+            return retry_after + jitter * 0.1
+        return jitter
+
+    async def _wait_out_pause(self, deadline: float) -> None:
+        """Sleep through a provider-requested pause, if the deadline allows"""
+        while True:
+            pause = self.paused_until - time.time()
+            if pause <= 0:
+                return
+            if time.time() + pause >= deadline:
+                raise UpstreamThrottled("upstream asked to back off", max(1, math.ceil(pause)))
+            await asyncio.sleep(pause)
+
+    async def _acquire(self, deadline: float) -> None:
+        """Take an in-flight slot, waiting in FIFO order until the deadline"""
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        try:
+            # Shield so a timeout never cancels a slot that was just handed over
+            await asyncio.wait_for(asyncio.shield(future), max(deadline - time.time(), 0))
+        except asyncio.TimeoutError:
+            if not future.done():
+                self._abandon(future)
+                raise UpstreamThrottled("no upstream capacity before the deadline", 1)
+        except asyncio.CancelledError:
+            if future.done():
+                self._release()
+            else:
+                self._abandon(future)
+            raise
+
+    def _abandon(self, future: asyncio.Future) -> None:
+        """Remove a waiter that gave up"""
+        future.cancel()
+        try:
+            self._waiters.remove(future)
+        except ValueError:
+            pass
+
+    def _release(self) -> None:
+        self.in_flight -= 1
+        self._wake()
+
+    def _wake(self) -> None:
+        """Hand free slots to waiters, oldest first"""
+        while self._waiters and self.in_flight < int(self.limit):
+            future = self._waiters.popleft()
+            if not future.done():
+                self.in_flight += 1
+                future.set_result(None)
+
+    def _on_success(self) -> None:
+        self.successes += 1
+        # About +increase per limit's worth of successes
+        self.limit = min(self.maximum, self.limit + self.increase / self.limit)
+
+    def _on_failure(self, kind: str, started: float, retry_after: Optional[float]) -> None:
+        if kind == THROTTLED:
+            self.throttled += 1
+        elif kind == TIMEOUT:
+            self.timeouts += 1
+        else:
+            self.server_errors += 1
+
+        if retry_after:
+            self.paused_until = max(self.paused_until, time.time() + retry_after)
+
+        # Calls already in flight at the last cut report the same congestion; cut once
+        if kind in (THROTTLED, TIMEOUT) and started >= self._last_decrease:
+            self.limit = max(self.minimum, self.limit * self.decrease)
+            self._last_decrease = time.time()
+            self.decreases += 1
+
+    def stats(self) -> Dict:
+        """Metrics snapshot"""
+        return {
+            "limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "waiting": len(self._waiters),
+            "paused_for": round(max(self.paused_until - time.time(), 0.0), 3),
+            "successes": self.successes,
+            "throttled": self.throttled,
+            "timeouts": self.timeouts,
+            "server_errors": self.server_errors,
+            "retries": self.retries,
+            "gave_up": self.gave_up,
+            "decreases": self.decreases,
+        }
+
+
+# Global limiter shared by every upstream call of this worker
+upstream_limiter = AIMDLimiter(
+    initial=settings.UPSTREAM_CONCURRENCY_INITIAL,
+    minimum=settings.UPSTREAM_CONCURRENCY_MIN,
+    maximum=settings.UPSTREAM_CONCURRENCY_MAX,
+    increase=settings.UPSTREAM_AIMD_INCREASE,
+    decrease=settings.UPSTREAM_AIMD_DECREASE,
+    max_retries=settings.UPSTREAM_MAX_RETRIES,
+    backoff_base=settings.UPSTREAM_BACKOFF_BASE,
+    backoff_max=settings.UPSTREAM_BACKOFF_MAX,
+    deadline=settings.UPSTREAM_DEADLINE,
+)
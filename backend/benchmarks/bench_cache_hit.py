@@ -0,0 +1,91 @@
+"""
+Benchmark for the /generate-myth cache hit path.
+Compares rebuilding the response model on every hit with serving
+pre-serialized JSON bytes.
+
+Run from the backend directory:
+    python -m benchmarks.bench_cache_hit
+"""
+
+import os
+import time
+import tracemalloc
+
+os.environ.setdefault("OPENAI_API_KEY", "bench-key")
+
+from fastapi.responses import JSONResponse, Response  # noqa: E402
+
+from app.core.serialization import dumps  # noqa: E402
+from app.models.request import MythGenerationResponse  # noqa: E402
+
+ITERATIONS = 20000
+
+
+def sample_myth() -> dict:
+    """Build a myth payload of realistic size (~900 word story)"""
+    return {
+        "title": "The Weaver of Bright Threads",
+        "adapted_story": " ".join(["In the age of bronze the weaver sang to the loom."] * 90),
+        "choices": [
+            {"id": f"c{i}", "label": f"Path {i}", "outcome": "The elders nod in quiet approval. " * 6}
+            for i in range(1, 4)
+        ],
+        "meta": {
+            "culture": "greek",
+            "source_motif": "Journey to underworld",
+            "generation_time": 4.2,
+            "ai_model": "gpt-4o-mini",
+        },
+    }
+
+
+def old_hit(entry: dict) -> Response:
+    """Previous hit path: rebuild the model, revalidate it as response_model and re-encode"""
+    model = MythGenerationResponse(**entry["data"])
+    validated = MythGenerationResponse.model_validate(model.model_dump())
+    return JSONResponse(content=validated.model_dump(mode="json"))
+
+
+def new_hit(entry: dict) -> Response:
+    """Current hit path: return the stored bytes untouched"""
+    return Response(content=entry["body"], media_type="application/json")
+
+
+def measure(name: str, func, entry: dict) -> None:
+    """Report mean latency and allocations for one hit path"""
+    for _ in range(200):
+        func(entry)
+
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        func(entry)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    peak_total = 0
+    for _ in range(1000):
+        baseline, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        func(entry)
+        _, peak = tracemalloc.get_traced_memory()
+        peak_total += peak - baseline
+    tracemalloc.stop()
+
+    print(
+        f"{name:<6} {elapsed / ITERATIONS * 1e6:8.2f} us/hit  "
+        f"{peak_total / 1000 / 1024:8.2f} KiB allocated/hit"
+    )
+
+
+def main() -> None:
+    data = sample_myth()
+    old_entry = {"data": MythGenerationResponse(**data).model_dump(), "timestamp": time.time()}
+    new_entry = {"body": dumps(MythGenerationResponse(**data).model_dump()), "timestamp": time.time()}
+
+    print(f"payload size: {len(new_entry['body'])} bytes, {ITERATIONS} iterations")
+    measure("before", old_hit, old_entry)
+    measure("after", new_hit, new_entry)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Benchmark for the memory footprint of cached myths.
+Reports bytes per cached myth for the model dict, the plain JSON bytes
+and the compressed slotted record at several codecs and levels, plus the
+cost of decoding a compressed body on a hit.
+
+Stories are Zipf-sampled from a small English vocabulary so they compress
+roughly like real prose rather than like a repeated sentence.
+
+Run from the backend directory:
+    python -m benchmarks.bench_cache_memory
+"""
+
+import os
+import random
+import time
+import tracemalloc
+
+os.environ.setdefault("OPENAI_API_KEY", "bench-key")
+
+from app.core.serialization import dumps, loads  # noqa: E402
+from app.models.request import MythGenerationResponse  # noqa: E402
+from app.services.response_cache import CODECS, CachedBody  # noqa: E402
+
+ENTRIES = 2000
+HITS = 5000
+STORY_WORDS = 900
+
+VOCABULARY = (
+    "the of and to a in that he she it was his her with for as on they at by from "
+    "but not all were when one there their had been who would what so out into up "
+    "over after then only them could between through before under again first long "
+    "weaver loom thread river mountain elder village king queen child gods fate "
+    "journey underworld spirit dream harvest sea ship storm fire sky moon sun star "
+    "stone tree wolf raven serpent oath gift home family friend city road bridge "
+    "sang wove walked returned promised feared remembered crossed listened answered "
+    "bright silent ancient golden hidden distant quiet brave cunning gentle wise"
+).split()
+
+
+def story(rng: random.Random, words: int) -> str:
+    """Prose-like text with a Zipf word distribution"""
+    weights = [1 / rank for rank in range(1, len(VOCABULARY) + 1)]
+    sentences = []
+    remaining = words
+    while remaining > 0:
+        length = min(rng.randint(8, 20), remaining)
+        sentence = " ".join(rng.choices(VOCABULARY, weights, k=length))
+        sentences.append(sentence.capitalize() + ".")
+        remaining -= length
+    return " ".join(sentences)
+
+
+def sample_myth(rng: random.Random) -> dict:
+    """A distinct myth of realistic size (~900 word story)"""
+    return MythGenerationResponse(
+        title="The Weaver of " + story(rng, 3).rstrip("."),
+        adapted_story=story(rng, STORY_WORDS),
+        choices=[
+            {"id": f"c{i}", "label": story(rng, 5), "outcome": story(rng, 40)}
+            for i in range(1, 4)
+        ],
+        meta={
+            "culture": "greek",
+            "source_motif": "Journey to underworld",
+            "generation_time": 4.2,
+            "ai_model": "gpt-4o-mini",
+        },
+    ).model_dump()
+
+
+def fresh(body: bytes) -> bytes:
+    """A private copy, so entries never share the benchmark's own buffers"""
+    return bytes(bytearray(body))
+
+
+def footprint(build) -> float:
+    """Bytes retained per entry by a cache built from build()"""
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    cache = build()
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert len(cache) == ENTRIES
+    return (after - before) / ENTRIES
+
+
+def decode_cost(entry: CachedBody) -> float:
+    """Mean microseconds to decode one hit"""
+    for _ in range(100):
+        entry.body
+    start = time.perf_counter()
+    for _ in range(HITS):
+        entry.body
+    return (time.perf_counter() - start) / HITS * 1e6
+
+
+def main() -> None:
+    rng = random.Random(7)
+    myths = [sample_myth(rng) for _ in range(ENTRIES)]
+    bodies = [dumps(myth) for myth in myths]
+    now = time.time()
+    mean_body = sum(map(len, bodies)) / ENTRIES
+
+    print(f"{ENTRIES} distinct myths, {mean_body:,.0f} bytes of JSON each on average")
+    print(f"{'representation':<22} {'bytes/myth':>11} {'vs dict':>8} {'decode/hit':>11}")
+
+    dict_bytes = footprint(
+        lambda: {
+            f"k{i}": {"data": loads(body), "timestamp": now}
+            for i, body in enumerate(bodies)
+        }
+    )
+    print(f"{'response.dict()':<22} {dict_bytes:>11,.0f} {1:>7.2f}x {'-':>11}")
+
+    raw_bytes = footprint(
+        lambda: {f"k{i}": {"body": fresh(body), "timestamp": now} for i, body in enumerate(bodies)}
+    )
+    print(f"{'JSON bytes in a dict':<22} {raw_bytes:>11,.0f} {raw_bytes / dict_bytes:>7.2f}x {'-':>11}")
+
+    variants = [("none", 0), ("zlib", 1), ("zlib", 6), ("zlib", 9)]
+    if "zstd" in CODECS:
+        variants += [("zstd", 3), ("zstd", 19)]
+    for codec, level in variants:
+        per_entry = footprint(
+            lambda: {
+                f"k{i}": CachedBody.encode(fresh(body), now, codec, level)
+                for i, body in enumerate(bodies)
+            }
+        )
+        entry = CachedBody.encode(bodies[0], now, codec, level)
+        assert entry.body == bodies[0]
+        name = f"{codec} level {level}" if codec != "none" else "slotted record"
+        print(
+            f"{name:<22} {per_entry:>11,.0f} {per_entry / dict_bytes:>7.2f}x "
+            f"{decode_cost(entry):>8.1f} us"
+        )
+    if "zstd" not in CODECS:
+        print("(install zstandard to include zstd)")
+
+
+if __name__ == "__main__":
+    main()
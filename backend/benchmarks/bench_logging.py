@@ -0,0 +1,105 @@
+"""
+Benchmark for per-request logging overhead on the event loop thread.
+Compares a synchronous stream handler with the queued pipeline, with and
+without sampling, using the log calls of a /generate-myth request.
+
+Run from the backend directory:
+    python -m benchmarks.bench_logging
+"""
+
+import logging
+import os
+import queue
+import tempfile
+import time
+from logging.handlers import QueueListener
+
+os.environ.setdefault("OPENAI_API_KEY", "bench-key")
+
+from app.core.logging import BufferedQueueHandler, SamplingFilter  # noqa: E402
+
+REQUESTS = 20000
+LOG_FORMAT = "[%(asctime)s] %(levelname)s in %(module)s: %(message)s"
+
+
+def log_request_eager(logger: logging.Logger) -> None:
+    """Previous request path: f-strings formatted whether or not the record is kept"""
+    culture, generation_time = "greek", 4.2
+    logger.info(f"Myth generation requested for culture: {culture}")
+    logger.info(f"Myth generated successfully in {generation_time:.2f}s")
+
+
+def log_request_lazy(logger: logging.Logger) -> None:
+    """Current request path: arguments merged only for records that are kept"""
+    culture, generation_time = "greek", 4.2
+    logger.info("Myth generation requested for culture: %s", culture)
+    logger.info("Myth generated successfully in %.2fs", generation_time)
+
+
+class SlowStream:
+    """File stream whose writes block, like stdout into a backed-up log pipe"""
+
+    def __init__(self, stream, delay: float):
+        self.stream = stream
+        self.delay = delay
+
+    def write(self, text: str) -> int:
+        time.sleep(self.delay)
+        return self.stream.write(text)
+
+    def flush(self) -> None:
+        self.stream.flush()
+
+
+def measure(name: str, handler: logging.Handler, func) -> float:
+    """Mean time the caller spends logging for one request"""
+    listener = None
+    if isinstance(handler, BufferedQueueHandler):
+        listener = QueueListener(handler.queue, handler.target)
+        listener.start()
+
+    logger = logging.getLogger(f"bench.{name}")
+    logger.handlers = [handler]
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+    start = time.perf_counter()
+    for _ in range(REQUESTS):
+        func(logger)
+    elapsed = time.perf_counter() - start
+
+    # Drain before the next run so the listener does not compete with it
+    if listener is not None:
+        listener.stop()
+
+    per_request = elapsed / REQUESTS * 1e6
+    print(f"  {name:<22} {per_request:8.2f} us/request")
+    return per_request
+
+
+def queued(target: logging.Handler, rates=None) -> BufferedQueueHandler:
+    handler = BufferedQueueHandler(queue.Queue(maxsize=REQUESTS * 2))
+    handler.target = target
+    if rates:
+        handler.addFilter(SamplingFilter(rates))
+    return handler
+
+
+def main() -> None:
+    formatter = logging.Formatter(LOG_FORMAT, "%Y-%m-%d %H:%M:%S")
+
+    print(f"{REQUESTS} requests, 2 INFO records each")
+    with tempfile.TemporaryFile("w") as output:
+        for label, stream in (("fast sink (file)", output), ("blocking sink (20us writes)", SlowStream(output, 20e-6))):
+            target = logging.StreamHandler(stream)
+            target.setFormatter(formatter)
+
+            print(label)
+            before = measure("sync stream handler", target, log_request_eager)
+            after = measure("queued", queued(target), log_request_lazy)
+            sampled = measure("queued, 10% sampled", queued(target, {"bench": 0.1}), log_request_lazy)
+            print(f"  speedup: {before / after:.1f}x queued, {before / sampled:.1f}x sampled")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark for micro-batched moderation.
+Sends checks at a steady arrival rate to a fake moderation endpoint with a
+fixed latency, one upstream call per check versus the batcher, and reports
+upstream calls made and the latency each check saw.
+
+Run from the backend directory:
+    python -m benchmarks.bench_moderation_batching
+"""
+
+import asyncio
+import os
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault("OPENAI_API_KEY", "bench-key")
+
+from app.services.moderation import ModerationBatcher  # noqa: E402
+
+LATENCY = 0.08  # seconds per moderation call, whatever the batch size
+CHECKS = 400
+
+
+class Endpoint:
+    def __init__(self):
+        self.calls = 0
+
+    def moderate(self, texts):
+        self.calls += 1
+        time.sleep(LATENCY)
+        return [False] * len(texts)
+
+
+async def drive(check, rate: float) -> list:
+    """Issue CHECKS checks with Poisson arrivals at `rate` per second; per-check latency"""
+    rng = random.Random(7)
+    latencies = []
+
+    async def one(i):
+        started = time.perf_counter()
+        await check(f"scenario {i}")
+        latencies.append(time.perf_counter() - started)
+
+    tasks = []
+    for i in range(CHECKS):
+        tasks.append(asyncio.create_task(one(i)))
+        await asyncio.sleep(rng.expovariate(rate))
+    await asyncio.gather(*tasks)
+    return latencies
+
+
+def report(name: str, endpoint: Endpoint, latencies: list) -> None:
+    latencies = sorted(latencies)
+    print(
+        f"{name:<10} {endpoint.calls:5d} upstream calls  "
+        f"p50 {statistics.median(latencies) * 1000:5.1f} ms  "
+        f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:5.1f} ms"
+    )
+
+
+async def main() -> None:
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=256))
+    print(f"{CHECKS} checks, {LATENCY * 1000:.0f} ms per moderation call")
+
+    for rate in (20, 1000):
+        print(f"-- {rate} checks/s")
+        endpoint = Endpoint()
+        latencies = await drive(lambda text: asyncio.to_thread(endpoint.moderate, [text]), rate)
+        report("single", endpoint, latencies)
+
+        endpoint = Endpoint()
+        batcher = ModerationBatcher(endpoint.moderate, window=0.005, max_batch=32)
+        latencies = await drive(batcher.is_flagged, rate)
+        report("batched", endpoint, latencies)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,118 @@
+"""
+Benchmark for ranked motif retrieval on a large synthetic corpus.
+Compares joining every motif of a culture into the prompt with the BM25
+top-k lookup, reporting build time, lookup latency and prompt size.
+
+Run from the backend directory:
+    python -m benchmarks.bench_motif_retrieval
+"""
+
+import os
+import random
+import statistics
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "bench-key")
+
+from app.services.motif_index import MotifIndex  # noqa: E402
+from app.services.myth_utils import analyze_scenario  # noqa: E402
+
+CORPUS_SIZE = 50000
+TOP_K = 3
+QUERIES = 2000
+# Rough English average for OpenAI tokenizers
+CHARS_PER_TOKEN = 4
+
+CULTURES = [
+    "greek", "norse", "indian", "japanese", "egyptian",
+    "celtic", "chinese", "african", "native_american", "mesopotamian",
+]
+
+MOTIF_FRAGMENTS = [
+    "journey to the underworld", "hero aided by a cunning guide", "test by riddles",
+    "tree of worlds", "binding oath", "trickster changes fate", "divine boon and curse",
+    "river as purification", "advice of an elder", "honor and duty", "seasonal change",
+    "ancestor guidance", "death and rebirth", "solar journey", "sacred geometry",
+    "otherworld voyage", "sacred grove", "three-fold blessing", "balance of opposites",
+    "heavenly mandate", "dragon transformation", "animal guide", "community ritual",
+    "vision quest", "harmony with nature", "sacred circle", "flood and renewal",
+    "stolen fire", "forbidden fruit", "shape-shifting messenger", "exile and return",
+    "twin rivals", "gift of the harvest", "journey across the sea", "lost kingdom",
+    "craftsman of the gods", "prophecy of a child", "bargain with death", "loyal hound",
+    "mountain of the gods", "weaver of fate", "city built in a night", "healing spring",
+    "test of hospitality", "starry ladder", "sleeping king", "singing bones", "moving house",
+    "new family", "great feast", "friendship tested by distance", "apprentice surpasses master",
+]
+
+SCENARIOS = [
+    "I'm starting a tech startup that helps elderly people connect with their families through video calls.",
+    "My startup is like Viking exploration, conquering new Nordic markets with innovative technology.",
+    "I am moving across the country to start a new job and leave my friends behind.",
+    "My sister and I keep competing over who will take over the family bakery.",
+]
+
+
+def synthetic_corpus(size: int) -> list:
+    """Seed-shaped motifs built from random fragment combinations"""
+    rng = random.Random(42)
+    corpus = []
+    for index in range(size):
+        fragments = rng.sample(MOTIF_FRAGMENTS, 3)
+        corpus.append({
+            "culture": CULTURES[index % len(CULTURES)],
+            "motif": "; ".join(fragment.capitalize() for fragment in fragments),
+            "description": f"Synthetic motif {index} drawn from public domain retellings",
+        })
+    return corpus
+
+
+def join_all(corpus: list, culture: str) -> str:
+    """Previous behaviour: every motif of the culture in the prompt"""
+    return "; ".join(myth["motif"] for myth in corpus if myth["culture"] == culture)
+
+
+def main() -> None:
+    corpus = synthetic_corpus(CORPUS_SIZE)
+
+    start = time.perf_counter()
+    index = MotifIndex(corpus)
+    build = time.perf_counter() - start
+    print(f"corpus: {CORPUS_SIZE} motifs across {len(CULTURES)} cultures")
+    print(f"index build: {build * 1000:.0f} ms (once, at load time)")
+
+    analyses = [analyze_scenario(scenario) for scenario in SCENARIOS]
+
+    start = time.perf_counter()
+    for _ in range(20):
+        joined = join_all(corpus, "greek")
+    old_latency = (time.perf_counter() - start) / 20
+
+    latencies = []
+    for query in range(QUERIES):
+        analysis = analyses[query % len(analyses)]
+        culture = CULTURES[query % len(CULTURES)]
+        start = time.perf_counter()
+        index.search(culture, analysis.tokens, TOP_K)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+
+    print(f"join all motifs: {old_latency * 1000:8.2f} ms/request")
+    print(
+        f"top-{TOP_K} lookup:    {statistics.mean(latencies) * 1000:8.3f} ms mean, "
+        f"{latencies[int(len(latencies) * 0.95)] * 1000:.3f} ms p95"
+    )
+
+    ranked = "; ".join(index.search("greek", analyses[2].tokens, TOP_K))
+    old_tokens = len(joined) / CHARS_PER_TOKEN
+    new_tokens = len(ranked) / CHARS_PER_TOKEN
+    print(
+        f"motif prompt tokens (~{CHARS_PER_TOKEN} chars/token): "
+        f"{old_tokens:,.0f} -> {new_tokens:,.0f} ({1 - new_tokens / old_tokens:.2%} saved)"
+    )
+    print(f"example top-{TOP_K} for {SCENARIOS[2]!r}:")
+    for motif in index.search("greek", analyses[2].tokens, TOP_K):
+        print(f"  - {motif}")
+
+
+if __name__ == "__main__":
+    main()
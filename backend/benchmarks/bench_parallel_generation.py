@@ -0,0 +1,68 @@
+"""
+Benchmark for the parallel generation strategy.
+Compares wall-clock latency of the single completion with the outline
+call followed by concurrent story and ending calls, against the local
+fake upstream.
+
+Run from the backend directory:
+    python -m benchmarks.bench_parallel_generation
+"""
+
+import asyncio
+import os
+import statistics
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "bench-key")
+os.environ.setdefault("USE_OPENAI_MODERATION", "false")
+
+from app.core.config import settings  # noqa: E402
+from app.models.request import MythGenerationRequest  # noqa: E402
+from app.services.myth_utils import analyze_scenario  # noqa: E402
+from app.services.openai_client import OpenAIService  # noqa: E402
+from app.services.token_budget import TokenUsage  # noqa: E402
+from benchmarks.fake_upstream import FakeUpstream  # noqa: E402
+
+RUNS = 5
+# A fast model: 50 ms to first token, then ~500 tokens/s
+TTFT = 0.05
+PER_TOKEN = 0.002
+
+
+async def measure(strategy: str, service: OpenAIService, upstream: FakeUpstream) -> None:
+    settings.GENERATION_STRATEGY = strategy
+    request = MythGenerationRequest(
+        scenario="I am moving across the country to start a new job and leave my friends behind.",
+        culture="greek",
+        tone="balanced",
+    )
+    analysis = analyze_scenario(request.scenario)
+
+    latencies = []
+    usage = TokenUsage()
+    calls_before = upstream.calls
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        response = await service.generate_myth(request, analysis, usage)
+        latencies.append(time.perf_counter() - start)
+    assert len(response.choices) == 3
+
+    print(
+        f"{strategy:<9} {statistics.mean(latencies) * 1000:8.0f} ms mean  "
+        f"{(upstream.calls - calls_before) / RUNS:.0f} calls  "
+        f"{usage.prompt_tokens / RUNS:6.0f} prompt + {usage.completion_tokens / RUNS:4.0f} completion tokens"
+    )
+
+
+async def main() -> None:
+    upstream = FakeUpstream(ttft=TTFT, per_token=PER_TOKEN)
+    service = OpenAIService()
+    service._client = upstream
+
+    print(f"fake upstream: {TTFT * 1000:.0f} ms TTFT, {PER_TOKEN * 1000:.0f} ms/token, {RUNS} runs")
+    await measure("single", service, upstream)
+    await measure("parallel", service, upstream)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,86 @@
+"""
+Benchmark for per-request scenario processing.
+Compares the previous multi-pass pipeline (sanitize, validate, detect
+culture twice, hash) with the single ScenarioAnalysis pass.
+
+Run from the backend directory:
+    python -m benchmarks.bench_scenario_analysis
+"""
+
+import os
+import re
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "bench-key")
+
+from app.services.myth_utils import (  # noqa: E402
+    CULTURE_KEYWORDS,
+    analyze_scenario,
+    validate_scenario_content,
+)
+
+ITERATIONS = 20000
+
+SCENARIOS = [
+    "I'm starting a tech startup that helps elderly people connect with their families through video calls.",
+    "My startup is like Viking exploration, conquering new Nordic markets with innovative technology.",
+    "Creating a martial arts training platform with Zen principles and samurai discipline in <b>Kyoto</b>.",
+    " ".join(["I am moving across the country to start a new job and leave my friends behind."] * 12),
+]
+
+
+def legacy_pipeline(scenario: str):
+    """Previous per-request work, reproduced from the old helpers"""
+    text = re.sub(r'<[^>]*>', '', scenario)
+    text = re.sub(r'[^\w\s\-.,!?;:()\'""]', '', text)
+    text = text.strip()
+
+    # validate_scenario_content
+    if len(text.strip()) >= 10:
+        lowered = text.lower()
+        for word in ["hate", "violence", "illegal", "harmful", "explicit"]:
+            if word in lowered:
+                break
+
+    # detect_culture, run once in the endpoint path and again in _build_prompt
+    culture = None
+    for _ in range(2):
+        lowered = text.lower()
+        scores = {}
+        for name, keywords in CULTURE_KEYWORDS.items():
+            score = sum(1 for keyword in keywords if keyword in lowered)
+            if score:
+                scores[name] = score
+        culture = max(scores, key=scores.get) if scores else "greek"
+
+    return hash(text + "auto" + "balanced"), culture
+
+
+def single_pass(scenario: str):
+    """Current per-request work"""
+    analysis = analyze_scenario(scenario)
+    validate_scenario_content(analysis)
+    return analysis.digest, analysis.resolve_culture("auto")
+
+
+def measure(name: str, func) -> None:
+    """Report CPU time per request"""
+    for scenario in SCENARIOS:
+        func(scenario)
+
+    start = time.process_time()
+    for i in range(ITERATIONS):
+        func(SCENARIOS[i % len(SCENARIOS)])
+    elapsed = time.process_time() - start
+
+    print(f"{name:<11} {elapsed / ITERATIONS * 1e6:8.2f} us CPU/request")
+
+
+def main() -> None:
+    print(f"{ITERATIONS} requests over {len(SCENARIOS)} scenarios")
+    measure("multi-pass", legacy_pipeline)
+    measure("single-pass", single_pass)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Benchmark for the adaptive upstream concurrency limiter.
+Simulates a provider that accepts a fixed number of concurrent calls and
+answers 429 with Retry-After above it, then sends a burst of callers at
+it with and without the AIMD limiter.
+
+Run from the backend directory:
+    python -m benchmarks.bench_upstream_limiter
+"""
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+os.environ.setdefault("OPENAI_API_KEY", "bench-key")
+
+from app.services.upstream_limiter import AIMDLimiter  # noqa: E402
+
+CAPACITY = 12  # concurrent calls the provider accepts
+LATENCY = 0.05  # seconds per accepted call
+RETRY_AFTER = "0.2"
+CALLERS = 48
+CALLS = 400
+
+
+class RateLimited(Exception):
+    status_code = 429
+
+    def __init__(self):
+        super().__init__("429 Too Many Requests")
+        self.response = SimpleNamespace(headers={"retry-after": RETRY_AFTER})
+
+
+class Provider:
+    """Accepts CAPACITY concurrent calls, throttles the rest"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = 0
+        self.accepted = 0
+        self.throttled = 0
+
+    def call(self) -> str:
+        with self.lock:
+            if self.active >= CAPACITY:
+                self.throttled += 1
+                raise RateLimited()
+            self.active += 1
+        time.sleep(LATENCY)
+        with self.lock:
+            self.active -= 1
+            self.accepted += 1
+        return "ok"
+
+
+async def drive(call) -> tuple:
+    """Run CALLS calls from CALLERS concurrent callers; (failures, seconds)"""
+    remaining = iter(range(CALLS))
+    failures = 0
+
+    async def caller():
+        nonlocal failures
+        for _ in remaining:
+            try:
+                await call()
+            except Exception:
+                failures += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(caller() for _ in range(CALLERS)))
+    return failures, time.perf_counter() - start
+
+
+def report(name: str, provider: Provider, failures: int, elapsed: float, extra: str = "") -> None:
+    print(
+        f"{name:<12} {provider.accepted:4d} ok  {failures:4d} failed  "
+        f"{provider.throttled:5d} 429s sent upstream  {elapsed:5.2f} s{extra}"
+    )
+
+
+async def main() -> None:
+    # Enough threads that the provider, not the default pool, is the bottleneck
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=CALLERS))
+    print(f"provider capacity {CAPACITY}, {LATENCY * 1000:.0f} ms/call; {CALLERS} callers, {CALLS} calls")
+
+    # Previous behaviour: every caller goes straight to the provider and fails on 429
+    provider = Provider()
+    failures, elapsed = await drive(lambda: asyncio.to_thread(provider.call))
+    report("unlimited", provider, failures, elapsed)
+
+    provider = Provider()
+    limiter = AIMDLimiter(
+        initial=8, minimum=1, maximum=64, increase=1.0, decrease=0.5,
+        max_retries=3, backoff_base=0.05, backoff_max=1.0, deadline=30.0,
+    )
+    failures, elapsed = await drive(lambda: limiter.run(provider.call))
+    report("AIMD", provider, failures, elapsed, f"  final limit {limiter.limit:.1f}")
+    print(f"limiter stats: {limiter.stats()}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
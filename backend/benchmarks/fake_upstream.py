@@ -0,0 +1,76 @@
+"""
+Local fake of the OpenAI client for benchmarks.
+Answers chat completions with well-formed myth JSON after a simulated
+time-to-first-token plus a per-output-token delay, so latency scales
+with how much each call has to write.
+"""
+
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+# Output sizes in tokens, roughly what the real model writes
+STORY_TOKENS = 700
+OUTCOME_TOKENS = 80
+OUTLINE_TOKENS = 120
+TITLE_TOKENS = 40
+
+
+def _words(count: int) -> str:
+    return " ".join(["myth"] * count)
+
+
+class FakeCompletions:
+    """chat.completions with simulated streaming latency"""
+
+    def __init__(self, upstream: "FakeUpstream"):
+        self.upstream = upstream
+
+    def create(self, model, messages, max_tokens, temperature, response_format=None, **kwargs):
+        prompt = messages[-1]["content"]
+        content, output_tokens = self.upstream.answer(prompt)
+        output_tokens = min(output_tokens, max_tokens)
+
+        with self.upstream.lock:
+            self.upstream.calls += 1
+        time.sleep(self.upstream.ttft + output_tokens * self.upstream.per_token)
+
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+            usage=SimpleNamespace(prompt_tokens=len(prompt) // 4, completion_tokens=output_tokens),
+        )
+
+
+class FakeUpstream:
+    """Drop-in replacement for the OpenAI client object"""
+
+    def __init__(self, ttft: float = 0.05, per_token: float = 0.002):
+        self.ttft = ttft
+        self.per_token = per_token
+        self.calls = 0
+        self.lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=FakeCompletions(self))
+        self.moderations = SimpleNamespace(
+            create=lambda input: SimpleNamespace(results=[SimpleNamespace(flagged=False)])
+        )
+
+    def answer(self, prompt: str):
+        """Content and output size for the kind of call the prompt asks for"""
+        choices = [{"id": f"c{i}", "label": f"Path {i}"} for i in range(1, 4)]
+        meta = {"culture": "greek", "source_motif": "Journey to underworld"}
+
+        if '"outline"' in prompt:
+            plan = {"title": "The Weaver", "outline": ["beat"] * 6, "choices": choices, "meta": meta}
+            return json.dumps(plan), OUTLINE_TOKENS
+        if '"choices"' in prompt:
+            myth = {
+                "title": "The Weaver",
+                "adapted_story": _words(STORY_TOKENS),
+                "choices": [dict(choice, outcome=_words(OUTCOME_TOKENS)) for choice in choices],
+                "meta": meta,
+            }
+            return json.dumps(myth), TITLE_TOKENS + STORY_TOKENS + 3 * OUTCOME_TOKENS
+        if '"adapted_story"' in prompt:
+            return json.dumps({"adapted_story": _words(STORY_TOKENS)}), STORY_TOKENS
+        return json.dumps({"outcome": _words(OUTCOME_TOKENS)}), OUTCOME_TOKENS
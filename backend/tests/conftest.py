@@ -0,0 +1,32 @@
+"""
+Shared test fixtures.
+Run with LOOP_BLOCK_FAIL_MS=<ms> to fail every test whose requests block
+the event loop for longer than that. Garbage collection pauses and the
+first request to each endpoint (cold imports and lazy setup) are excluded.
+"""
+
+import pytest
+
+from app.core.config import settings
+from app.core.loop_monitor import blocking_detector
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "allow_blocking: request handlers in this test may block the event loop on purpose"
+    )
+
+
+@pytest.fixture(autouse=True)
+def fail_on_blocking_requests(request):
+    """Fail the test when a request handler held the event loop past the limit"""
+    if settings.LOOP_BLOCK_FAIL_MS <= 0 or request.node.get_closest_marker("allow_blocking"):
+        yield
+        return
+
+    blocking_detector.install(settings.LOOP_BLOCK_FAIL_MS)
+    blocking_detector.take()
+    yield
+    violations = blocking_detector.take()
+    if violations:
+        pytest.fail("Event loop blocked by a request:\n" + "\n".join(violations), pytrace=False)
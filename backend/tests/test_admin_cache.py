@@ -0,0 +1,154 @@
+"""
+Test cases for the admin cache management endpoints.
+"""
+
+import time
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.v1 import admin
+from app.core.config import settings
+from app.main import app
+from app.services import response_cache
+from app.services.jobs import JobQueueFull
+from app.services.response_cache import CachedBody, cache_report, invalidate, lookup_body, store_body
+
+local_client = TestClient(app, base_url="http://localhost")
+
+BODY = b'{"adapted_story":"' + b"the weaver sang to the loom " * 20 + b'"}'
+HEADERS = {"X-Admin-Token": "secret"}
+
+
+@pytest.fixture(autouse=True)
+def seeded_cache():
+    """Three entries across cultures, tones and template versions"""
+    response_cache.response_cache.clear()
+    store_body("greek:balanced:1:aaa", BODY)
+    store_body("greek:playful:2:bbb", BODY)
+    store_body("norse:balanced:2:ccc", BODY)
+    with patch.object(settings, "ADMIN_TOKEN", "secret"), patch.object(admin, "cache_snapshotter", None):
+        yield
+    response_cache.response_cache.clear()
+
+
+class TestInvalidation:
+    """Test selecting entries by key part"""
+
+    @pytest.mark.parametrize("filters, remaining", [
+        ({"culture": "greek"}, {"norse:balanced:2:ccc"}),
+        ({"tone": "balanced"}, {"greek:playful:2:bbb"}),
+        ({"template_version": "2"}, {"greek:balanced:1:aaa"}),
+        ({"key_prefix": "greek:p"}, {"greek:balanced:1:aaa", "norse:balanced:2:ccc"}),
+        ({"culture": "greek", "template_version": "2"}, {"greek:balanced:1:aaa", "norse:balanced:2:ccc"}),
+        ({"key_prefix": ""}, set()),
+    ])
+    def test_filters(self, filters, remaining):
+        """Test that only entries matching every filter are dropped"""
+        assert invalidate(**filters) == 3 - len(remaining)
+        assert set(response_cache.response_cache) == remaining
+
+    def test_keys_without_template_version(self):
+        """Test that keys from before versioning match on culture and tone"""
+        store_body("celtic:serious:ddd", BODY)
+        assert invalidate(culture="celtic", tone="serious") == 1
+        assert invalidate(template_version="") == 0
+
+
+class TestReport:
+    """Test the cache statistics"""
+
+    def test_top_keys_and_age_histogram(self):
+        """Test that keys are ranked by hits and bucketed by age"""
+        response_cache.response_cache["norse:balanced:2:ccc"] = CachedBody.encode(BODY, time.time() - 7200)
+        for _ in range(3):
+            lookup_body("greek:playful:2:bbb")
+        lookup_body("greek:balanced:1:aaa")
+
+        report = cache_report(top=2)
+        assert [item["key"] for item in report["top_keys"]] == ["greek:playful:2:bbb", "greek:balanced:1:aaa"]
+        assert report["top_keys"][0]["hits"] == 3
+        assert report["entries"] == 3
+        assert report["stale_entries"] == 1
+        assert report["age_histogram"]["<5m"] == 2
+        assert report["age_histogram"]["<6h"] == 1
+        assert report["bytes"] > 0
+
+
+class TestEndpoints:
+    """Test the admin routes"""
+
+    def test_requires_admin_token(self):
+        """Test that cache management is refused without the token"""
+        assert local_client.get("/api/v1/admin/cache").status_code == 403
+        assert local_client.post("/api/v1/admin/cache/invalidate", json={"key_prefix": ""}).status_code == 403
+        assert len(response_cache.response_cache) == 3
+
+    def test_statistics_cover_every_tier(self):
+        """Test that stats report each cache tier"""
+        response = local_client.get("/api/v1/admin/cache?top=1", headers=HEADERS)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["response_cache"]["entries"] == 3
+        assert len(data["response_cache"]["top_keys"]) == 1
+        assert {"snapshot", "moderation_cache", "myth_store", "prerender"} <= set(data)
+
+    def test_invalidate(self):
+        """Test invalidation by culture through the API"""
+        response = local_client.post("/api/v1/admin/cache/invalidate", json={"culture": "greek"}, headers=HEADERS)
+
+        assert response.status_code == 200
+        assert response.json()["removed"] == 2
+        assert set(response_cache.response_cache) == {"norse:balanced:2:ccc"}
+
+    def test_invalidate_requires_a_filter(self):
+        """Test that an empty body does not wipe the cache"""
+        response = local_client.post("/api/v1/admin/cache/invalidate", json={}, headers=HEADERS)
+        assert response.status_code == 400
+        assert len(response_cache.response_cache) == 3
+
+    def test_invalidate_rewrites_snapshot(self, tmp_path):
+        """Test that invalidated entries are not restored after a restart"""
+        from app.services.cache_snapshot import CacheSnapshotter, read_snapshot
+
+        path = tmp_path / "cache.snap"
+        snapshotter = CacheSnapshotter(response_cache.response_cache, str(path), interval=0, ttl=3600)
+        with patch.object(admin, "cache_snapshotter", snapshotter):
+            local_client.post("/api/v1/admin/cache/invalidate", json={"template_version": "2"}, headers=HEADERS)
+
+        assert [key for key, _ in read_snapshot(path, ttl=3600)] == ["greek:balanced:1:aaa"]
+
+    def test_warm_up_queues_uncached_scenarios(self):
+        """Test that warm-up skips cached, duplicate and invalid scenarios"""
+        submit = AsyncMock(return_value=type("Job", (), {"id": "job-1"})())
+        scenarios = [
+            "My landlord raised the rent again and I cannot sleep",
+            "My landlord raised the rent again and I cannot sleep",
+            "short",
+            "My neighbour plays drums at night and the walls shake",
+        ]
+        with patch.object(admin.job_runner, "submit", submit), \
+             patch.object(admin, "is_fresh", side_effect=[False, True]):
+            response = local_client.post(
+                "/api/v1/admin/cache/warm", json={"scenarios": scenarios, "culture": "greek"}, headers=HEADERS
+            )
+
+        assert response.status_code == 202
+        data = response.json()
+        assert (data["queued"], data["cached"], data["duplicates"], data["rejected"]) == (1, 1, 1, 1)
+        assert data["jobs"] == ["job-1"]
+        assert submit.await_args.args[0].culture == "greek"
+
+    def test_warm_up_stops_when_queue_is_full(self):
+        """Test that warm-up reports scenarios it could not queue"""
+        scenarios = [f"My neighbour plays drums at night, week {i}" for i in range(3)]
+        with patch.object(admin.job_runner, "submit", AsyncMock(side_effect=JobQueueFull("full"))):
+            response = local_client.post("/api/v1/admin/cache/warm", json={"scenarios": scenarios}, headers=HEADERS)
+
+        assert response.json()["queue_full"] == 3
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
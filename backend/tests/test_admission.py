@@ -0,0 +1,125 @@
+"""
+Test cases for admission control and load shedding.
+"""
+
+import asyncio
+import pytest
+
+from app.services.admission import AdmissionController, AdmissionRejected
+
+
+async def hold_slot(controller: AdmissionController, release: asyncio.Event):
+    """Occupy a slot until release is set"""
+    async with controller.slot():
+        await release.wait()
+
+
+class TestAdmissionController:
+    """Test slot accounting, queueing and shedding"""
+    
+    def test_admits_up_to_limit(self):
+        """Test that requests under the limit are admitted immediately"""
+        async def run():
+            controller = AdmissionController(limit=2, max_queue=0, max_wait=1)
+            await controller.acquire()
+            await controller.acquire()
+            assert controller.in_flight == 2
+            controller.release()
+            controller.release()
+            return controller
+        
+        controller = asyncio.run(run())
+        assert controller.in_flight == 0
+        assert controller.admitted == 2
+    
+    def test_sheds_when_queue_full(self):
+        """Test that a request beyond limit and queue is shed at once"""
+        async def run():
+            controller = AdmissionController(limit=1, max_queue=0, max_wait=1)
+            release = asyncio.Event()
+            holder = asyncio.create_task(hold_slot(controller, release))
+            await asyncio.sleep(0)
+            with pytest.raises(AdmissionRejected) as exc_info:
+                await controller.acquire()
+            release.set()
+            await holder
+            return controller, exc_info.value
+        
+        controller, error = asyncio.run(run())
+        assert error.reason == "queue full"
+        assert error.retry_after >= 1
+        assert controller.shed_queue_full == 1
+        assert controller.in_flight == 0
+    
+    def test_queued_request_gets_slot(self):
+        """Test that a waiter is handed the slot when it is released"""
+        async def run():
+            controller = AdmissionController(limit=1, max_queue=1, max_wait=1)
+            release = asyncio.Event()
+            holder = asyncio.create_task(hold_slot(controller, release))
+            await asyncio.sleep(0)
+            waiter = asyncio.create_task(controller.acquire())
+            await asyncio.sleep(0)
+            assert controller.queue_depth == 1
+            release.set()
+            await holder
+            await waiter
+            assert controller.in_flight == 1
+            controller.release()
+            return controller
+        
+        controller = asyncio.run(run())
+        assert controller.in_flight == 0
+        assert controller.queued == 1
+        assert controller.admitted == 2
+    
+    def test_sheds_after_max_wait(self):
+        """Test that a waiter gives up after the queue timeout"""
+        async def run():
+            controller = AdmissionController(limit=1, max_queue=1, max_wait=0.05)
+            release = asyncio.Event()
+            holder = asyncio.create_task(hold_slot(controller, release))
+            await asyncio.sleep(0)
+            with pytest.raises(AdmissionRejected) as exc_info:
+                await controller.acquire()
+            release.set()
+            await holder
+            return controller, exc_info.value
+        
+        controller, error = asyncio.run(run())
+        assert error.reason == "queue timeout"
+        assert controller.shed_timeout == 1
+        assert controller.queue_depth == 0
+        assert controller.in_flight == 0
+        assert controller.stats()["wait_time_max"] >= 0.05
+    
+    def test_cancelled_waiter_leaves_queue(self):
+        """Test that a disconnected client does not leak a slot"""
+        async def run():
+            controller = AdmissionController(limit=1, max_queue=1, max_wait=5)
+            release = asyncio.Event()
+            holder = asyncio.create_task(hold_slot(controller, release))
+            await asyncio.sleep(0)
+            waiter = asyncio.create_task(controller.acquire())
+            await asyncio.sleep(0)
+            waiter.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await waiter
+            release.set()
+            await holder
+            return controller
+        
+        controller = asyncio.run(run())
+        assert controller.queue_depth == 0
+        assert controller.in_flight == 0
+    
+    def test_saturated(self):
+        """Test the saturation flag used by readiness"""
+        controller = AdmissionController(limit=1, max_queue=0, max_wait=1)
+        assert controller.saturated is False
+        controller.in_flight = 1
+        assert controller.saturated is True
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
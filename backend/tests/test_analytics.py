@@ -0,0 +1,204 @@
+"""
+Test cases for the analytics event sink and its reports.
+"""
+
+import asyncio
+import sqlite3
+import time
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.models.request import MythGenerationRequest, MythGenerationResponse
+from app.services import generation
+from app.services.admission import AdmissionRejected
+from app.services.analytics import (
+    AnalyticsSink,
+    culture_mix,
+    generation_event,
+    latency_by_hour,
+    main,
+    outcome_mix,
+    top_scenarios,
+)
+from app.services.myth_utils import analyze_scenario
+
+SCENARIO = "My sister keeps borrowing my car without asking"
+MYTH = {
+    "title": "The Borrowed Chariot",
+    "adapted_story": "Long ago...",
+    "choices": [{"id": f"c{i}", "label": "Path", "outcome": "Ending."} for i in range(1, 4)],
+    "meta": {"culture": "greek", "source_motif": "Helios' chariot", "ai_model": "gpt-4o-mini"},
+}
+
+
+def event(scenario=SCENARIO, culture="greek", outcome="generated", latency=1.0):
+    request = MythGenerationRequest(scenario=scenario, culture=culture)
+    return generation_event(request, analyze_scenario(scenario), "sync", outcome, latency)
+
+
+def make_sink(tmp_path, capacity=100, flush_interval=60.0, flush_batch=50) -> AnalyticsSink:
+    return AnalyticsSink(str(tmp_path / "events.db"), capacity, flush_interval, flush_batch)
+
+
+def stored(tmp_path) -> list:
+    conn = sqlite3.connect(tmp_path / "events.db")
+    rows = conn.execute("SELECT culture, outcome, latency_ms FROM events ORDER BY ts").fetchall()
+    conn.close()
+    return rows
+
+
+class TestAnalyticsSink:
+    """Test buffering and bulk flushing"""
+
+    def test_full_batch_is_flushed_without_waiting_for_the_timer(self, tmp_path):
+        """Test that reaching the batch size wakes the flusher"""
+        sink = make_sink(tmp_path, flush_batch=3)
+
+        async def scenario():
+            sink.start()
+            for _ in range(3):
+                sink.record(event())
+            await asyncio.sleep(0.2)
+            written = sink.written
+            await sink.stop()
+            return written
+
+        assert asyncio.run(scenario()) == 3
+        assert stored(tmp_path) == [("greek", "generated", 1000.0)] * 3
+        assert sink.stats()["flushes"] == 1
+
+    def test_stop_writes_remaining_events(self, tmp_path):
+        """Test that a partial batch is written on shutdown"""
+        sink = make_sink(tmp_path)
+
+        async def scenario():
+            sink.start()
+            sink.record(event(culture="norse"))
+            await sink.stop()
+
+        asyncio.run(scenario())
+        assert [row[0] for row in stored(tmp_path)] == ["norse"]
+
+    def test_stop_lets_an_in_flight_write_finish(self, tmp_path):
+        """Test that shutdown never overlaps a running write or closes under it"""
+        sink = make_sink(tmp_path, flush_batch=2)
+        write = sink._write
+        active = []
+
+        def slow_write(events):
+            active.append(len(active))
+            assert len(active) == 1
+            time.sleep(0.2)
+            write(events)
+            active.pop()
+
+        async def scenario():
+            sink.start()
+            sink.record(event(culture="greek"))
+            sink.record(event(culture="norse"))
+            await asyncio.sleep(0.05)
+            sink.record(event(culture="celtic"))
+            await sink.stop()
+
+        with patch.object(sink, "_write", slow_write):
+            asyncio.run(scenario())
+        assert [row[0] for row in stored(tmp_path)] == ["greek", "norse", "celtic"]
+        assert sink.stats()["dropped"] == 0
+
+    def test_ring_buffer_drops_oldest_events(self, tmp_path):
+        """Test that a full buffer keeps the newest events and counts the rest"""
+        sink = make_sink(tmp_path, capacity=2)
+        for culture in ("greek", "norse", "celtic"):
+            sink.record(event(culture=culture))
+
+        assert asyncio.run(sink.flush()) == 2
+        assert [row[0] for row in stored(tmp_path)] == ["norse", "celtic"]
+        assert sink.stats()["dropped"] == 1
+
+    def test_failed_flush_is_dropped_and_counted(self, tmp_path):
+        """Test that a write failure never reaches the caller"""
+        sink = AnalyticsSink(str(tmp_path), capacity=10, flush_interval=60.0, flush_batch=10)
+        sink.record(event())
+        assert asyncio.run(sink.flush()) == 0
+        assert sink.stats()["dropped"] == 1
+
+
+class TestReports:
+    """Test the queries behind the CLI"""
+
+    @pytest.fixture
+    def conn(self, tmp_path):
+        sink = make_sink(tmp_path)
+        for _ in range(3):
+            sink.record(event(culture="norse", latency=2.0))
+        sink.record(event(scenario="A dragon guards the office coffee machine", outcome="hit", latency=0.01))
+        asyncio.run(sink.flush())
+        conn = sqlite3.connect(tmp_path / "events.db")
+        yield conn
+        conn.close()
+
+    def test_top_scenarios(self, conn):
+        """Test that scenarios are ranked by request count"""
+        rows = top_scenarios(conn, since=0, limit=10)
+        assert rows[0] == (3, "norse", SCENARIO)
+        assert len(rows) == 2
+
+    def test_culture_and_outcome_mix(self, conn):
+        """Test shares by culture and by outcome"""
+        assert culture_mix(conn, since=0)[0] == ("norse", 3, 0.75)
+        assert dict((outcome, count) for outcome, count, _ in outcome_mix(conn, since=0)) == {
+            "generated": 3,
+            "hit": 1,
+        }
+
+    def test_latency_by_hour_separates_hits(self, conn):
+        """Test per-hour percentiles for hits and misses"""
+        rows = latency_by_hour(conn, since=0)
+        assert [(kind, count, p50) for _, kind, count, p50, _, _ in rows] == [("miss", 3, 2000.0), ("hit", 1, 10.0)]
+
+    def test_cli(self, conn, tmp_path, capsys):
+        """Test that the CLI prints a report"""
+        main(["cultures", "--db", str(tmp_path / "events.db")])
+        assert "norse" in capsys.readouterr().out
+
+
+class TestPipelineEvents:
+    """Test events recorded by the generation pipeline"""
+
+    @pytest.fixture
+    def sink(self, tmp_path):
+        sink = make_sink(tmp_path)
+        with patch.object(generation, "analytics_sink", sink):
+            yield sink
+
+    def run(self, response=None, error=None):
+        request = MythGenerationRequest(scenario=SCENARIO, culture="auto")
+        model = AsyncMock(return_value=response, side_effect=error)
+        with patch.object(generation.openai_service, "generate_myth", model):
+            return asyncio.run(
+                generation.generate_and_cache(request, analyze_scenario(SCENARIO), "analytics-test", source="job")
+            )
+
+    def test_generation_is_recorded(self, sink):
+        """Test that a generated myth records its model and source"""
+        self.run(MythGenerationResponse(**MYTH))
+        asyncio.run(sink.flush())
+        conn = sqlite3.connect(sink.path)
+        assert conn.execute("SELECT source, outcome, model FROM events").fetchall() == [
+            ("job", "generated", "gpt-4o-mini")
+        ]
+
+    def test_fallback_and_shedding_are_recorded(self, sink):
+        """Test that degraded and rejected generations are told apart"""
+        fallback = dict(MYTH, meta=dict(MYTH["meta"], ai_model="procedural"))
+        self.run(MythGenerationResponse(**fallback))
+        with pytest.raises(AdmissionRejected):
+            self.run(error=AdmissionRejected("queue full", 1))
+        asyncio.run(sink.flush())
+        conn = sqlite3.connect(sink.path)
+        assert [row[0] for row in conn.execute("SELECT outcome FROM events ORDER BY ts")] == ["fallback", "shed"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
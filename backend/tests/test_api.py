@@ -2,16 +2,45 @@
 Test cases for the MythWeaver API endpoints.
 """
 
+import asyncio
 import pytest
 import json
 from fastapi.testclient import TestClient
 from unittest.mock import patch, Mock
 
 from app.main import app
+from app.api.v1 import generate
 from app.models.request import MythGenerationResponse, MythMetadata
+from app.services.admission import admission_controller
+from app.services.dependency_health import ProbeResult, dependency_monitor
+from app.services.openai_client import openai_service
+from app.services.token_budget import MemoryBudgetStore, TokenBudget, TokenUsage
+from app.services.response_cache import response_cache
 
 client = TestClient(app)
 
+# TrustedHostMiddleware rejects the default "testserver" host
+local_client = TestClient(app, base_url="http://localhost")
+
+
+def build_myth_response(culture: str = "greek") -> MythGenerationResponse:
+    """Build a valid myth response for endpoint tests"""
+    return MythGenerationResponse(
+        title="The Digital Sage",
+        adapted_story="In ancient times a wise sage transformed every tale into wisdom.",
+        choices=[
+            {"id": "c1", "label": "Seek Wisdom", "outcome": "Counsel is found."},
+            {"id": "c2", "label": "Trust Instinct", "outcome": "A new path emerges."},
+            {"id": "c3", "label": "Unite Others", "outcome": "Strength is found."},
+        ],
+        meta=MythMetadata(
+            culture=culture,
+            source_motif="Hero's journey pattern",
+            generation_time=1.5,
+            ai_model="gpt-4o-mini"
+        )
+    )
+
 
 class TestHealthEndpoint:
     """Test cases for health check endpoint"""
@@ -26,6 +55,70 @@ class TestHealthEndpoint:
         assert "version" in data
         assert "timestamp" in data
         assert "environment" in data
+    
+    def test_liveness_is_silent(self, caplog):
+        """Test liveness returns a constant body without logging"""
+        with caplog.at_level("DEBUG"):
+            response = local_client.get("/api/v1/health/live")
+        
+        assert response.status_code == 200
+        assert response.json() == {"status": "alive"}
+        assert not [r for r in caplog.records if r.name.startswith("app.")]
+    
+    def test_liveness_head(self):
+        """Test liveness answers HEAD requests"""
+        response = local_client.head("/api/v1/health/live")
+        assert response.status_code == 200
+
+
+class TestReadinessEndpoint:
+    """Test cases for the readiness endpoint"""
+    
+    @pytest.fixture(autouse=True)
+    def reset_monitor(self):
+        """Restore cached probe results and in-flight count"""
+        saved_results = dict(dependency_monitor.results)
+        saved_probes = dict(dependency_monitor.probes)
+        dependency_monitor.probes = {"upstream_model": Mock(), "database": Mock()}
+        dependency_monitor.results.clear()
+        yield
+        dependency_monitor.probes = saved_probes
+        dependency_monitor.results = saved_results
+        admission_controller.in_flight = 0
+    
+    def test_ready_before_first_probe(self):
+        """Test that unprobed dependencies are reported as unknown"""
+        response = local_client.get("/api/v1/health/ready")
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["status"] == "ready"
+        assert data["checks"]["database"] == {"healthy": None}
+    
+    def test_degraded_when_dependency_down(self):
+        """Test that a failed probe degrades readiness without failing it"""
+        dependency_monitor.results["upstream_model"] = ProbeResult(False, 12.0, 0, "timeout")
+        dependency_monitor.results["database"] = ProbeResult(True, 1.0, 0)
+        
+        response = local_client.get("/api/v1/health/ready")
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["status"] == "degraded"
+        assert data["checks"]["upstream_model"]["error"] == "timeout"
+        assert data["checks"]["database"]["healthy"] is True
+    
+    def test_saturation_signal(self):
+        """Test that readiness fails once slots and queue are exhausted"""
+        admission_controller.in_flight = admission_controller.limit
+        
+        with patch.object(admission_controller, "max_queue", 0):
+            response = local_client.get("/api/v1/health/ready")
+        
+        assert response.status_code == 503
+        data = response.json()
+        assert data["status"] == "saturated"
+        assert data["saturation"]["ratio"] == 1.0
 
 
 class TestGenerateMythEndpoint:
@@ -159,6 +252,327 @@ class TestGenerateMythEndpoint:
         assert 429 in responses or any(status >= 400 for status in responses[-5:])
 
 
+class TestMythEndpoint:
+    """Test content-addressed myth URLs"""
+    
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        """Start every test with an empty response cache"""
+        response_cache.clear()
+        yield
+        response_cache.clear()
+    
+    def create_myth(self):
+        """Generate a myth and return the POST response"""
+        request_data = {
+            "scenario": "My grandmother taught the whole village to bake bread at dawn.",
+            "culture": "greek",
+            "tone": "balanced"
+        }
+        with patch('app.services.openai_client.openai_service.generate_myth') as mock_generate:
+            mock_generate.return_value = build_myth_response()
+            return local_client.post("/api/v1/generate-myth", json=request_data)
+    
+    def test_generate_links_shareable_url(self):
+        """Test that generation points at the myth's GET URL"""
+        created = self.create_myth()
+        
+        location = created.headers["content-location"]
+        assert location.startswith("/api/v1/myths/")
+        assert created.headers["etag"] == f'"{location.rsplit("/", 1)[1]}"'
+    
+    def test_myth_is_stored_once(self):
+        """Test that a miss stores the myth once and hits reuse its id without hashing"""
+        from app.services import myth_store as myth_store_module
+        
+        with patch.object(myth_store_module, "myth_id", wraps=myth_store_module.myth_id) as hashed:
+            created = self.create_myth()
+            assert hashed.call_count == 1
+            hit = self.create_myth()
+            assert hashed.call_count == 1
+        
+        assert hit.content == created.content
+        assert hit.headers["content-location"] == created.headers["content-location"]
+    
+    def test_get_myth_with_caching_headers(self):
+        """Test that a stored myth is served with strong validators"""
+        created = self.create_myth()
+        
+        response = local_client.get(created.headers["content-location"], headers={"Accept-Encoding": "identity"})
+        
+        assert response.status_code == 200
+        assert response.content == created.content
+        assert response.headers["etag"] == created.headers["etag"]
+        assert "immutable" in response.headers["cache-control"]
+        assert "last-modified" in response.headers
+        assert "content-encoding" not in response.headers
+    
+    def test_if_none_match_returns_304(self):
+        """Test that a matching ETag is answered without a body"""
+        created = self.create_myth()
+        
+        response = local_client.get(
+            created.headers["content-location"],
+            headers={"If-None-Match": created.headers["etag"]},
+        )
+        
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == created.headers["etag"]
+    
+    def test_if_modified_since_returns_304(self):
+        """Test that a myth older than If-Modified-Since is not resent"""
+        created = self.create_myth()
+        url = created.headers["content-location"]
+        last_modified = local_client.get(url).headers["last-modified"]
+        
+        response = local_client.get(url, headers={"If-Modified-Since": last_modified})
+        
+        assert response.status_code == 304
+    
+    def test_gzip_when_accepted(self):
+        """Test that the app compresses large myths for gzip clients"""
+        created = self.create_myth()
+        
+        with patch.object(generate.settings, "MYTH_GZIP_MIN_SIZE", 0):
+            response = local_client.get(created.headers["content-location"], headers={"Accept-Encoding": "gzip"})
+        
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert response.content == created.content
+    
+    def test_unknown_myth_returns_404(self):
+        """Test that unknown and malformed ids are not found"""
+        assert local_client.get("/api/v1/myths/" + "0" * 32).status_code == 404
+        assert local_client.get("/api/v1/myths/not-an-id").status_code == 404
+
+
+class TestTokenBudgetEndpoint:
+    """Test token budget enforcement on generation"""
+    
+    @pytest.fixture(autouse=True)
+    def fresh_budget(self):
+        """Use an isolated budget and an empty response cache"""
+        response_cache.clear()
+        budget = TokenBudget(MemoryBudgetStore(), per_minute=1000, per_day=0)
+        with patch.object(generate, "token_budget", budget), \
+             patch("app.api.v1.budget.token_budget", budget), \
+             patch("app.services.generation.token_budget", budget):
+            yield budget
+        response_cache.clear()
+    
+    def test_generation_is_charged(self, fresh_budget):
+        """Test that upstream token usage is charged to the caller"""
+        request_data = {
+            "scenario": "I am teaching my younger brother how to ride a bicycle.",
+            "culture": "greek",
+            "tone": "balanced"
+        }
+        
+        async def fake_generate(request, analysis, usage):
+            usage.prompt_tokens, usage.completion_tokens = 400, 200
+            return build_myth_response()
+        
+        with patch('app.services.openai_client.openai_service.generate_myth', side_effect=fake_generate):
+            response = local_client.post("/api/v1/generate-myth", json=request_data)
+        
+        assert response.status_code == 200
+        budget = local_client.get("/api/v1/budget").json()
+        assert budget["windows"]["minute"]["used"] == 600
+        assert budget["windows"]["minute"]["remaining"] == 400
+    
+    def test_spent_budget_returns_429(self, fresh_budget):
+        """Test that a client over budget is throttled before generating"""
+        client_id = local_client.get("/api/v1/budget").json()["client"]
+        usage = TokenUsage()
+        usage.completion_tokens = 1000
+        asyncio.run(fresh_budget.charge(client_id, usage))
+        request_data = {
+            "scenario": "I am teaching my younger brother how to ride a bicycle.",
+            "culture": "greek",
+            "tone": "balanced"
+        }
+        
+        with patch('app.services.openai_client.openai_service.generate_myth') as mock_generate:
+            response = local_client.post("/api/v1/generate-myth", json=request_data)
+        
+        assert response.status_code == 429
+        assert int(response.headers["retry-after"]) >= 1
+        mock_generate.assert_not_called()
+
+
+class TestResponseCache:
+    """Test the pre-serialized response cache"""
+    
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        """Start every test with an empty cache"""
+        response_cache.clear()
+        yield
+        response_cache.clear()
+    
+    def test_cache_hit_returns_stored_bytes(self):
+        """Test that a cache hit serves the stored body without regenerating"""
+        request_data = {
+            "scenario": "I am organising a neighbourhood book club for retired teachers.",
+            "culture": "greek",
+            "tone": "balanced"
+        }
+        
+        with patch('app.services.openai_client.openai_service.generate_myth') as mock_generate:
+            mock_generate.return_value = build_myth_response()
+            
+            first = local_client.post("/api/v1/generate-myth", json=request_data)
+            second = local_client.post("/api/v1/generate-myth", json=request_data)
+        
+        assert first.status_code == 200
+        assert second.status_code == 200
+        assert mock_generate.call_count == 1
+        assert second.content == first.content
+        assert second.headers["content-type"] == "application/json"
+        assert second.json()["title"] == "The Digital Sage"
+    
+    def test_cache_hit_skips_model_validation(self):
+        """Test that hits never rebuild the response model"""
+        request_data = {
+            "scenario": "I am organising a neighbourhood book club for retired teachers.",
+            "culture": "greek",
+            "tone": "balanced"
+        }
+        
+        with patch('app.services.openai_client.openai_service.generate_myth') as mock_generate:
+            mock_generate.return_value = build_myth_response()
+            local_client.post("/api/v1/generate-myth", json=request_data)
+        
+        with patch.object(MythGenerationResponse, "__init__", side_effect=AssertionError) as mock_init:
+            response = local_client.post("/api/v1/generate-myth", json=request_data)
+        
+        assert response.status_code == 200
+        mock_init.assert_not_called()
+
+
+class TestAdmissionControl:
+    """Test load shedding on the generation endpoint"""
+    
+    request_data = {
+        "scenario": "I am training for my first marathon after a long injury.",
+        "culture": "norse",
+        "tone": "serious"
+    }
+    
+    @pytest.fixture(autouse=True)
+    def reset_state(self):
+        """Start with an empty cache and an idle controller"""
+        response_cache.clear()
+        admission_controller.reset_stats()
+        yield
+        response_cache.clear()
+        admission_controller.in_flight = 0
+    
+    def test_shed_returns_503_with_retry_after(self):
+        """Test that a request over capacity is shed quickly"""
+        admission_controller.in_flight = admission_controller.limit
+        
+        with patch.object(admission_controller, "max_queue", 0), \
+                patch('app.services.openai_client.openai_service.generate_myth') as mock_generate:
+            response = local_client.post("/api/v1/generate-myth", json=self.request_data)
+        
+        assert response.status_code == 503
+        assert int(response.headers["Retry-After"]) >= 1
+        mock_generate.assert_not_called()
+        assert admission_controller.shed_queue_full == 1
+    
+    def test_cache_hits_bypass_limiter(self):
+        """Test that cached myths are served even when saturated"""
+        with patch('app.services.openai_client.openai_service.generate_myth') as mock_generate:
+            mock_generate.return_value = build_myth_response("norse")
+            local_client.post("/api/v1/generate-myth", json=self.request_data)
+        
+        admission_controller.in_flight = admission_controller.limit
+        with patch.object(admission_controller, "max_queue", 0):
+            response = local_client.post("/api/v1/generate-myth", json=self.request_data)
+        
+        assert response.status_code == 200
+        assert admission_controller.shed_queue_full == 0
+    
+    def test_metrics_expose_admission(self):
+        """Test that queue depth, wait time and shed counts are exported"""
+        with patch.object(generate.settings, "ADMIN_TOKEN", "secret"):
+            response = local_client.get("/api/v1/metrics", headers={"X-Admin-Token": "secret"})
+        
+        assert response.status_code == 200
+        admission = response.json()["admission"]
+        for field in ("queue_depth", "wait_time_avg", "wait_time_max", "shed_queue_full", "shed_timeout"):
+            assert field in admission
+    
+    def test_metrics_require_admin_token(self):
+        """Test that internal counters are not public"""
+        with patch.object(generate.settings, "ADMIN_TOKEN", "secret"):
+            assert local_client.get("/api/v1/metrics").status_code == 403
+        with patch.object(generate.settings, "ADMIN_TOKEN", ""):
+            assert local_client.get("/api/v1/metrics").status_code == 404
+
+
+class TestJobsEndpoint:
+    """Test the asynchronous job API"""
+    
+    request_data = {
+        "scenario": "I am learning to play the violin at the age of sixty.",
+        "culture": "celtic",
+        "tone": "playful"
+    }
+    
+    @pytest.fixture
+    def running_client(self):
+        """Client with the lifespan running but without snapshots or probes"""
+        response_cache.clear()
+        with patch.object(generate.settings, "CACHE_SNAPSHOT_PATH", ""), \
+                patch.object(dependency_monitor, "probes", {}), \
+                patch.object(openai_service, "warm_up"):
+            with TestClient(app, base_url="http://localhost") as running:
+                yield running
+        response_cache.clear()
+    
+    def test_submit_and_long_poll(self, running_client):
+        """Test that a job id is returned at once and the poll returns the myth"""
+        with patch('app.services.openai_client.openai_service.generate_myth') as mock_generate:
+            mock_generate.return_value = build_myth_response("celtic")
+            
+            submitted = running_client.post("/api/v1/jobs", json=self.request_data)
+            assert submitted.status_code == 202
+            job_id = submitted.json()["id"]
+            assert submitted.headers["location"] == f"/api/v1/jobs/{job_id}"
+            
+            polled = running_client.get(f"/api/v1/jobs/{job_id}", params={"wait": 5})
+        
+        assert polled.status_code == 200
+        data = polled.json()
+        assert data["status"] == "succeeded"
+        assert data["result"]["title"] == "The Digital Sage"
+    
+    def test_job_result_lands_in_response_cache(self, running_client):
+        """Test that the synchronous endpoint reuses a finished job's result"""
+        with patch('app.services.openai_client.openai_service.generate_myth') as mock_generate:
+            mock_generate.return_value = build_myth_response("celtic")
+            job_id = running_client.post("/api/v1/jobs", json=self.request_data).json()["id"]
+            running_client.get(f"/api/v1/jobs/{job_id}", params={"wait": 5})
+            
+            response = running_client.post("/api/v1/generate-myth", json=self.request_data)
+        
+        assert response.status_code == 200
+        assert mock_generate.call_count == 1
+    
+    def test_invalid_scenario_rejected_at_submit(self, running_client):
+        """Test that validation happens before queueing"""
+        response = running_client.post("/api/v1/jobs", json={"scenario": "x" * 2001})
+        assert response.status_code in (400, 422)
+    
+    def test_unknown_job_returns_404(self, running_client):
+        """Test polling an unknown job id"""
+        response = running_client.get("/api/v1/jobs/does-not-exist", params={"wait": 0})
+        assert response.status_code == 404
+
+
 class TestCORS:
     """Test CORS configuration"""
     
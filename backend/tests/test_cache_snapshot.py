@@ -0,0 +1,121 @@
+"""
+Test cases for response cache snapshots.
+"""
+
+import asyncio
+import time
+import pytest
+
+from app.services.cache_snapshot import (
+    HEADER,
+    CacheSnapshotter,
+    read_snapshot,
+    write_snapshot,
+)
+from app.services.response_cache import CachedBody
+
+
+def make_entry(body: bytes, age: float = 0) -> CachedBody:
+    """Build a cache entry stored age seconds ago"""
+    return CachedBody.encode(body, time.time() - age)
+
+
+class TestSnapshotFormat:
+    """Test writing and reading snapshot files"""
+    
+    def test_round_trip(self, tmp_path):
+        """Test that entries survive a write and read"""
+        path = tmp_path / "cache.snap"
+        entries = [("greek:balanced:abc", make_entry(b'{"title":"A"}')), ("norse:auto:def", make_entry(b"{}"))]
+        
+        assert write_snapshot(entries, path, ttl=3600) == 2
+        restored = dict(read_snapshot(path, ttl=3600))
+        
+        assert restored["greek:balanced:abc"].body == b'{"title":"A"}'
+        assert restored["norse:auto:def"].body == b"{}"
+        assert not (tmp_path / "cache.snap.tmp").exists()
+    
+    def test_expired_entries_are_skipped(self, tmp_path):
+        """Test that expired entries are neither written nor restored"""
+        path = tmp_path / "cache.snap"
+        entries = [("fresh", make_entry(b"1")), ("old", make_entry(b"2", age=7200))]
+        
+        assert write_snapshot(entries, path, ttl=3600) == 1
+        assert [key for key, _ in read_snapshot(path, ttl=3600)] == ["fresh"]
+        assert read_snapshot(path, ttl=0) == []
+    
+    def test_snapshot_is_compressed(self, tmp_path):
+        """Test that repetitive bodies compress well"""
+        path = tmp_path / "cache.snap"
+        body = b'{"adapted_story":"' + b"the weaver sang " * 500 + b'"}'
+        write_snapshot([("k", make_entry(body))], path, ttl=3600)
+        assert path.stat().st_size < len(body) / 10
+    
+    def test_missing_file(self, tmp_path):
+        """Test that a missing snapshot restores nothing"""
+        assert read_snapshot(tmp_path / "missing.snap", ttl=3600) == []
+    
+    def test_unknown_version_rejected(self, tmp_path):
+        """Test that a snapshot from another format version is refused"""
+        path = tmp_path / "cache.snap"
+        path.write_bytes(HEADER.pack(b"MWCS", 99))
+        with pytest.raises(ValueError):
+            read_snapshot(path, ttl=3600)
+
+
+class TestCacheSnapshotter:
+    """Test background restore and shutdown snapshots"""
+    
+    def test_restore_keeps_newer_entries(self, tmp_path):
+        """Test that restored entries never overwrite ones generated since startup"""
+        path = tmp_path / "cache.snap"
+        write_snapshot([("a", make_entry(b"old")), ("b", make_entry(b"restored"))], path, ttl=3600)
+        
+        cache = {"a": make_entry(b"new")}
+        snapshotter = CacheSnapshotter(cache, path=str(path), interval=0, ttl=3600)
+        
+        assert asyncio.run(snapshotter.restore()) == 1
+        assert cache["a"].body == b"new"
+        assert cache["b"].body == b"restored"
+    
+    def test_restore_respects_max_entries(self, tmp_path):
+        """Test that a large snapshot only fills the cache up to its bound, newest first"""
+        path = tmp_path / "cache.snap"
+        write_snapshot([(key, make_entry(key.encode())) for key in "abcd"], path, ttl=3600)
+
+        cache = {"z": make_entry(b"new")}
+        snapshotter = CacheSnapshotter(cache, path=str(path), interval=0, ttl=3600, max_entries=3)
+
+        assert asyncio.run(snapshotter.restore()) == 2
+        assert set(cache) == {"z", "c", "d"}
+
+    def test_corrupt_snapshot_is_ignored(self, tmp_path):
+        """Test that an unreadable snapshot does not break startup"""
+        path = tmp_path / "cache.snap"
+        path.write_bytes(b"garbage")
+        cache = {}
+        snapshotter = CacheSnapshotter(cache, path=str(path), interval=0, ttl=3600)
+        
+        assert asyncio.run(snapshotter.restore()) == 0
+        assert cache == {}
+    
+    def test_start_and_stop(self, tmp_path):
+        """Test that start does not block and stop writes a final snapshot"""
+        path = tmp_path / "cache.snap"
+        write_snapshot([("a", make_entry(b"1"))], path, ttl=3600)
+        cache = {}
+        
+        async def lifecycle():
+            snapshotter = CacheSnapshotter(cache, path=str(path), interval=60, ttl=3600)
+            snapshotter.start()
+            cache["b"] = make_entry(b"2")
+            await snapshotter.stop()
+        
+        asyncio.run(lifecycle())
+        
+        assert set(cache) == {"a", "b"}
+        assert {key for key, _ in read_snapshot(path, ttl=3600)} == {"a", "b"}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,82 @@
+"""
+Test cases for background dependency probes.
+"""
+
+import asyncio
+import time
+import pytest
+
+from app.services.dependency_health import DependencyMonitor
+
+
+def healthy_probe():
+    """Probe that always succeeds"""
+
+
+def failing_probe():
+    """Probe that always fails"""
+    raise ConnectionError("connection refused")
+
+
+def slow_probe():
+    """Probe that outlives the timeout"""
+    time.sleep(0.5)
+
+
+class TestDependencyMonitor:
+    """Test probe execution and result caching"""
+    
+    def test_refresh_records_results(self):
+        """Test that a refresh stores one result per probe"""
+        monitor = DependencyMonitor(interval=30, timeout=1)
+        monitor.register("ok", healthy_probe)
+        monitor.register("down", failing_probe)
+        
+        asyncio.run(monitor.refresh())
+        snapshot = monitor.snapshot()
+        
+        assert snapshot["ok"]["healthy"] is True
+        assert snapshot["down"]["healthy"] is False
+        assert snapshot["down"]["error"] == "connection refused"
+    
+    def test_probe_timeout(self):
+        """Test that a hung dependency is reported unhealthy"""
+        monitor = DependencyMonitor(interval=30, timeout=0.05)
+        monitor.register("slow", slow_probe)
+        
+        asyncio.run(monitor.refresh())
+        
+        assert monitor.results["slow"].healthy is False
+        assert "timed out" in monitor.results["slow"].error
+    
+    def test_snapshot_does_not_probe(self):
+        """Test that reading the snapshot never runs probes inline"""
+        calls = []
+        monitor = DependencyMonitor(interval=30, timeout=1)
+        monitor.register("counted", lambda: calls.append(1))
+        
+        monitor.snapshot()
+        monitor.snapshot()
+        
+        assert calls == []
+        assert monitor.snapshot()["counted"] == {"healthy": None}
+    
+    def test_background_loop(self):
+        """Test that start probes in the background and stop cancels"""
+        calls = []
+        monitor = DependencyMonitor(interval=0.01, timeout=1)
+        monitor.register("counted", lambda: calls.append(1))
+        
+        async def run():
+            monitor.start()
+            await asyncio.sleep(0.1)
+            await monitor.stop()
+        
+        asyncio.run(run())
+        
+        assert len(calls) >= 2
+        assert monitor._task is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
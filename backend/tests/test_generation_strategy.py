@@ -0,0 +1,163 @@
+"""
+Test cases for the parallel generation strategy.
+"""
+
+import asyncio
+import json
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from app.models.request import MythGenerationRequest
+from app.services.openai_client import OpenAIService
+from app.services.token_budget import TokenUsage
+from app.services.upstream_limiter import upstream_limiter
+
+CHOICES = [{"id": f"c{i}", "label": f"Path {i}"} for i in range(1, 4)]
+META = {"culture": "greek", "source_motif": "Journey to underworld"}
+
+
+class ScriptedClient:
+    """Answers each kind of prompt with a fixed JSON payload"""
+    
+    def __init__(self, plan=None):
+        self.plan = plan or {"title": "The Weaver", "outline": ["a", "b"], "choices": CHOICES, "meta": META}
+        self.prompts = []
+        self.lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+    
+    def create(self, model, messages, max_tokens, temperature, response_format=None):
+        prompt = messages[-1]["content"]
+        with self.lock:
+            self.prompts.append(prompt)
+        if '"outline"' in prompt:
+            payload = self.plan
+        elif '"choices"' in prompt:
+            payload = {
+                "title": "Single",
+                "adapted_story": "One call.",
+                "choices": [dict(choice, outcome="Done.") for choice in CHOICES],
+                "meta": META,
+            }
+        elif '"adapted_story"' in prompt:
+            payload = {"adapted_story": "Once upon a time."}
+        else:
+            label = prompt.split('Write the ending "', 1)[1].split('"', 1)[0]
+            payload = {"outcome": f"Ending for {label}."}
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=json.dumps(payload)))],
+            usage=SimpleNamespace(prompt_tokens=10, completion_tokens=5),
+        )
+
+
+def generate(client: ScriptedClient, usage: TokenUsage = None):
+    service = OpenAIService()
+    service._client = client
+    request = MythGenerationRequest(
+        scenario="I am moving across the country to start a new job.", culture="greek", tone="balanced"
+    )
+    with patch("app.services.openai_client.settings.GENERATION_STRATEGY", "parallel"), \
+         patch.object(service, "moderate_content", return_value=True):
+        return asyncio.run(service.generate_myth(request, usage=usage))
+
+
+class TestParallelGeneration:
+    """Test outline-first decomposition"""
+    
+    def test_assembles_validated_response(self):
+        """Test that the outline, story and endings are combined"""
+        client = ScriptedClient()
+        response = generate(client)
+        
+        assert response.title == "The Weaver"
+        assert response.adapted_story == "Once upon a time."
+        assert [choice.outcome for choice in response.choices] == [
+            "Ending for Path 1.", "Ending for Path 2.", "Ending for Path 3."
+        ]
+        assert response.meta.source_motif == "Journey to underworld"
+        assert len(client.prompts) == 5
+    
+    def test_calls_share_the_outline(self):
+        """Test that story and ending prompts carry the outline beats"""
+        client = ScriptedClient()
+        generate(client)
+        
+        assert all("- a\n- b" in prompt for prompt in client.prompts[1:])
+    
+    def test_usage_covers_every_call(self):
+        """Test that tokens from all five calls are counted"""
+        usage = TokenUsage()
+        generate(ScriptedClient(), usage)
+        
+        assert usage.prompt_tokens == 50
+        assert usage.completion_tokens == 25
+    
+    def test_malformed_plan_falls_back_to_single_call(self):
+        """Test that a plan without three endings uses the single-call path"""
+        client = ScriptedClient(plan={"title": "T", "outline": ["a"], "choices": CHOICES[:2], "meta": META})
+        response = generate(client)
+        
+        assert response.title == "Single"
+        # The outline is checked before the story and endings are requested
+        assert len(client.prompts) == 2
+    
+    def test_upstream_error_raises_value_error(self):
+        """Test that API failures surface like the single-call path"""
+        client = ScriptedClient()
+        
+        def fail(**kwargs):
+            raise ConnectionError("upstream down")
+        client.chat.completions.create = fail
+        
+        with pytest.raises(ValueError, match="Failed to generate myth"):
+            generate(client)
+    
+    def test_failed_branch_cancels_the_others(self):
+        """Test that no ending still running adds usage after the failure is returned"""
+        client = ScriptedClient()
+        scripted = client.create
+        
+        def create(model, messages, max_tokens, temperature, response_format=None):
+            prompt = messages[-1]["content"]
+            if '"adapted_story"' in prompt and '"choices"' not in prompt:
+                raise ConnectionError("upstream down")
+            if "Write the ending" in prompt:
+                time.sleep(0.2)
+            return scripted(model, messages, max_tokens, temperature, response_format)
+        client.chat.completions.create = create
+        
+        service = OpenAIService()
+        service._client = client
+        request = MythGenerationRequest(
+            scenario="I am moving across the country to start a new job.", culture="greek", tone="balanced"
+        )
+        usage = TokenUsage()
+        
+        async def scenario():
+            with pytest.raises(ValueError):
+                await service.generate_myth(request, usage=usage)
+            # What generate_and_cache would charge, and what it holds, at this point
+            charged, held = usage.completion_tokens, upstream_limiter.in_flight
+            await asyncio.sleep(0.3)
+            return charged, held
+        
+        with patch("app.services.openai_client.settings.GENERATION_STRATEGY", "parallel"), \
+             patch.object(service, "moderate_content", return_value=True):
+            charged, held = asyncio.run(scenario())
+        
+        assert held == 0
+        assert charged == usage.completion_tokens == 5
+    
+    def test_router_samples_are_recorded_on_the_loop(self):
+        """Test that worker threads never touch the router's sample windows"""
+        threads = set()
+        
+        with patch("app.services.openai_client.model_router.record",
+                   side_effect=lambda *args, **kwargs: threads.add(threading.get_ident())) as record:
+            generate(ScriptedClient())
+        
+        assert record.call_count == 5
+        assert threads == {threading.get_ident()}
@@ -0,0 +1,195 @@
+"""
+Test cases for Idempotency-Key handling on generation.
+"""
+
+import asyncio
+import uuid
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.v1 import generate
+from app.core.serialization import dumps
+from app.main import app
+from app.services.myth_store import myth_id
+from app.services.idempotency import (
+    IdempotencyInProgress,
+    IdempotencyKeyReused,
+    MemoryIdempotencyStore,
+    run_idempotent,
+)
+
+local_client = TestClient(app, base_url="http://localhost")
+
+MYTH = {
+    "title": "The Twice-Asked Oracle",
+    "adapted_story": "Long ago...",
+    "choices": [{"id": f"c{i}", "label": "Path", "outcome": "Ending."} for i in range(1, 4)],
+    "meta": {"culture": "greek", "source_motif": "Delphi"},
+}
+GENERATED = (dumps(MYTH), myth_id(dumps(MYTH)))
+
+
+class TestRunIdempotent:
+    """Test ownership, replay and waiting on the memory store"""
+
+    def test_concurrent_requests_share_one_run(self):
+        """Test that a concurrent retry waits for the owner and replays its body"""
+        store = MemoryIdempotencyStore(ttl=60, lock_ttl=10)
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return b"body"
+
+        async def scenario():
+            return await asyncio.gather(*(run_idempotent(store, "k", "fp", work, timeout=1) for _ in range(3)))
+
+        results = asyncio.run(scenario())
+        assert len(calls) == 1
+        assert sorted(results) == [(b"body", False), (b"body", True), (b"body", True)]
+
+    def test_lock_outlived_by_work_is_not_run_twice(self):
+        """Test that a generation longer than the lock TTL keeps its key locked"""
+        store = MemoryIdempotencyStore(ttl=60, lock_ttl=0.03)
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.2)
+            return b"body"
+
+        async def scenario():
+            owner = asyncio.create_task(run_idempotent(store, "k", "fp", work, timeout=1))
+            # The retry arrives once the original lock TTL has long passed
+            await asyncio.sleep(0.1)
+            retry = await run_idempotent(store, "k", "fp", work, timeout=1)
+            return await owner, retry
+
+        assert asyncio.run(scenario()) == ((b"body", False), (b"body", True))
+        assert len(calls) == 1
+
+    def test_different_body_is_rejected(self):
+        """Test that a key cannot be reused for another request"""
+        store = MemoryIdempotencyStore(ttl=60, lock_ttl=10)
+
+        async def work():
+            return b"body"
+
+        async def scenario():
+            await run_idempotent(store, "k", "fp-1", work, timeout=1)
+            await run_idempotent(store, "k", "fp-2", work, timeout=1)
+
+        with pytest.raises(IdempotencyKeyReused):
+            asyncio.run(scenario())
+
+    def test_failure_releases_the_key(self):
+        """Test that a retry after a failed first attempt runs again"""
+        store = MemoryIdempotencyStore(ttl=60, lock_ttl=10)
+        attempts = []
+
+        async def work():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise RuntimeError("upstream down")
+            return b"body"
+
+        async def scenario():
+            with pytest.raises(RuntimeError):
+                await run_idempotent(store, "k", "fp", work, timeout=1)
+            return await run_idempotent(store, "k", "fp", work, timeout=1)
+
+        assert asyncio.run(scenario()) == (b"body", False)
+        assert len(attempts) == 2
+
+    def test_slow_owner_times_out_waiters(self):
+        """Test that a retry gives up when the owner takes too long"""
+        store = MemoryIdempotencyStore(ttl=60, lock_ttl=10)
+
+        async def work():
+            await asyncio.sleep(0.2)
+            return b"body"
+
+        async def scenario():
+            owner = asyncio.create_task(run_idempotent(store, "k", "fp", work, timeout=1))
+            await asyncio.sleep(0.01)
+            try:
+                await run_idempotent(store, "k", "fp", work, timeout=0.05)
+            finally:
+                await owner
+
+        with pytest.raises(IdempotencyInProgress):
+            asyncio.run(scenario())
+
+    def test_completed_keys_expire(self):
+        """Test that a key can be used again once its TTL has passed"""
+        store = MemoryIdempotencyStore(ttl=0, lock_ttl=10)
+
+        async def work():
+            return b"body"
+
+        async def scenario():
+            await run_idempotent(store, "k", "fp-1", work, timeout=1)
+            return await run_idempotent(store, "k", "fp-2", work, timeout=1)
+
+        assert asyncio.run(scenario()) == (b"body", False)
+
+
+class TestGenerateEndpoint:
+    """Test the Idempotency-Key header on /generate-myth"""
+
+    def post(self, scenario: str, key: str):
+        return local_client.post(
+            "/api/v1/generate-myth",
+            json={"scenario": scenario, "culture": "greek"},
+            headers={"Idempotency-Key": key},
+        )
+
+    def test_retry_replays_without_generating(self):
+        """Test that a retry with the same key returns the first result"""
+        generate_and_store = AsyncMock(return_value=GENERATED)
+        key = uuid.uuid4().hex
+        scenario = f"My landlord raised the rent again {key}"
+
+        with patch.object(generate, "generate_and_store", generate_and_store):
+            first = self.post(scenario, key)
+            retry = self.post(scenario, key)
+
+        assert first.status_code == retry.status_code == 200
+        assert retry.json() == first.json() == MYTH
+        assert retry.headers["Idempotent-Replayed"] == "true"
+        assert "Idempotent-Replayed" not in first.headers
+        assert generate_and_store.await_count == 1
+
+    def test_reused_key_with_different_body_is_rejected(self):
+        """Test that a key bound to one scenario cannot generate another"""
+        generate_and_store = AsyncMock(return_value=GENERATED)
+        key = uuid.uuid4().hex
+
+        with patch.object(generate, "generate_and_store", generate_and_store):
+            assert self.post(f"My landlord raised the rent again {key}", key).status_code == 200
+            response = self.post(f"My neighbour plays drums at night {key}", key)
+
+        assert response.status_code == 422
+        assert generate_and_store.await_count == 1
+
+    def test_failed_generation_can_be_retried(self):
+        """Test that errors are not replayed"""
+        generate_and_store = AsyncMock(side_effect=[RuntimeError("boom"), GENERATED])
+        key = uuid.uuid4().hex
+        scenario = f"My landlord raised the rent again {key}"
+
+        with patch.object(generate, "generate_and_store", generate_and_store):
+            assert self.post(scenario, key).status_code == 500
+            assert self.post(scenario, key).status_code == 200
+
+    def test_overlong_key_is_rejected(self):
+        """Test the key length limit"""
+        response = self.post("My landlord raised the rent again", "k" * 256)
+        assert response.status_code == 400
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
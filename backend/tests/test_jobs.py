@@ -0,0 +1,166 @@
+"""
+Test cases for the asynchronous job runner.
+"""
+
+import asyncio
+import json
+import pytest
+
+from app.models.request import MythGenerationRequest
+from app.services.admission import AdmissionRejected
+from app.services.jobs import (
+    JOB_FAILED,
+    JOB_SUCCEEDED,
+    Job,
+    JobQueueFull,
+    JobRunner,
+    MemoryJobStore,
+)
+from app.services.myth_utils import analyze_scenario
+
+REQUEST = MythGenerationRequest(scenario="I am adopting a rescue dog from the shelter.")
+ANALYSIS = analyze_scenario(REQUEST.scenario)
+
+
+def make_runner(handler, workers=1, queue_size=10, timeout=5) -> JobRunner:
+    """Build a runner with an in-memory store"""
+    return JobRunner(MemoryJobStore(ttl=60), handler, workers, queue_size, timeout)
+
+
+class TestJobSerialization:
+    """Test job JSON output"""
+    
+    def test_result_bytes_are_spliced(self):
+        """Test that the cached body is embedded without re-encoding"""
+        job = Job(id="abc", status=JOB_SUCCEEDED, result=b'{"title":"T"}')
+        data = json.loads(job.to_json())
+        assert data["id"] == "abc"
+        assert data["result"] == {"title": "T"}
+    
+    def test_pending_job_has_no_result(self):
+        """Test that unfinished jobs omit the result"""
+        data = json.loads(Job(id="abc").to_json())
+        assert data["status"] == "queued"
+        assert "result" not in data
+
+
+class TestJobRunner:
+    """Test queueing, completion and long-polling"""
+    
+    def test_job_completes_and_wakes_poller(self):
+        """Test that a long-poll returns as soon as the job finishes"""
+        async def handler(request, analysis, cache_key, client_id=None):
+            await asyncio.sleep(0.01)
+            return b'{"title":"Done"}'
+        
+        async def run():
+            runner = make_runner(handler)
+            runner.start()
+            job = await runner.submit(REQUEST, ANALYSIS, "key")
+            finished = await runner.wait(job.id, timeout=5)
+            await runner.stop()
+            return finished
+        
+        job = asyncio.run(run())
+        assert job.status == JOB_SUCCEEDED
+        assert job.result == b'{"title":"Done"}'
+    
+    def test_cached_result_completes_immediately(self):
+        """Test that a cached body never enters the queue"""
+        async def handler(request, analysis, cache_key, client_id=None):
+            raise AssertionError("should not run")
+        
+        async def run():
+            runner = make_runner(handler)
+            job = await runner.submit(REQUEST, ANALYSIS, "key", cached_body=b"{}")
+            return job, runner.queue_depth
+        
+        job, depth = asyncio.run(run())
+        assert job.status == JOB_SUCCEEDED
+        assert depth == 0
+    
+    def test_queue_is_bounded(self):
+        """Test that submissions beyond the queue size are refused"""
+        release = None
+        
+        async def handler(request, analysis, cache_key, client_id=None):
+            await release.wait()
+            return b"{}"
+        
+        async def run():
+            nonlocal release
+            release = asyncio.Event()
+            runner = make_runner(handler, workers=1, queue_size=1)
+            runner.start()
+            await runner.submit(REQUEST, ANALYSIS, "a")
+            await asyncio.sleep(0)
+            await runner.submit(REQUEST, ANALYSIS, "b")
+            with pytest.raises(JobQueueFull):
+                await runner.submit(REQUEST, ANALYSIS, "c")
+            release.set()
+            await runner.stop()
+        
+        asyncio.run(run())
+    
+    def test_wait_times_out_with_pending_state(self):
+        """Test that a poll returns the current state when time runs out"""
+        async def handler(request, analysis, cache_key, client_id=None):
+            await asyncio.sleep(1)
+            return b"{}"
+        
+        async def run():
+            runner = make_runner(handler)
+            runner.start()
+            job = await runner.submit(REQUEST, ANALYSIS, "key")
+            pending = await runner.wait(job.id, timeout=0.01)
+            await runner.stop()
+            return pending
+        
+        assert asyncio.run(run()).done is False
+    
+    def test_generation_error_fails_job(self):
+        """Test that handler errors are recorded on the job"""
+        async def handler(request, analysis, cache_key, client_id=None):
+            raise ValueError("Content flagged by moderation system")
+        
+        async def run():
+            runner = make_runner(handler)
+            runner.start()
+            job = await runner.submit(REQUEST, ANALYSIS, "key")
+            finished = await runner.wait(job.id, timeout=5)
+            await runner.stop()
+            return finished
+        
+        job = asyncio.run(run())
+        assert job.status == JOB_FAILED
+        assert "moderation" in job.error
+    
+    def test_admission_rejection_is_retried(self):
+        """Test that a shed job waits and retries instead of failing"""
+        attempts = []
+        
+        async def handler(request, analysis, cache_key, client_id=None):
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise AdmissionRejected("queue full", retry_after=0)
+            return b"{}"
+        
+        async def run():
+            runner = make_runner(handler)
+            runner.start()
+            job = await runner.submit(REQUEST, ANALYSIS, "key")
+            finished = await runner.wait(job.id, timeout=5)
+            await runner.stop()
+            return finished
+        
+        assert asyncio.run(run()).status == JOB_SUCCEEDED
+        assert len(attempts) == 2
+    
+    def test_unknown_job(self):
+        """Test that polling an unknown id returns None"""
+        runner = make_runner(None)
+        assert asyncio.run(runner.wait("missing", timeout=0.01)) is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,91 @@
+"""
+Test cases for the queued logging pipeline.
+"""
+
+import logging
+import queue
+from unittest.mock import patch
+
+from app.core import logging as app_logging
+from app.core.logging import BufferedQueueHandler, SamplingFilter, setup_logging, stop_logging
+
+
+def make_record(name: str, level: int = logging.INFO, msg: str = "hello %s", args=("world",)) -> logging.LogRecord:
+    return logging.LogRecord(name, level, __file__, 1, msg, args, None)
+
+
+class TestSamplingFilter:
+    """Test per-logger sampling"""
+    
+    def test_keeps_configured_share(self):
+        """Test that a 0.25 rate keeps one record in four, starting with the first"""
+        sampler = SamplingFilter({"app.api": 0.25})
+        kept = [sampler.filter(make_record("app.api.v1.generate")) for _ in range(8)]
+        
+        assert kept == [True, False, False, False, True, False, False, False]
+        assert sampler.sampled_out == 6
+    
+    def test_warnings_always_pass(self):
+        """Test that warnings and errors are never sampled"""
+        sampler = SamplingFilter({"app": 0.0})
+        assert sampler.filter(make_record("app.x", logging.WARNING))
+        assert sampler.filter(make_record("app.x", logging.ERROR))
+        assert not sampler.filter(make_record("app.x", logging.INFO))
+    
+    def test_unconfigured_loggers_pass(self):
+        """Test that loggers without a rate, or a similar prefix, are not sampled"""
+        sampler = SamplingFilter({"uvicorn.access": 0.0})
+        assert sampler.filter(make_record("uvicorn.error"))
+        assert sampler.filter(make_record("uvicorn.accessory"))
+        assert not sampler.filter(make_record("uvicorn.access"))
+
+
+class TestBufferedQueueHandler:
+    """Test enqueueing"""
+    
+    def test_merges_arguments(self):
+        """Test that arguments are merged before the record is queued"""
+        handler = BufferedQueueHandler(queue.Queue())
+        handler.handle(make_record("app"))
+        
+        record = handler.queue.get_nowait()
+        assert record.msg == "hello world"
+        assert record.args is None
+    
+    def test_drops_when_full(self):
+        """Test that a full queue drops records instead of blocking"""
+        handler = BufferedQueueHandler(queue.Queue(maxsize=1))
+        handler.handle(make_record("app"))
+        handler.handle(make_record("app"))
+        
+        assert handler.queue.qsize() == 1
+        assert handler.dropped == 1
+
+
+class TestSetupLogging:
+    """Test routing through the listener thread"""
+    
+    def test_records_reach_output(self, capsys):
+        """Test that records are written by the listener and flushed on stop"""
+        with patch.object(app_logging.settings, "LOG_SAMPLE_RATES", {}):
+            setup_logging()
+            try:
+                root = logging.getLogger()
+                assert isinstance(root.handlers[0], BufferedQueueHandler)
+                logging.getLogger("app.test").info("queued %d", 42)
+            finally:
+                stop_logging()
+        
+        assert "queued 42" in capsys.readouterr().out
+        assert not isinstance(logging.getLogger().handlers[0], BufferedQueueHandler)
+    
+    def test_setup_is_repeatable(self):
+        """Test that setting up twice leaves a single listener"""
+        setup_logging()
+        first = app_logging._listener
+        setup_logging()
+        try:
+            assert app_logging._listener is not first
+            assert first._thread is None
+        finally:
+            stop_logging()
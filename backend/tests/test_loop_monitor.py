@@ -0,0 +1,129 @@
+"""
+Test cases for event-loop lag monitoring and blocking-call detection.
+"""
+
+import asyncio
+import logging
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.loop_monitor import BlockingCallDetector, LoopLagMonitor, RequestMarker
+
+
+def block(seconds: float) -> None:
+    """Synchronous work that holds the event loop"""
+    time.sleep(seconds)
+
+
+class TestLoopLagMonitor:
+    """Test lag sampling and the debug watchdog"""
+
+    def test_measures_lag_of_blocked_loop(self):
+        """Test that a blocking call shows up as lag"""
+        monitor = LoopLagMonitor(interval=0.01, window=100, block_threshold=1.0, debug=False)
+
+        async def scenario():
+            monitor.start()
+            await asyncio.sleep(0.03)
+            block(0.1)
+            await asyncio.sleep(0.03)
+            await monitor.stop()
+
+        asyncio.run(scenario())
+        stats = monitor.stats()
+        assert stats["samples"] > 0
+        assert stats["max_ms"] >= 50
+
+    @pytest.mark.allow_blocking
+    def test_watchdog_logs_blocking_stack(self, caplog):
+        """Test that debug mode logs the stack of the blocking code"""
+        monitor = LoopLagMonitor(interval=1.0, window=10, block_threshold=0.03, debug=True)
+
+        async def scenario():
+            monitor.start()
+            await asyncio.sleep(0.05)
+            block(0.2)
+            await asyncio.sleep(0.05)
+            await monitor.stop()
+
+        with caplog.at_level(logging.WARNING, logger="app.core.loop_monitor"):
+            asyncio.run(scenario())
+
+        assert monitor.stalls >= 1
+        assert any("in block" in record.getMessage() for record in caplog.records)
+
+
+class TestBlockingCallDetector:
+    """Test the test-mode detector"""
+
+    @pytest.fixture
+    def detector(self):
+        detector = BlockingCallDetector()
+        detector.install(threshold_ms=30)
+        yield detector
+        detector.uninstall()
+
+    def blocking_app(self) -> FastAPI:
+        test_app = FastAPI()
+
+        @test_app.get("/blocking")
+        async def blocking():
+            block(0.06)
+            return {}
+
+        @test_app.get("/fine")
+        async def fine():
+            await asyncio.sleep(0.06)
+            return {}
+
+        return RequestMarker(test_app)
+
+    @pytest.mark.allow_blocking
+    def test_blocking_handler_is_reported(self, detector):
+        """Test that a handler holding the loop is attributed to its request"""
+        client = TestClient(self.blocking_app())
+        client.get("/blocking")
+        assert detector.take() == []  # warm-up request
+
+        client.get("/blocking")
+        violations = detector.take()
+        assert violations
+        assert violations[0].startswith("GET /blocking blocked the event loop")
+
+    @pytest.mark.allow_blocking
+    def test_garbage_collection_is_not_counted(self, detector):
+        """Test that a collection pause inside a request is not blamed on it"""
+        test_app = FastAPI()
+
+        @test_app.get("/collecting")
+        async def collecting():
+            detector._time_gc("start", {})
+            block(0.06)
+            detector._time_gc("stop", {})
+            return {}
+
+        client = TestClient(RequestMarker(test_app))
+        client.get("/collecting")
+        client.get("/collecting")
+        assert detector.take() == []
+
+    def test_awaiting_handler_is_not_reported(self, detector):
+        """Test that waiting without blocking is fine"""
+        TestClient(self.blocking_app()).get("/fine")
+        assert detector.take() == []
+
+    def test_blocking_outside_requests_is_ignored(self, detector):
+        """Test that only request work counts"""
+
+        async def background():
+            block(0.06)
+
+        asyncio.run(background())
+        assert detector.take() == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,151 @@
+"""
+Test cases for latency-aware model routing.
+"""
+
+import asyncio
+import json
+from unittest.mock import MagicMock, patch
+
+from app.models.request import MythGenerationRequest
+from app.services.model_router import ModelRouter, ModelStats
+from app.services.openai_client import OpenAIService
+
+
+def build_router(**overrides) -> ModelRouter:
+    options = dict(
+        models=["primary", "fast"],
+        p95_threshold=2.0,
+        error_rate_threshold=0.5,
+        window=300,
+        min_samples=3,
+        short_scenario_chars=100,
+    )
+    options.update(overrides)
+    return ModelRouter(**options)
+
+
+class TestModelStats:
+    """Test the rolling latency window"""
+    
+    def test_percentiles(self):
+        """Test p50 and p95 over recorded samples"""
+        stats = ModelStats(window=300)
+        for latency in range(1, 21):
+            stats.record(float(latency), ok=True)
+        
+        assert stats.percentile(0.5) == 10.0
+        assert stats.percentile(0.95) == 19.0
+        assert stats.error_rate() == 0.0
+    
+    def test_window_expiry(self):
+        """Test that old samples fall out of the window"""
+        stats = ModelStats(window=0)
+        stats.record(5.0, ok=False)
+        
+        assert stats.percentile(0.95) == 0.0
+        assert stats.error_rate() == 0.0
+        assert stats.requests == 1
+        assert stats.errors == 1
+
+
+class TestModelRouter:
+    """Test tier selection"""
+    
+    def test_defaults_to_primary(self):
+        """Test that a healthy primary serves normal requests"""
+        router = build_router()
+        assert router.choose(500, "epic") == "primary"
+    
+    def test_short_playful_uses_fast_tier(self):
+        """Test that short playful scenarios skip the primary model"""
+        router = build_router()
+        assert router.choose(50, "playful") == "fast"
+        assert router.choose(500, "playful") == "primary"
+        assert router.choose(50, "dark") == "primary"
+    
+    def test_slow_primary_falls_back(self):
+        """Test that a primary over the p95 threshold is skipped"""
+        router = build_router()
+        for _ in range(3):
+            router.record("primary", 5.0, ok=True)
+        
+        assert router.is_degraded("primary")
+        assert router.choose(500, "epic") == "fast"
+    
+    def test_failing_primary_falls_back(self):
+        """Test that a primary with a high error rate is skipped"""
+        router = build_router()
+        for ok in (False, False, True):
+            router.record("primary", 0.5, ok=ok)
+        
+        assert router.choose(500, "epic") == "fast"
+    
+    def test_min_samples_required(self):
+        """Test that a couple of slow calls do not trigger fallback"""
+        router = build_router()
+        router.record("primary", 5.0, ok=True)
+        
+        assert router.choose(500, "epic") == "primary"
+    
+    def test_all_degraded_uses_fastest(self):
+        """Test that the fastest tier is used when every tier is slow"""
+        router = build_router()
+        for model in ("primary", "fast"):
+            for _ in range(3):
+                router.record(model, 5.0, ok=True)
+        
+        assert router.choose(500, "epic") == "fast"
+    
+    def test_circuit_opens_only_when_every_tier_fails(self):
+        """Test that slowness alone never opens the circuit"""
+        router = build_router()
+        for _ in range(3):
+            router.record("primary", 0.5, ok=False)
+            router.record("fast", 5.0, ok=True)
+        assert router.circuit_open() is False
+        
+        for _ in range(4):
+            router.record("fast", 0.5, ok=False)
+        assert router.circuit_open() is True
+    
+    def test_single_model(self):
+        """Test that routing is a no-op without fallback tiers"""
+        router = build_router(models=["primary"])
+        assert router.choose(50, "playful") == "primary"
+    
+    def test_snapshot(self):
+        """Test per-model metrics"""
+        router = build_router()
+        router.record("primary", 1.0, ok=True)
+        
+        snapshot = router.snapshot()
+        assert snapshot["primary"]["requests"] == 1
+        assert snapshot["primary"]["degraded"] is False
+        assert snapshot["fast"]["requests"] == 0
+
+
+class TestRoutedGeneration:
+    """Test that generation uses and records the routed model"""
+    
+    def test_generation_records_chosen_model(self):
+        """Test that the chosen model is called, recorded and reported"""
+        router = build_router()
+        service = OpenAIService()
+        content = json.dumps({
+            "title": "The Vase of Hera",
+            "adapted_story": "A story.",
+            "choices": [{"id": str(i), "label": "Choice", "outcome": "Outcome"} for i in range(3)],
+            "meta": {"culture": "greek", "source_motif": "Hera's wrath"},
+        })
+        client = MagicMock()
+        client.chat.completions.create.return_value.choices = [MagicMock(message=MagicMock(content=content))]
+        service._client = client
+        
+        request = MythGenerationRequest(scenario="My cat knocked over a vase today", culture="greek", tone="playful")
+        with patch("app.services.openai_client.model_router", router), \
+             patch.object(service, "moderate_content", return_value=True):
+            response = asyncio.run(service.generate_myth(request))
+        
+        assert client.chat.completions.create.call_args.kwargs["model"] == "fast"
+        assert response.meta.ai_model == "fast"
+        assert router.stats["fast"].requests == 1
@@ -0,0 +1,230 @@
+"""
+Test cases for the moderation pre-filter, verdict cache and batcher.
+"""
+
+import asyncio
+import threading
+import time
+import pytest
+from unittest.mock import Mock, patch
+
+from app.services import moderation
+from app.services.moderation import (
+    LocalContentFilter,
+    ModerationBatcher,
+    ModerationCache,
+    compile_lexicon,
+    content_digest,
+)
+from app.services.openai_client import openai_service
+
+
+class TestLocalContentFilter:
+    """Test the compiled word-boundary classifier"""
+    
+    def test_blocks_whole_words(self):
+        """Test that listed terms are rejected"""
+        content_filter = LocalContentFilter(["hate", "violence"])
+        assert content_filter.is_violation("A story full of hate") is True
+        assert content_filter.is_violation("VIOLENCE everywhere") is True
+    
+    def test_ignores_substrings(self):
+        """Test that terms inside other words do not match"""
+        content_filter = LocalContentFilter(["hate", "harm"])
+        assert content_filter.is_violation("Whatever happens, we stay calm") is False
+        assert content_filter.is_violation("A harmonious little village") is False
+    
+    def test_multi_word_terms(self):
+        """Test that multi-word terms tolerate extra whitespace"""
+        content_filter = LocalContentFilter(["hate speech"])
+        assert content_filter.is_violation("no hate   speech allowed") is True
+        assert content_filter.is_violation("hate and speech") is False
+    
+    def test_token_matching_agrees_with_regex(self):
+        """Test that the token path gives the same verdicts as the regex"""
+        content_filter = LocalContentFilter(["hate speech", "porn"])
+        for text in ["no hate speech here", "hate and speech", "porn", "pornography", "whatever"]:
+            tokens = text.split()
+            assert content_filter.is_violation_tokens(tokens) == content_filter.is_violation(text)
+    
+    def test_empty_lexicon(self):
+        """Test that an empty lexicon never rejects"""
+        assert compile_lexicon([]) is None
+        assert LocalContentFilter([]).is_violation("anything at all") is False
+
+
+class TestModerationCache:
+    """Test the verdict cache"""
+    
+    def test_digest_normalizes_case_and_whitespace(self):
+        """Test that trivially different inputs share a digest"""
+        assert content_digest("Hello   World") == content_digest(" hello world ")
+    
+    def test_get_and_set(self):
+        """Test storing and reading verdicts"""
+        cache = ModerationCache(max_size=10, ttl=60)
+        assert cache.get("abc") is None
+        cache.set("abc", False)
+        assert cache.get("abc") is False
+    
+    def test_expired_entries_are_dropped(self):
+        """Test that entries expire after the TTL"""
+        cache = ModerationCache(max_size=10, ttl=0)
+        cache.set("abc", True)
+        assert cache.get("abc") is None
+        assert len(cache) == 0
+    
+    def test_lru_eviction(self):
+        """Test that the least recently used verdict is evicted"""
+        cache = ModerationCache(max_size=2, ttl=60)
+        cache.set("a", True)
+        cache.set("b", True)
+        cache.get("a")
+        cache.set("c", True)
+        assert cache.get("b") is None
+        assert cache.get("a") is True
+
+
+class RecordingUpstream:
+    """Blocking fake of the moderation endpoint that flags inputs containing 'bad'"""
+    
+    def __init__(self, latency: float = 0.05):
+        self.latency = latency
+        self.calls = []
+        self.lock = threading.Lock()
+    
+    def __call__(self, texts):
+        with self.lock:
+            self.calls.append(list(texts))
+        time.sleep(self.latency)
+        return ["bad" in text for text in texts]
+
+
+class TestModerationBatcher:
+    """Test coalescing of concurrent moderation checks"""
+    
+    @pytest.fixture(autouse=True)
+    def reset_stats(self):
+        moderation.moderation_stats.reset()
+    
+    def test_light_traffic_is_sent_immediately(self):
+        """Test that a lone check does not wait for the window"""
+        upstream = RecordingUpstream(latency=0)
+        batcher = ModerationBatcher(upstream, window=1.0, max_batch=32)
+        
+        async def scenario():
+            started = time.perf_counter()
+            assert await batcher.is_flagged("a good tale") is False
+            assert await batcher.is_flagged("a bad tale") is True
+            return time.perf_counter() - started
+        
+        assert asyncio.run(scenario()) < 0.5
+        assert upstream.calls == [["a good tale"], ["a bad tale"]]
+    
+    def test_concurrent_checks_share_a_call(self):
+        """Test that checks arriving during a call are batched and get their own verdicts"""
+        upstream = RecordingUpstream()
+        batcher = ModerationBatcher(upstream, window=0.01, max_batch=32)
+        texts = [f"tale {i}" + (" bad" if i % 2 else "") for i in range(6)]
+        
+        async def scenario():
+            first = asyncio.create_task(batcher.is_flagged(texts[0]))
+            await asyncio.sleep(0.01)  # first call now in flight
+            rest = await asyncio.gather(*(batcher.is_flagged(text) for text in texts[1:]))
+            return [await first] + rest
+        
+        verdicts = asyncio.run(scenario())
+        
+        assert verdicts == [i % 2 == 1 for i in range(6)]
+        assert upstream.calls == [texts[:1], texts[1:]]
+        stats = moderation.moderation_stats.as_dict()
+        assert stats["upstream_calls"] == 2
+        assert stats["batched_calls"] == 1
+        assert stats["batched_inputs"] == 5
+    
+    def test_batch_size_caps_each_call(self):
+        """Test that a full batch is sent without waiting for the window"""
+        upstream = RecordingUpstream()
+        batcher = ModerationBatcher(upstream, window=10.0, max_batch=2)
+        
+        async def scenario():
+            first = asyncio.create_task(batcher.is_flagged("t0"))
+            await asyncio.sleep(0.01)
+            await asyncio.wait_for(asyncio.gather(*(batcher.is_flagged(f"t{i}") for i in range(1, 5))), 1.0)
+            await first
+        
+        asyncio.run(scenario())
+        assert sorted(len(call) for call in upstream.calls) == [1, 2, 2]
+    
+    def test_failure_reaches_every_caller(self):
+        """Test that a failed batch raises in each waiting caller"""
+        
+        def failing(texts):
+            time.sleep(0.02)
+            raise RuntimeError("boom")
+        
+        batcher = ModerationBatcher(failing, window=0.005, max_batch=32)
+        
+        async def scenario():
+            first = asyncio.create_task(batcher.is_flagged("t0"))
+            await asyncio.sleep(0.005)
+            results = await asyncio.gather(
+                *(batcher.is_flagged(f"t{i}") for i in range(1, 4)), return_exceptions=True
+            )
+            results.append(await asyncio.gather(first, return_exceptions=True))
+            return results
+        
+        results = asyncio.run(scenario())
+        assert all(isinstance(result, RuntimeError) for result in results[:3])
+        assert isinstance(results[3][0], RuntimeError)
+
+
+class TestModerateContent:
+    """Test moderation layering in the OpenAI service"""
+    
+    @pytest.fixture(autouse=True)
+    def reset_state(self):
+        """Reset counters and cached verdicts"""
+        moderation.moderation_cache.clear()
+        moderation.moderation_stats.reset()
+        yield
+        moderation.moderation_cache.clear()
+    
+    def test_repeat_scenarios_skip_upstream(self):
+        """Test that a repeated scenario is answered from the cache"""
+        upstream = Mock()
+        upstream.return_value.results = [Mock(flagged=False)]
+        
+        with patch.object(openai_service.client.moderations, "create", upstream):
+            first = asyncio.run(openai_service.moderate_content("A quiet story about a garden"))
+            second = asyncio.run(openai_service.moderate_content("a quiet story about a  garden"))
+        
+        assert first is True and second is True
+        assert upstream.call_count == 1
+        stats = moderation.moderation_stats.as_dict()
+        assert stats["upstream_calls"] == 1
+        assert stats["cache_hits"] == 1
+    
+    def test_local_filter_rejects_before_upstream(self):
+        """Test that obvious violations never reach the network"""
+        upstream = Mock()
+        
+        with patch.object(openai_service.client.moderations, "create", upstream):
+            allowed = asyncio.run(openai_service.moderate_content("A tale of terrorism"))
+        
+        assert allowed is False
+        upstream.assert_not_called()
+        assert moderation.moderation_stats.local_rejections == 1
+    
+    def test_upstream_failure_is_not_cached(self):
+        """Test that fail-open verdicts are not remembered"""
+        upstream = Mock(side_effect=RuntimeError("boom"))
+        
+        with patch.object(openai_service.client.moderations, "create", upstream):
+            assert asyncio.run(openai_service.moderate_content("A quiet story")) is True
+        
+        assert len(moderation.moderation_cache) == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,82 @@
+"""
+Test cases for ranked motif retrieval.
+"""
+
+from unittest.mock import patch
+
+from app.services.motif_index import MotifIndex, get_motif_index, index_terms
+from app.services.myth_utils import analyze_scenario, get_culture_motifs
+
+CORPUS = [
+    {"culture": "greek", "motif": "Journey to underworld", "description": "Orpheus descends for a lost love"},
+    {"culture": "greek", "motif": "Contest of weavers", "description": "Arachne challenges Athena at the loom"},
+    {"culture": "greek", "motif": "Stolen fire", "description": "Prometheus brings fire to mortals"},
+    {"culture": "norse", "motif": "Binding oath", "description": "Tyr gives his hand to bind the wolf"},
+]
+
+
+class TestIndexTerms:
+    """Test query and document normalization"""
+    
+    def test_drops_stop_words_and_folds_plurals(self):
+        """Test that stop words and short tokens go and plurals fold"""
+        assert index_terms(["the", "weavers", "of", "glass", "at", "loom"]) == ["weaver", "glass", "loom"]
+
+
+class TestMotifIndex:
+    """Test BM25 ranking"""
+    
+    def test_ranks_matching_motif_first(self):
+        """Test that the motif sharing scenario terms ranks first"""
+        index = MotifIndex(CORPUS)
+        tokens = analyze_scenario("My sister runs a weaving studio and her looms are famous").tokens
+        
+        assert index.search("greek", tokens, 1) == ["Contest of weavers"]
+    
+    def test_description_is_searched(self):
+        """Test that description text contributes to the score"""
+        index = MotifIndex(CORPUS)
+        
+        assert index.search("greek", ["mortals"], 1) == ["Stolen fire"]
+    
+    def test_limits_to_k_and_pads(self):
+        """Test that k motifs are returned even when few match"""
+        index = MotifIndex(CORPUS)
+        motifs = index.search("greek", ["fire"], 2)
+        
+        assert motifs[0] == "Stolen fire"
+        assert len(motifs) == 2
+    
+    def test_no_match_keeps_corpus_order(self):
+        """Test that an unmatched query returns the first motifs"""
+        index = MotifIndex(CORPUS)
+        
+        assert index.search("greek", ["spreadsheet"], 2) == ["Journey to underworld", "Contest of weavers"]
+    
+    def test_cultures_are_separate(self):
+        """Test that motifs never leak across cultures"""
+        index = MotifIndex(CORPUS)
+        
+        assert index.search("norse", ["fire", "loom"], 3) == ["Binding oath"]
+        assert index.search("unknown", ["fire"], 3) == []
+    
+    def test_global_index_built_once(self):
+        """Test that the seed index is cached"""
+        assert get_motif_index() is get_motif_index()
+        assert len(get_motif_index()) > 0
+
+
+class TestRankedCultureMotifs:
+    """Test the prompt-facing helper"""
+    
+    def test_respects_k(self):
+        """Test that at most k motifs are joined"""
+        index = MotifIndex(CORPUS)
+        get_motif_index.cache_clear()
+        try:
+            with patch("app.services.motif_index.load_seed_myths", return_value=CORPUS):
+                motifs = get_culture_motifs("greek", ["fire"], k=2)
+        finally:
+            get_motif_index.cache_clear()
+        
+        assert motifs.split("; ") == index.search("greek", ["fire"], 2)
@@ -0,0 +1,75 @@
+"""
+Test cases for content-addressed myth storage.
+"""
+
+import asyncio
+import gzip
+
+from app.services.myth_store import MythStore, is_myth_id, myth_id
+
+
+class TestMythId:
+    """Test id derivation"""
+    
+    def test_stable_and_content_addressed(self):
+        """Test that equal bodies share an id and different bodies do not"""
+        assert myth_id(b'{"title":"A"}') == myth_id(b'{"title":"A"}')
+        assert myth_id(b'{"title":"A"}') != myth_id(b'{"title":"B"}')
+        assert is_myth_id(myth_id(b"{}"))
+    
+    def test_rejects_malformed_ids(self):
+        """Test that ids of the wrong shape are rejected"""
+        assert not is_myth_id("abc")
+        assert not is_myth_id("Z" * 32)
+        assert not is_myth_id("../" + "a" * 29)
+
+
+class TestMythStore:
+    """Test the local store"""
+    
+    def test_save_and_load(self):
+        """Test that a saved myth loads with its body and timestamp"""
+        async def run():
+            store = MythStore(max_size=10, ttl=60)
+            key = await store.save(b'{"title":"A"}')
+            return key, await store.load(key)
+        
+        key, myth = asyncio.run(run())
+        assert myth.id == key
+        assert myth.body == b'{"title":"A"}'
+        assert myth.created_at > 0
+    
+    def test_save_keeps_original_timestamp(self):
+        """Test that saving a known myth again does not change Last-Modified"""
+        async def run():
+            store = MythStore(max_size=10, ttl=60)
+            key = await store.save(b"{}")
+            first = (await store.load(key)).created_at
+            await store.save(b"{}")
+            return first, (await store.load(key)).created_at
+        
+        first, second = asyncio.run(run())
+        assert first == second
+    
+    def test_evicts_least_recently_used(self):
+        """Test that the store stays bounded"""
+        async def run():
+            store = MythStore(max_size=2, ttl=60)
+            first = await store.save(b"1")
+            await store.save(b"2")
+            await store.save(b"3")
+            return store, first
+        
+        store, first = asyncio.run(run())
+        assert len(store) == 2
+        assert asyncio.run(store.load(first)) is None
+    
+    def test_gzipped_body_is_deterministic(self):
+        """Test that the compressed body round-trips and is reused"""
+        async def run():
+            store = MythStore(max_size=10, ttl=60)
+            return await store.load(await store.save(b'{"story":"' + b"x" * 2000 + b'"}'))
+        
+        myth = asyncio.run(run())
+        assert gzip.decompress(myth.gzipped) == myth.body
+        assert myth.gzipped is myth.gzipped
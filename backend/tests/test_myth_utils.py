@@ -4,6 +4,7 @@ Test cases for myth utility functions.
 
 import pytest
 from app.services.myth_utils import (
+    analyze_scenario,
     detect_culture,
     get_culture_motifs,
     sanitize_text,
@@ -150,6 +151,16 @@ class TestContentValidation:
         result = validate_scenario_content(scenario)
         # Might be True or False depending on implementation sensitivity
         assert isinstance(result, bool)
+    
+    def test_bad_words_require_word_boundaries(self):
+        """Test that blocked terms inside other words are not rejected"""
+        scenario = "Whatever happens, I want my team to stay harmonious this year."
+        assert validate_scenario_content(scenario) is True
+    
+    def test_blocklisted_term_rejected(self):
+        """Test that a configured blocked term is rejected"""
+        scenario = "I want to write a story that glorifies terrorism in my town."
+        assert validate_scenario_content(scenario) is False
 
 
 class TestKeywordExtraction:
@@ -208,5 +219,60 @@ class TestKeywordExtraction:
         # Specific behavior depends on implementation
 
 
+
+class TestScenarioAnalysis:
+    """Test the single-pass scenario analysis"""
+    
+    def test_sanitizes_and_normalizes(self):
+        """Test that the analysis carries sanitized and normalized text"""
+        analysis = analyze_scenario("  My <b>Viking</b>   startup @ Oslo  ")
+        assert analysis.text == "My Viking   startup  Oslo"
+        assert analysis.normalized == "my viking startup oslo"
+        assert analysis.tokens == ("my", "viking", "startup", "oslo")
+    
+    def test_culture_scores_match_detect_culture(self):
+        """Test that the analysis agrees with string-based detection"""
+        scenario = "My startup is like Viking exploration, conquering new Nordic markets."
+        analysis = analyze_scenario(scenario)
+        assert analysis.culture_scores["norse"] == 2
+        assert analysis.detected_culture == detect_culture(scenario) == "norse"
+        assert detect_culture(analysis) == "norse"
+    
+    def test_keywords_do_not_match_inside_words(self):
+        """Test that short keywords such as "ra" only match whole words"""
+        analysis = analyze_scenario("A cultural festival for the whole neighbourhood")
+        assert "egyptian" not in analysis.culture_scores
+    
+    def test_plural_keywords_match(self):
+        """Test that simple plurals still count toward a culture"""
+        analysis = analyze_scenario("We are building pyramids of cardboard boxes")
+        assert analysis.detected_culture == "egyptian"
+    
+    def test_resolve_culture(self):
+        """Test that only "auto" is replaced by the detected culture"""
+        analysis = analyze_scenario("A samurai learns to code in Tokyo")
+        assert analysis.resolve_culture("auto") == "japanese"
+        assert analysis.resolve_culture("celtic") == "celtic"
+    
+    def test_digest_ignores_case_and_whitespace(self):
+        """Test that equivalent scenarios share a cache digest"""
+        first = analyze_scenario("Starting a   Garden")
+        second = analyze_scenario("starting a garden")
+        assert first.digest == second.digest
+        assert len(first.digest) == 64
+    
+    def test_validate_accepts_analysis(self):
+        """Test that validation works on an analysis object"""
+        assert validate_scenario_content(analyze_scenario("Short")) is False
+        assert validate_scenario_content(
+            analyze_scenario("Whatever happens, we plant a community garden.")
+        ) is True
+    
+    def test_keywords_property(self):
+        """Test that keywords drop stop words and short words"""
+        analysis = analyze_scenario("I am starting a technology startup in Paris")
+        assert analysis.keywords == ["starting", "technology", "startup", "paris"]
+
+
 if __name__ == "__main__":
     pytest.main([__file__])
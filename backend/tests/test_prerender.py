@@ -0,0 +1,148 @@
+"""
+Test cases for static pre-rendering of popular myths.
+"""
+
+import asyncio
+import json
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.v1 import myths
+from app.core.serialization import dumps
+from app.main import app
+from app.services.myth_store import myth_store
+from app.services.prerender import (
+    MemoryViewCounter,
+    Prerenderer,
+    render_html,
+    viewed_myth_id,
+)
+
+local_client = TestClient(app, base_url="http://localhost")
+
+MYTH = {
+    "title": "The Weaver & the <Loom>",
+    "adapted_story": "In the age of bronze the weaver sang.\nThe loom answered with light.",
+    "choices": [{"id": f"c{i}", "label": f"Path {i}", "outcome": f"Ending {i}."} for i in range(1, 4)],
+    "meta": {"culture": "greek", "source_motif": "Weaver of fate", "generation_time": 1.0, "ai_model": "test"},
+}
+
+
+def stored_myth() -> str:
+    return asyncio.run(myth_store.save(dumps(MYTH)))
+
+
+class TestRenderHtml:
+    """Test the static page"""
+
+    def test_social_meta_tags_are_escaped(self):
+        """Test that titles are escaped and the social tags point at the share page"""
+        page = render_html("a" * 32, MYTH, "https://mythweaver.fun/")
+
+        assert '<meta property="og:title" content="The Weaver &amp; the &lt;Loom&gt;">' in page
+        assert f'<meta property="og:url" content="https://mythweaver.fun/story/{"a" * 32}">' in page
+        assert '<meta name="twitter:card" content="summary">' in page
+        assert "<p>The loom answered with light.</p>" in page
+        assert "<Loom>" not in page
+
+    def test_viewed_myth_id(self):
+        """Test which mirrored URIs count as views"""
+        key = "0123456789abcdef" * 2
+        assert viewed_myth_id(f"/api/v1/myths/{key}") == key
+        assert viewed_myth_id(f"/story/{key}?ref=share") == key
+        assert viewed_myth_id("/api/v1/myths/not-an-id") is None
+        assert viewed_myth_id("/api/v1/generate-myth") is None
+
+
+class TestPrerenderer:
+    """Test threshold-driven, incremental rendering"""
+
+    def test_renders_once_at_threshold(self, tmp_path):
+        """Test that files appear when the threshold is reached and are not rewritten afterwards"""
+        key = stored_myth()
+        renderer = Prerenderer(str(tmp_path), threshold=3, counter=MemoryViewCounter(), base_url="https://x")
+
+        async def views(count):
+            for _ in range(count):
+                await renderer.record_view(key)
+
+        asyncio.run(views(2))
+        assert not (tmp_path / "myths" / f"{key}.json").exists()
+
+        asyncio.run(views(3))
+        assert json.loads((tmp_path / "myths" / f"{key}.json").read_bytes()) == MYTH
+        assert "og:description" in (tmp_path / "myths" / f"{key}.html").read_text()
+        assert renderer.renders == 1
+        assert not [path for path in (tmp_path / "myths").iterdir() if path.name.endswith(".tmp")]
+
+    def test_unknown_myth_is_not_rendered(self, tmp_path):
+        """Test that views of an expired myth write nothing"""
+        renderer = Prerenderer(str(tmp_path), threshold=1, counter=MemoryViewCounter(), base_url="https://x")
+        asyncio.run(renderer.record_view("f" * 32))
+        assert renderer.renders == 0
+
+    def test_rebuild_rerenders_existing_files(self, tmp_path):
+        """Test that the rebuild re-renders pages already on disk from their JSON"""
+        key = "e" * 32
+        (tmp_path / "myths").mkdir()
+        (tmp_path / "myths" / f"{key}.json").write_bytes(dumps(MYTH))
+
+        renderer = Prerenderer(str(tmp_path), threshold=100, counter=MemoryViewCounter(), base_url="https://x")
+        assert asyncio.run(renderer.rebuild()) == 1
+        assert (tmp_path / "myths" / f"{key}.html").exists()
+
+
+class TestViewEndpoint:
+    """Test the view counter behind the nginx mirror"""
+
+    @pytest.fixture(autouse=True)
+    def view_secret(self):
+        with patch.object(myths.settings, "MYTH_VIEW_SECRET", "mirror-secret"):
+            yield
+
+    def post_view(self, uri: str, secret: str = "mirror-secret"):
+        return local_client.post("/api/v1/myth-views", headers={"X-Original-URI": uri, "X-Myth-View-Secret": secret})
+
+    def test_counts_mirrored_views(self, tmp_path):
+        """Test that a mirrored view is counted and can trigger a render"""
+        key = stored_myth()
+        renderer = Prerenderer(str(tmp_path), threshold=1, counter=MemoryViewCounter(), base_url="https://x")
+
+        with patch.object(myths, "prerenderer", renderer):
+            response = self.post_view(f"/story/{key}")
+
+        assert response.status_code == 204
+        assert (tmp_path / "myths" / f"{key}.html").exists()
+
+    def test_rejects_other_uris(self):
+        """Test that only myth URIs are counted"""
+        assert self.post_view("/api/v1/metrics").status_code == 400
+
+    def test_rejects_requests_without_the_mirror_secret(self):
+        """Test that clients cannot inflate view counts directly"""
+        key = stored_myth()
+        renderer = Prerenderer("", threshold=1, counter=MemoryViewCounter(), base_url="https://x")
+
+        with patch.object(myths, "prerenderer", renderer):
+            assert self.post_view(f"/story/{key}", secret="guess").status_code == 403
+            assert local_client.post("/api/v1/myth-views", headers={"X-Original-URI": f"/story/{key}"}).status_code == 403
+        assert renderer.views == 0
+
+    def test_hidden_without_a_secret(self):
+        """Test that view counting is off until a secret is configured"""
+        with patch.object(myths.settings, "MYTH_VIEW_SECRET", ""):
+            assert self.post_view(f"/story/{stored_myth()}", secret="").status_code == 404
+
+    def test_unknown_myths_are_not_counted(self):
+        """Test that ids that were never generated are not counted"""
+        renderer = Prerenderer("", threshold=1, counter=MemoryViewCounter(), base_url="https://x")
+
+        with patch.object(myths, "prerenderer", renderer):
+            assert self.post_view("/story/" + "0" * 32).status_code == 404
+        assert renderer.views == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,115 @@
+"""
+Test cases for the procedural fallback generator and degraded mode.
+"""
+
+import asyncio
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.models.request import MythGenerationRequest
+from app.services import generation
+from app.services.myth_utils import analyze_scenario
+from app.services.openai_client import OpenAIService
+from app.services.procedural_myth import PROCEDURAL_MODEL, generate_procedural_myth
+from app.services.response_cache import response_cache
+from app.services.upstream_limiter import UpstreamThrottled
+
+SCENARIO = "My landlord raised the rent again and I cannot sleep"
+
+
+def request(scenario=SCENARIO, culture="norse", tone="balanced") -> MythGenerationRequest:
+    return MythGenerationRequest(scenario=scenario, culture=culture, tone=tone)
+
+
+class TestProceduralMyth:
+    """Test the local generator"""
+
+    def test_schema_valid_with_distinct_choices(self):
+        """Test that the myth has three distinct endings and procedural metadata"""
+        myth = generate_procedural_myth(request())
+
+        assert len({choice.label for choice in myth.choices}) == 3
+        assert [choice.id for choice in myth.choices] == ["c1", "c2", "c3"]
+        assert myth.meta.ai_model == PROCEDURAL_MODEL
+        assert myth.meta.culture == "norse"
+
+    def test_uses_scenario_culture_and_motifs(self):
+        """Test that the story is built from the scenario and the culture's seed motifs"""
+        myth = generate_procedural_myth(request())
+
+        assert SCENARIO in myth.adapted_story
+        assert any(part in myth.adapted_story for part in ("Midgard", "Yggdrasil", "fjord"))
+        assert myth.meta.source_motif.lower().split("; ")[0] in myth.adapted_story.lower()
+
+    def test_deterministic_per_scenario_and_varied_across(self):
+        """Test that a scenario always gets the same myth, and different scenarios differ"""
+        assert generate_procedural_myth(request()).model_dump(exclude={"meta"}) == \
+            generate_procedural_myth(request()).model_dump(exclude={"meta"})
+
+        stories = {
+            generate_procedural_myth(request(f"My neighbour plays drums at night, week {i}")).adapted_story
+            for i in range(10)
+        }
+        assert len(stories) > 5
+
+    def test_auto_culture_is_resolved(self):
+        """Test that auto resolves to the detected culture"""
+        myth = generate_procedural_myth(request("Our office plans a trip to Egypt to see a pyramid", culture="auto"))
+        assert myth.meta.culture == "egyptian"
+
+    def test_well_under_ten_milliseconds(self):
+        """Test the latency budget"""
+        generate_procedural_myth(request())
+        start = time.perf_counter()
+        for i in range(100):
+            generate_procedural_myth(request(f"{SCENARIO} for the {i}th time"))
+        assert (time.perf_counter() - start) / 100 < 0.01
+
+
+class TestDegradedMode:
+    """Test when generation answers locally instead of upstream"""
+
+    @pytest.fixture
+    def service(self):
+        service = OpenAIService()
+        service._client = MagicMock()
+        with patch.object(service, "moderate_content", return_value=True):
+            yield service
+
+    def test_open_circuit_skips_upstream(self, service):
+        """Test that a failing upstream is not called at all"""
+        with patch("app.services.openai_client.model_router.circuit_open", return_value=True):
+            myth = asyncio.run(service.generate_myth(request()))
+
+        assert myth.meta.ai_model == PROCEDURAL_MODEL
+        service._client.chat.completions.create.assert_not_called()
+
+    def test_throttled_upstream_degrades(self, service):
+        """Test that no upstream answer before the deadline yields a local myth"""
+        with patch.object(service, "_call_upstream", side_effect=UpstreamThrottled("busy", 1)):
+            myth = asyncio.run(service.generate_myth(request()))
+        assert myth.meta.ai_model == PROCEDURAL_MODEL
+
+    def test_throttling_surfaces_when_disabled(self, service):
+        """Test that degraded mode can be turned off"""
+        with patch.object(service, "_call_upstream", side_effect=UpstreamThrottled("busy", 1)), \
+             patch("app.services.openai_client.settings.DEGRADED_MODE", False):
+            with pytest.raises(UpstreamThrottled):
+                asyncio.run(service.generate_myth(request()))
+
+    def test_procedural_myths_are_not_cached(self):
+        """Test that the next request for a scenario tries the model again"""
+        myth = generate_procedural_myth(request())
+
+        async def procedural(*args, **kwargs):
+            return myth
+
+        with patch.object(generation.openai_service, "generate_myth", procedural):
+            asyncio.run(generation.generate_and_cache(request(), analyze_scenario(SCENARIO), "procedural-test"))
+        assert "procedural-test" not in response_cache
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
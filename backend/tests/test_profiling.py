@@ -0,0 +1,129 @@
+"""
+Test cases for on-demand request profiling.
+"""
+
+import threading
+import time
+from collections import Counter
+from unittest.mock import patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.profiling import StackSampler, list_profiles, profile_request, write_profile
+from app.main import app
+
+local_client = TestClient(app, base_url="http://localhost")
+
+
+def spin(seconds: float) -> None:
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def profiled_app() -> FastAPI:
+    """Minimal app with only the profiling middleware"""
+    test_app = FastAPI()
+    test_app.middleware("http")(profile_request)
+
+    @test_app.get("/busy")
+    async def busy():
+        spin(0.05)
+        return {"ok": True}
+
+    return test_app
+
+
+class TestStackSampler:
+    """Test stack sampling and profile files"""
+
+    def test_samples_busy_thread(self):
+        """Test that samples name the function burning CPU"""
+        sampler = StackSampler(threading.get_ident(), interval=0.001)
+        sampler.start()
+        spin(0.05)
+        sampler.stop()
+
+        assert sampler.samples > 0
+        assert any("spin (test_profiling.py" in stack.split(";")[-1] for stack in sampler.stacks)
+
+    def test_write_is_folded_and_pruned(self, tmp_path):
+        """Test the folded output format and that only the newest profiles are kept"""
+        for index in range(3):
+            write_profile(tmp_path, f"{index}-GET-x-1ms.folded", Counter({"main;handler": 2, "main": 1}), keep=2)
+
+        names = [profile["name"] for profile in list_profiles(tmp_path)]
+        assert names == ["2-GET-x-1ms.folded", "1-GET-x-1ms.folded"]
+        assert (tmp_path / names[0]).read_text() == "main;handler 2\nmain 1\n"
+        assert not list(tmp_path.glob("*.tmp"))
+
+
+class TestProfilingMiddleware:
+    """Test which requests get profiled"""
+
+    @pytest.fixture(autouse=True)
+    def profile_settings(self, tmp_path):
+        with patch.object(settings, "ADMIN_TOKEN", "secret"), \
+             patch.object(settings, "PROFILE_DIR", str(tmp_path)), \
+             patch.object(settings, "PROFILE_INTERVAL", 0.001), \
+             patch.object(settings, "PROFILE_SAMPLE_RATE", 0.0):
+            yield tmp_path
+
+    def test_admin_header_profiles_request(self, profile_settings):
+        """Test that X-Profile with the admin token writes a profile"""
+        response = TestClient(profiled_app()).get("/busy", headers={"X-Profile": "1", "X-Admin-Token": "secret"})
+
+        assert response.status_code == 200
+        name = response.headers["x-profile-id"]
+        assert "-GET-busy-" in name
+        assert "spin" in (profile_settings / name).read_text()
+
+    def test_header_without_token_is_ignored(self, profile_settings):
+        """Test that only admins can ask for a profile"""
+        response = TestClient(profiled_app()).get("/busy", headers={"X-Profile": "1", "X-Admin-Token": "wrong"})
+
+        assert "x-profile-id" not in response.headers
+        assert list_profiles(profile_settings) == []
+
+    def test_sample_rate(self, profile_settings):
+        """Test that a sample rate of 1 profiles every request without telling the client"""
+        with patch.object(settings, "PROFILE_SAMPLE_RATE", 1.0):
+            response = TestClient(profiled_app()).get("/busy")
+        assert "x-profile-id" not in response.headers
+        assert len(list_profiles(profile_settings)) == 1
+
+
+class TestProfilesEndpoint:
+    """Test the admin listing of profiles"""
+
+    def test_hidden_without_admin_token(self):
+        """Test that admin routes do not exist until a token is configured"""
+        with patch.object(settings, "ADMIN_TOKEN", ""):
+            assert local_client.get("/api/v1/admin/profiles").status_code == 404
+
+    def test_wrong_token_rejected(self):
+        """Test that a wrong admin token is refused"""
+        with patch.object(settings, "ADMIN_TOKEN", "secret"):
+            response = local_client.get("/api/v1/admin/profiles", headers={"X-Admin-Token": "nope"})
+        assert response.status_code == 403
+
+    def test_lists_and_downloads_profiles(self, tmp_path):
+        """Test listing recent profiles and fetching one"""
+        write_profile(tmp_path, "1-GET-x-5ms.folded", Counter({"main;handler": 3}), keep=10)
+
+        with patch.object(settings, "ADMIN_TOKEN", "secret"), patch.object(settings, "PROFILE_DIR", str(tmp_path)):
+            listing = local_client.get("/api/v1/admin/profiles", headers={"X-Admin-Token": "secret"})
+            profile = local_client.get("/api/v1/admin/profiles/1-GET-x-5ms.folded", headers={"X-Admin-Token": "secret"})
+            missing = local_client.get("/api/v1/admin/profiles/..%2Fsecret.folded", headers={"X-Admin-Token": "secret"})
+
+        assert listing.status_code == 200
+        assert [item["name"] for item in listing.json()["profiles"]] == ["1-GET-x-5ms.folded"]
+        assert profile.text == "main;handler 3\n"
+        assert missing.status_code == 404
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
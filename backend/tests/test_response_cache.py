@@ -0,0 +1,165 @@
+"""
+Test cases for the compact response cache representation.
+"""
+
+import asyncio
+import time
+from unittest.mock import patch
+
+import pytest
+
+from app.core.config import settings
+from app.models.request import MythGenerationRequest
+from app.services import generation, response_cache
+from app.services.myth_utils import analyze_scenario
+from app.services.response_cache import CachedBody, cache_stats, get_cached_body, lookup_body, store_body
+
+BODY = b'{"adapted_story":"' + b"the weaver sang to the loom " * 40 + b'"}'
+
+
+class TestCachedBody:
+    """Test encoding and decoding of cache entries"""
+
+    @pytest.mark.parametrize("codec", ["none", "zlib"])
+    def test_round_trip(self, codec):
+        """Test that every codec returns the original body"""
+        entry = CachedBody.encode(BODY, codec=codec, level=6)
+        assert entry.body == BODY
+        assert entry.codec == codec
+
+    def test_compressed_entry_is_smaller(self):
+        """Test that a story-sized body is stored compressed"""
+        entry = CachedBody.encode(BODY, codec="zlib", level=6)
+        assert len(entry.payload) < len(BODY) / 2
+
+    def test_incompressible_body_is_kept_raw(self):
+        """Test that compression is skipped when it does not shrink the body"""
+        entry = CachedBody.encode(b"{}", codec="zlib", level=6)
+        assert entry.codec == "none"
+        assert entry.payload == b"{}"
+
+    def test_entries_have_no_dict(self):
+        """Test that entries are slotted records"""
+        assert not hasattr(CachedBody.encode(BODY), "__dict__")
+
+    def test_unknown_codec_falls_back_to_zlib(self):
+        """Test that an unavailable codec is replaced by zlib"""
+        assert response_cache.resolve_codec("brotli") == "zlib"
+
+
+class TestCacheLookup:
+    """Test storing and reading bodies through the module cache"""
+
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        """Start every test with an empty cache"""
+        response_cache.response_cache.clear()
+        yield
+        response_cache.response_cache.clear()
+
+    def test_store_and_get(self):
+        """Test that stored bodies come back decoded"""
+        store_body("greek:balanced:abc", BODY)
+        assert get_cached_body("greek:balanced:abc") == BODY
+
+    def test_expired_entry_is_a_miss(self):
+        """Test that entries older than the TTL are not served and are dropped"""
+        response_cache.response_cache["old"] = CachedBody.encode(BODY, time.time() - 86400)
+        assert get_cached_body("old") is None
+        assert "old" not in response_cache.response_cache
+        assert get_cached_body("missing") is None
+
+    def test_least_recently_used_entries_are_evicted(self):
+        """Test that the cache stays within its bound, keeping recently read entries"""
+        cache_stats.reset()
+        with patch.object(settings, "RESPONSE_CACHE_MAX_ENTRIES", 2):
+            store_body("a", BODY)
+            store_body("b", BODY)
+            lookup_body("a")
+            store_body("c", BODY)
+
+        assert list(response_cache.response_cache) == ["a", "c"]
+        assert cache_stats.as_dict()["evictions"] == 1
+
+    def test_entries_between_ttls_are_stale(self):
+        """Test that entries past the soft TTL are served and flagged stale"""
+        age = (settings.RESPONSE_CACHE_SOFT_TTL + settings.RESPONSE_CACHE_TTL) / 2
+        response_cache.response_cache["aging"] = CachedBody.encode(BODY, time.time() - age)
+        store_body("fresh", BODY)
+
+        assert lookup_body("aging") == (BODY, True)
+        assert lookup_body("fresh") == (BODY, False)
+
+    def test_lookups_are_counted(self):
+        """Test the hit, stale hit and miss counters"""
+        cache_stats.reset()
+        store_body("fresh", BODY)
+        response_cache.response_cache["aging"] = CachedBody.encode(BODY, time.time() - settings.RESPONSE_CACHE_SOFT_TTL)
+
+        lookup_body("fresh")
+        lookup_body("aging")
+        lookup_body("missing")
+        stats = cache_stats.as_dict()
+        assert (stats["hits"], stats["stale_hits"], stats["misses"]) == (1, 1, 1)
+        assert stats["hit_ratio"] == pytest.approx(2 / 3, abs=1e-3)
+
+
+class TestStaleWhileRevalidate:
+    """Test background regeneration of stale entries"""
+
+    SCENARIO = "My landlord raised the rent again and I cannot sleep"
+
+    @pytest.fixture(autouse=True)
+    def stale_entry(self):
+        """Seed one entry just past the soft TTL"""
+        response_cache.response_cache.clear()
+        cache_stats.reset()
+        self.request = MythGenerationRequest(scenario=self.SCENARIO, culture="greek")
+        self.analysis = analyze_scenario(self.SCENARIO)
+        response_cache.response_cache["stale"] = CachedBody.encode(BODY, time.time() - settings.RESPONSE_CACHE_SOFT_TTL)
+        yield
+        response_cache.response_cache.clear()
+
+    def test_concurrent_stale_hits_refresh_once(self):
+        """Test that every caller gets the stale body at once and only one refresh runs"""
+        calls = []
+
+        async def regenerate(request, analysis, cache_key, client_id=None, source=None):
+            calls.append(source)
+            await asyncio.sleep(0.05)
+            store_body(cache_key, b"{}")
+
+        async def scenario():
+            bodies = [(await generation.cached_myth(self.request, self.analysis, "stale"))[0] for _ in range(5)]
+            while generation.cache_refresher.in_flight:
+                await asyncio.sleep(0.01)
+            return bodies
+
+        with patch.object(generation, "generate_and_cache", regenerate):
+            bodies = asyncio.run(scenario())
+
+        assert bodies == [BODY] * 5
+        assert calls == ["refresh"]
+        assert get_cached_body("stale") == b"{}"
+        assert cache_stats.refreshes == 1
+        assert cache_stats.refreshes_deduplicated == 4
+
+    def test_failed_refresh_keeps_serving_stale(self):
+        """Test that a failing refresh leaves the entry in place until the hard TTL"""
+        async def regenerate(*args, **kwargs):
+            raise RuntimeError("upstream down")
+
+        async def scenario():
+            await generation.cached_myth(self.request, self.analysis, "stale")
+            while generation.cache_refresher.in_flight:
+                await asyncio.sleep(0.01)
+
+        with patch.object(generation, "generate_and_cache", regenerate):
+            asyncio.run(scenario())
+
+        assert cache_stats.refresh_failures == 1
+        assert lookup_body("stale") == (BODY, True)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
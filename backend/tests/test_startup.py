@@ -0,0 +1,61 @@
+"""
+Cold start regression tests.
+Runs the startup measurement mode in a fresh interpreter.
+"""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Generous defaults so slow CI machines pass; tighten locally via env
+IMPORT_BUDGET_SECONDS = float(os.environ.get("STARTUP_IMPORT_BUDGET", "3.0"))
+LIFESPAN_BUDGET_SECONDS = float(os.environ.get("STARTUP_LIFESPAN_BUDGET", "0.5"))
+
+
+@pytest.fixture(scope="module")
+def startup_profile():
+    """Measure a cold start once for all tests in this module"""
+    env = dict(os.environ)
+    env.setdefault("OPENAI_API_KEY", "test-key")
+    env["CACHE_SNAPSHOT_PATH"] = ""
+    
+    result = subprocess.run(
+        [sys.executable, "-m", "app.core.startup", "--json"],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+class TestColdStart:
+    """Fail the suite if cold start regresses"""
+    
+    def test_heavy_sdks_are_deferred(self, startup_profile):
+        """Test that importing the app does not import the OpenAI or Sentry SDKs"""
+        assert startup_profile["deferred_modules_loaded"] == []
+    
+    def test_import_within_budget(self, startup_profile):
+        """Test that importing the application stays within budget"""
+        assert startup_profile["import_total"] < IMPORT_BUDGET_SECONDS
+    
+    def test_lifespan_startup_within_budget(self, startup_profile):
+        """Test that lifespan startup only schedules background work"""
+        assert startup_profile["lifespan_startup"] < LIFESPAN_BUDGET_SECONDS
+    
+    def test_breakdown_covers_every_phase(self, startup_profile):
+        """Test that every import phase is reported"""
+        assert set(startup_profile["imports"]) == {"fastapi", "config", "services", "routes", "app"}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
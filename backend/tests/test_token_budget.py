@@ -0,0 +1,124 @@
+"""
+Test cases for per-client token budgets.
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from starlette.requests import Request
+
+from app.services.token_budget import (
+    BudgetExceeded,
+    MemoryBudgetStore,
+    TokenBudget,
+    TokenUsage,
+    client_identity,
+)
+
+
+def usage_of(prompt: int, completion: int) -> TokenUsage:
+    usage = TokenUsage()
+    usage.add(SimpleNamespace(prompt_tokens=prompt, completion_tokens=completion))
+    return usage
+
+
+def make_request(headers=None, host="10.0.0.1") -> Request:
+    return Request({
+        "type": "http",
+        "headers": [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()],
+        "client": (host, 1234),
+    })
+
+
+class TestTokenUsage:
+    """Test usage accumulation"""
+    
+    def test_accumulates_calls(self):
+        """Test that usage from several calls adds up"""
+        usage = usage_of(100, 50)
+        usage.add(SimpleNamespace(prompt_tokens=10, completion_tokens=5))
+        usage.add(None)
+        
+        assert usage.prompt_tokens == 110
+        assert usage.completion_tokens == 55
+        assert usage.total == 165
+
+
+class TestTokenBudget:
+    """Test charging and enforcement"""
+    
+    def test_charge_reduces_remaining(self):
+        """Test that charged tokens count against every window"""
+        async def run():
+            budget = TokenBudget(MemoryBudgetStore(), per_minute=1000, per_day=5000)
+            await budget.charge("alice", usage_of(300, 200))
+            return await budget.status("alice"), await budget.status("bob")
+        
+        alice, bob = asyncio.run(run())
+        assert alice["minute"]["remaining"] == 500
+        assert alice["day"]["used"] == 500
+        assert bob["minute"]["remaining"] == 1000
+        assert 0 < alice["minute"]["reset_in"] <= 60
+    
+    def test_check_rejects_spent_client(self):
+        """Test that a client over budget is rejected with a retry hint"""
+        async def run():
+            budget = TokenBudget(MemoryBudgetStore(), per_minute=100, per_day=0)
+            await budget.check("alice")
+            await budget.charge("alice", usage_of(80, 40))
+            with pytest.raises(BudgetExceeded) as excinfo:
+                await budget.check("alice")
+            await budget.check("bob")
+            return budget, excinfo.value
+        
+        budget, error = asyncio.run(run())
+        assert error.window == "minute"
+        assert 1 <= error.retry_after <= 60
+        assert budget.rejected == 1
+        assert budget.stats()["prompt_tokens"] == 80
+    
+    def test_disabled_windows(self):
+        """Test that zero limits disable enforcement"""
+        async def run():
+            budget = TokenBudget(MemoryBudgetStore(), per_minute=0, per_day=0)
+            await budget.charge("alice", usage_of(10**6, 0))
+            await budget.check("alice")
+            return await budget.status("alice")
+        
+        assert asyncio.run(run()) == {}
+    
+    def test_check_fails_open(self):
+        """Test that a broken counter store does not block generation"""
+        class BrokenStore(MemoryBudgetStore):
+            async def get(self, keys):
+                raise ConnectionError("redis down")
+        
+        budget = TokenBudget(BrokenStore(), per_minute=10, per_day=0)
+        asyncio.run(budget.check("alice"))
+
+
+class TestMemoryBudgetStore:
+    """Test counter expiry"""
+    
+    def test_expired_counters_read_zero(self):
+        """Test that counters past their TTL are ignored"""
+        async def run():
+            store = MemoryBudgetStore()
+            await store.add([("a", 0), ("b", 60)], 5)
+            return await store.get(["a", "b", "c"])
+        
+        assert asyncio.run(run()) == [0, 5, 0]
+
+
+class TestClientIdentity:
+    """Test caller identification"""
+    
+    def test_uses_last_forwarded_hop(self):
+        """Test that the address appended by our proxy wins over spoofed ones"""
+        request = make_request({"X-Forwarded-For": "1.2.3.4, 203.0.113.9"})
+        assert client_identity(request) == "203.0.113.9"
+    
+    def test_falls_back_to_peer(self):
+        """Test that the socket peer is used without a proxy"""
+        assert client_identity(make_request()) == "10.0.0.1"
@@ -0,0 +1,134 @@
+"""
+Test cases for the adaptive upstream concurrency limiter.
+"""
+
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.upstream_limiter import (
+    AIMDLimiter,
+    UpstreamThrottled,
+    classify_error,
+    retry_after_seconds,
+)
+
+
+class FakeAPIError(Exception):
+    """Shaped like the SDK's APIStatusError"""
+
+    def __init__(self, status_code: int, headers=None):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+        self.response = SimpleNamespace(headers=headers or {})
+
+
+def make_limiter(**overrides) -> AIMDLimiter:
+    options = dict(
+        initial=4, minimum=1, maximum=8, increase=1.0, decrease=0.5,
+        max_retries=3, backoff_base=0.01, backoff_max=0.02, deadline=5.0,
+    )
+    options.update(overrides)
+    return AIMDLimiter(**options)
+
+
+class TestErrorClassification:
+    """Test which upstream failures are retried"""
+
+    def test_kinds(self):
+        """Test 429, timeout, 5xx and client errors"""
+        assert classify_error(FakeAPIError(429)) == "throttled"
+        assert classify_error(TimeoutError()) == "timeout"
+        assert classify_error(FakeAPIError(503)) == "server_error"
+        assert classify_error(FakeAPIError(400)) is None
+        assert classify_error(ValueError("bad json")) is None
+
+    def test_retry_after_headers(self):
+        """Test seconds, milliseconds and missing Retry-After values"""
+        assert retry_after_seconds(FakeAPIError(429, {"retry-after": "2"})) == 2.0
+        assert retry_after_seconds(FakeAPIError(429, {"retry-after-ms": "250"})) == 0.25
+        assert retry_after_seconds(FakeAPIError(429)) is None
+
+
+class TestAIMDLimiter:
+    """Test limit adaptation and retries"""
+
+    def test_success_increases_limit(self):
+        """Test the additive increase"""
+        limiter = make_limiter()
+        for _ in range(4):
+            asyncio.run(limiter.run(lambda: "ok"))
+        assert limiter.limit == pytest.approx(5.0, abs=0.2)
+        assert limiter.successes == 4
+
+    def test_throttle_halves_limit_and_retries(self):
+        """Test that a 429 cuts the limit, honors Retry-After and then succeeds"""
+        limiter = make_limiter()
+        calls = []
+
+        def flaky():
+            calls.append(time.monotonic())
+            if len(calls) == 1:
+                raise FakeAPIError(429, {"retry-after": "0.05"})
+            return "ok"
+
+        assert asyncio.run(limiter.run(flaky)) == "ok"
+        assert calls[1] - calls[0] >= 0.05
+        assert limiter.limit < 4
+        assert limiter.stats()["throttled"] == 1
+        assert limiter.stats()["retries"] == 1
+
+    def test_gives_up_at_deadline(self):
+        """Test that persistent throttling surfaces as UpstreamThrottled with a retry hint"""
+        limiter = make_limiter()
+
+        def throttled():
+            raise FakeAPIError(429, {"retry-after": "30"})
+
+        with pytest.raises(UpstreamThrottled) as excinfo:
+            asyncio.run(limiter.run(throttled, deadline=time.time() + 1))
+        assert excinfo.value.retry_after == 30
+        assert limiter.gave_up == 1
+        assert limiter.in_flight == 0
+
+    def test_client_errors_are_not_retried(self):
+        """Test that a 400 is raised at once"""
+        limiter = make_limiter()
+        calls = []
+
+        def bad_request():
+            calls.append(1)
+            raise FakeAPIError(400)
+
+        with pytest.raises(FakeAPIError):
+            asyncio.run(limiter.run(bad_request))
+        assert len(calls) == 1
+        assert limiter.limit == 4
+
+    def test_in_flight_never_exceeds_limit(self):
+        """Test that concurrent callers queue for slots"""
+        limiter = make_limiter(initial=2, maximum=2)
+        lock = threading.Lock()
+        state = {"current": 0, "peak": 0}
+
+        def call():
+            with lock:
+                state["current"] += 1
+                state["peak"] = max(state["peak"], state["current"])
+            time.sleep(0.02)
+            with lock:
+                state["current"] -= 1
+
+        async def burst():
+            await asyncio.gather(*(limiter.run(call) for _ in range(8)))
+
+        asyncio.run(burst())
+        assert state["peak"] == 2
+        assert limiter.in_flight == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -61,17 +61,27 @@ api.interceptors.response.use(
   }
 )
 
+/**
+ * Key identifying one logical generation, so retries of it are not generated twice
+ * @returns {string} A random key
+ */
+export const newIdempotencyKey = () =>
+  globalThis.crypto?.randomUUID?.() ?? `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`
+
 /**
  * Generate a myth from a modern scenario
  * @param {Object} requestData - The myth generation request
  * @param {string} requestData.scenario - The modern scenario
  * @param {string} requestData.culture - The cultural tradition
  * @param {string} requestData.tone - The story tone
+ * @param {string} [idempotencyKey] - Reuse the same key when retrying the same generation
  * @returns {Promise<Object>} The generated myth data
  */
-export const generateMythAPI = async (requestData) => {
+export const generateMythAPI = async (requestData, idempotencyKey = newIdempotencyKey()) => {
   try {
-    const response = await api.post('/generate-myth', requestData)
+    const response = await api.post('/generate-myth', requestData, {
+      headers: { 'Idempotency-Key': idempotencyKey },
+    })
     return response.data
   } catch (error) {
     console.error('Failed to generate myth:', error)